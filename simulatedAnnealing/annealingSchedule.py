@@ -0,0 +1,21 @@
+import math
+
+# Number of neighbours sampled to calibrate T0
+CALIBRATION_SAMPLES = 100
+# After a reheat the temperature restarts at this fraction of T0
+REHEAT_FACTOR = 0.5
+
+
+def calibrate_temperature(sample_delta, target_acceptance=0.8, samples=CALIBRATION_SAMPLES, default=100):
+    """
+    Pick T0 so that an average uphill move is accepted with probability
+    target_acceptance: exp(-mean_uphill_delta / T0) = target_acceptance.
+
+    sample_delta() evaluates one random neighbour of the starting solution and
+    returns its penalty delta. Returns (T0, samples evaluated); `default` is used
+    when no sampled move goes uphill.
+    """
+    deltas = [delta for delta in (sample_delta() for _ in range(samples)) if delta > 0]
+    if not deltas:
+        return default, samples
+    return -(sum(deltas) / len(deltas)) / math.log(target_acceptance), samples
@@ -0,0 +1,242 @@
+import numpy as np
+from randomStream import new_seed
+from lowerBounds import picker_lower_bound
+
+
+def _stack(problems):
+    """
+    Stack instances into padded arrays. Item slots >= n[b] are padding and the
+    depot of every instance is moved to index M (the largest location count).
+    """
+    B = len(problems)
+    n = np.array([len(p.items) for p in problems])
+    N = int(n.max())
+    M = max(len(p.travel_times) - 1 for p in problems)
+
+    locations = np.full((B, N), M, dtype=np.int64)
+    travel = np.zeros((B, M + 1, M + 1), dtype=np.int64)
+    for b, p in enumerate(problems):
+        locations[b, :n[b]] = [p.product_locations[item] for item in p.items]
+        matrix = np.asarray(p.travel_times, dtype=np.int64)
+        L = len(matrix) - 1
+        travel[b, :L, :L] = matrix[:L, :L]
+        travel[b, :L, M] = matrix[:L, -1]
+        travel[b, M, :L] = matrix[-1, :L]
+        travel[b, M, M] = 0
+
+    valid = np.arange(N)[None, :] < n[:, None]
+    capacity = np.array([p.capacity for p in problems])
+    max_time = np.array([p.max_time for p in problems])
+    return n, locations, travel, valid, capacity, max_time, M
+
+
+class _Batch:
+    """
+    Lockstep SA state for a batch of instances with the same number of pickers.
+
+    Every item has a route slot (picker = slot // slots_per_picker) and a rank
+    that orders the items of a route, so a whole batch of solutions is two
+    (B, N) arrays and evaluating all of them is a handful of array operations.
+    """
+
+    def __init__(self, n, locations, travel, valid, capacity, max_time, depot, num_pickers,
+                 slots_per_picker=None):
+        self.n, self.locations, self.travel, self.valid = n, locations, travel, valid
+        self.capacity, self.max_time, self.depot = capacity, max_time, depot
+        self.num_pickers = num_pickers
+        if slots_per_picker is None:
+            # one picker never needs more routes than it takes to carry every item, plus a spare
+            slots_per_picker = int(np.max(-(-n // capacity))) + 1
+        self.slots_per_picker = slots_per_picker
+        self.num_routes = num_pickers * self.slots_per_picker
+        self.rows = np.arange(len(n))[:, None]
+        self.travel_flat = travel.reshape(-1)
+
+    def subset(self, keep):
+        """Batch with only the chains in `keep` (boolean mask)"""
+        return _Batch(self.n[keep], self.locations[keep], self.travel[keep], self.valid[keep],
+                      self.capacity[keep], self.max_time[keep], self.depot, self.num_pickers,
+                      self.slots_per_picker)
+
+    def initial(self, rng):
+        """Shuffle the items and deal them round-robin over the pickers, `capacity` per route"""
+        B, N = self.locations.shape
+        keys = rng.random((B, N)) + ~self.valid  # padding sorts last
+        order = np.argsort(keys, axis=1)
+        position = np.empty_like(order)
+        position[self.rows, order] = np.arange(N)
+
+        picker = position % self.num_pickers
+        route = (position // self.num_pickers) // self.capacity[:, None]
+        slots = picker * self.slots_per_picker + np.minimum(route, self.slots_per_picker - 1)
+        ranks = position / N
+        return np.where(self.valid, slots, self.num_routes), ranks
+
+    def evaluate(self, slots, ranks):
+        """Penalty of every solution, with the weights of OrderPickingProblem.evaluate_solution"""
+        B, N = slots.shape
+        rows = self.rows
+        order = np.argsort(slots + ranks, axis=1)
+        s = slots[rows, order]
+        loc = self.locations[rows, order]
+
+        starts = np.empty((B, N), dtype=bool)
+        starts[:, 0] = True
+        np.not_equal(s[:, 1:], s[:, :-1], out=starts[:, 1:])
+        ends = np.empty((B, N), dtype=bool)
+        ends[:, :-1] = starts[:, 1:]
+        ends[:, -1] = True
+        previous = np.empty_like(loc)
+        previous[:, 0] = self.depot
+        previous[:, 1:] = loc[:, :-1]
+
+        # Padding sits at the depot, where every leg costs 0, so it adds nothing
+        size = self.depot + 1
+        base = rows * (size * size)
+        travel = self.travel_flat
+        arrive = travel[base + np.where(starts, self.depot, previous) * size + loc]
+        leave = travel[base + loc * size + self.depot]
+        cost = arrive + leave * ends
+
+        # padding uses the spare bin after the last route / picker of its chain
+        R, K = self.num_routes, self.num_pickers
+        route_sizes = np.bincount((rows * (R + 1) + s).ravel(), minlength=B * (R + 1)).reshape(B, R + 1)
+        route_sizes[:, R] = 0
+        picker_time = np.bincount((rows * (K + 1) + s // self.slots_per_picker).ravel(),
+                                  weights=cost.ravel(), minlength=B * (K + 1)).reshape(B, K + 1)
+
+        capacity_violation = np.maximum(route_sizes - self.capacity[:, None], 0).sum(axis=1)
+        time_violation = np.maximum(picker_time[:, :K] - self.max_time[:, None], 0).sum(axis=1)
+        return capacity_violation * 1000 + time_violation * 50
+
+    def neighbors(self, slots, ranks, rng):
+        """One random move per chain: move an item to another route, swap two items or reorder one"""
+        B = len(slots)
+        b = self.rows[:, 0]
+        u = rng.random((4, B))
+        i = (u[0] * self.n).astype(np.int64)
+        j = (u[1] * self.n).astype(np.int64)
+        operator = (u[2] * 3).astype(np.int64)
+
+        move, swap, reorder = operator == 0, operator == 1, operator == 2
+        slot_i, slot_j = slots[b, i], slots[b, j]
+        rank_i, rank_j = ranks[b, i], ranks[b, j]
+        new_slot = (u[3] * self.num_routes).astype(np.int64)
+
+        slots, ranks = slots.copy(), ranks.copy()
+        slots[b, j] = np.where(swap, slot_i, slot_j)
+        ranks[b, j] = np.where(swap, rank_i, rank_j)
+        slots[b, i] = np.where(move, new_slot, np.where(swap, slot_j, slot_i))
+        ranks[b, i] = np.where(reorder, u[3], np.where(swap, rank_j, rank_i))
+        return slots, ranks
+
+    def decode(self, b, slots, ranks, items):
+        """List form (solution[picker][route] = [items]) of chain b"""
+        order = np.argsort(slots[b, :self.n[b]] + ranks[b, :self.n[b]])
+        solution = [[] for _ in range(self.num_pickers)]
+        current_slot = None
+        for index in order:
+            slot = int(slots[b, index])
+            if slot != current_slot:
+                solution[slot // self.slots_per_picker].append([])
+                current_slot = slot
+            solution[slot // self.slots_per_picker][-1].append(items[index])
+        return solution
+
+
+def batch_simulated_annealing(problems, T0=100, alpha=0.95, max_iter_per_temp=100,
+                              stagnation_threshold=30, seed=None):
+    """
+    Iterative SA for many small (base variant) instances at once: all chains
+    try 1, 2, ... pickers in lockstep and every SA step moves and evaluates
+    every chain with vectorized NumPy operations. A chain joins at its picker
+    lower bound and leaves the batch as soon as it has a valid solution. The batch is repeatable for the same
+    instances and seed.
+
+    Returns one (visited_nodes, (num_pickers, solution, is_valid), optimization_results)
+    tuple per problem, like iterative_simulated_annealing.
+    """
+    if seed is None:
+        seed = new_seed()
+    rng = np.random.Generator(np.random.PCG64(seed))
+
+    results = [None] * len(problems)
+    visited = np.zeros(len(problems), dtype=np.int64)
+    start = np.array([max(1, min(picker_lower_bound(p), p.num_pickers)) for p in problems], dtype=np.int64)
+    history = [[float('inf')] * (int(first) - 1) for first in start]
+    remaining = np.arange(len(problems))
+    stacked = _stack(problems)
+
+    num_pickers = 1
+    while len(remaining):
+        # chains whose lower bound is above num_pickers wait for a later round
+        num_pickers = max(num_pickers, int(start[remaining].min()))
+        joined = remaining[start[remaining] <= num_pickers]
+        n, locations, travel, valid, capacity, max_time, depot = stacked
+        batch = _Batch(n[joined], locations[joined], travel[joined], valid[joined],
+                       capacity[joined], max_time[joined], depot, num_pickers)
+        slots, ranks = batch.initial(rng)
+        penalty = batch.evaluate(slots, ranks)
+        best_slots, best_ranks, best_penalty = slots.copy(), ranks.copy(), penalty.copy()
+
+        # chains still annealing at this picker count, as indices into the arrays above
+        chains = np.flatnonzero(best_penalty > 0)
+        active = batch.subset(chains)
+        current = [slots[chains], ranks[chains], penalty[chains]]
+        best = [best_slots[chains], best_ranks[chains], best_penalty[chains]]
+        steps = np.zeros(len(chains), dtype=np.int64)
+        stagnation = np.zeros(len(chains), dtype=np.int64)
+        T = T0
+        while len(chains):
+            slots_c, ranks_c, penalty_c = current
+            accepted = np.zeros(len(chains), dtype=np.int64)
+            running = np.ones(len(chains), dtype=bool)
+            for _ in range(max_iter_per_temp):
+                new_slots, new_ranks = active.neighbors(slots_c, ranks_c, rng)
+                new_penalty = active.evaluate(new_slots, new_ranks)
+                steps += running
+
+                delta = new_penalty - penalty_c
+                with np.errstate(over="ignore"):
+                    accept = running & ((delta < 0) | (rng.random(len(chains)) < np.exp(-delta / T)))
+                slots_c[accept], ranks_c[accept] = new_slots[accept], new_ranks[accept]
+                penalty_c[accept] = new_penalty[accept]
+                accepted += accept
+
+                improved = accept & (penalty_c < best[2])
+                if improved.any():
+                    best[0][improved], best[1][improved] = slots_c[improved], ranks_c[improved]
+                    best[2][improved] = penalty_c[improved]
+                    # a chain with a valid solution is done with this picker count
+                    running &= best[2] > 0
+
+            stagnation = np.where(accepted < max_iter_per_temp * 0.01, stagnation + 1, 0)
+            running &= stagnation < stagnation_threshold
+            T *= alpha
+            if T < 0.01:
+                running[:] = False
+
+            # write finished chains back and drop them, the next steps only pay for running ones
+            if not running.all():
+                done = ~running
+                best_slots[chains[done]], best_ranks[chains[done]] = best[0][done], best[1][done]
+                best_penalty[chains[done]] = best[2][done]
+                visited[joined[chains[done]]] += steps[done]
+                chains, steps, stagnation = chains[running], steps[running], stagnation[running]
+                active = active.subset(running)
+                current = [slots_c[running], ranks_c[running], penalty_c[running]]
+                best = [best[0][running], best[1][running], best[2][running]]
+
+        finished = set()
+        for c, index in enumerate(joined):
+            problem = problems[index]
+            is_valid = bool(best_penalty[c] == 0)
+            history[index].append(num_pickers if is_valid else float('inf'))
+            if is_valid or num_pickers >= problem.num_pickers:
+                solution = batch.decode(c, best_slots, best_ranks, problem.items)
+                results[index] = (int(visited[index]), (num_pickers, solution, is_valid), history[index])
+                finished.add(index)
+        remaining = np.array([index for index in remaining if index not in finished], dtype=np.int64)
+        num_pickers += 1
+
+    return results
@@ -0,0 +1,73 @@
+import argparse
+import importlib
+
+# subcommand -> (script of the base variant, script of the Extended variant); each has main(argv)
+SCRIPTS = {
+    "generate": ("instanceGenerator", "instanceGeneratorExtended"),
+    "solve": ("runOneInstance", "runOneInstanceExtended"),
+    "batch": ("runAllInstances", "runAllInstancesExtended"),
+    "graph": ("generateGraphs", "generateGraphsExtended"),
+}
+ENGINES = ["simulatedAnnealing", "tabuSearch", "largeNeighborhoodSearch"]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Order picking with simulated annealing")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    generate = subcommands.add_parser("generate", help="generate the test instances")
+    generate.add_argument("seed", nargs="?", type=int, help="generator seed; every instance derives its own seed")
+    generate.add_argument("workers", nargs="?", type=int, help="processes generating instances")
+    generate.add_argument("--extended", action="store_true", help="add picker and product categories")
+
+    solve = subcommands.add_parser("solve", help="solve one instance (runOneInstance.py)")
+    solve.add_argument("instance", help=".json or .npz instance file")
+    solve.add_argument("seed", nargs="?", type=int, help="random seed to repeat an earlier run")
+    solve.add_argument("--extended", action="store_true", help="instance with picker and product categories")
+    solve.add_argument("--engine", choices=ENGINES)
+    solve.add_argument("--profile", nargs="?", const="sampling", choices=["sampling", "deterministic"])
+
+    batch = subcommands.add_parser("batch", help="solve every instance (runAllInstances.py)")
+    batch.add_argument("seed", nargs="?", type=int, help="run seed; every instance derives its own seed")
+    batch.add_argument("--extended", action="store_true", help="solve instancesExtended/")
+    batch.add_argument("--engine", choices=ENGINES)
+    batch.add_argument("--no-cache", action="store_true", help="solve instances with cached results again")
+    batch.add_argument("--telemetry", action="store_true", help="write JSON Lines progress events")
+    batch.add_argument("--batch", action="store_true",
+                       help="anneal the small base instances together in one vectorized batch")
+
+    graph = subcommands.add_parser("graph", help="draw the performance graphs of the latest results")
+    graph.add_argument("--extended", action="store_true", help="graphs of the Extended variant")
+    return parser
+
+
+def script_argv(args):
+    """Arguments of the script behind a parsed subcommand, as passed to its main(argv)"""
+    argv = [getattr(args, "instance", None), getattr(args, "seed", None), getattr(args, "workers", None)]
+    argv = [str(arg) for arg in argv if arg is not None]
+    if getattr(args, "engine", None):
+        argv.append(f"--engine={args.engine}")
+    if getattr(args, "profile", None):
+        argv.append(f"--profile={args.profile}")
+    if getattr(args, "no_cache", False):
+        argv.append("--no-cache")
+    if getattr(args, "telemetry", False):
+        argv.append("--telemetry")
+    if getattr(args, "batch", False):
+        argv.append("--batch")
+    return argv
+
+
+def main(argv=None):
+    """
+    Parse the subcommand and call main(argv) of its script. Only that script
+    is imported, and the scripts import an engine only when it is chosen, so
+    e.g. `solve` never loads pandas, matplotlib or the tabu search.
+    """
+    args = build_parser().parse_args(argv)
+    script = SCRIPTS[args.command][1 if args.extended else 0]
+    importlib.import_module(script).main(script_argv(args))
+
+
+if __name__ == "__main__":
+    main()
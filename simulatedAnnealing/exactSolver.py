@@ -0,0 +1,197 @@
+import math
+from collections import defaultdict
+
+# Instances with at most this many items are solved exactly instead of with SA
+EXACT_MAX_ITEMS = 10
+
+
+def can_solve_exactly(problem):
+    """Check whether the exact engine applies to this instance"""
+    if len(problem.items) > EXACT_MAX_ITEMS:
+        return False
+    if hasattr(problem, "picker_categories"):
+        # Extended variant: categories must split the instance into independent parts
+        if not problem.picker_categories or not problem.product_categories:
+            return True
+        if any(problem.picker_categories[p] is None for p in range(problem.num_pickers)):
+            return False
+        if any(problem.product_categories[item] is None for item in problem.items):
+            return False
+    return True
+
+
+def _subsets_with_lowest(mask):
+    """All subsets of mask that contain its lowest set bit"""
+    low = mask & -mask
+    rest = mask ^ low
+    sub = rest
+    while True:
+        yield low | sub
+        if sub == 0:
+            break
+        sub = (sub - 1) & rest
+
+
+def _route_costs(problem, items):
+    """
+    Held-Karp DP over item subsets: cheapest depot -> items -> depot tour for
+    every subset of at most `capacity` items. Returns (cost, order, visited).
+    """
+    n = len(items)
+    travel = problem.travel_times
+    locations = [problem.product_locations[item] for item in items]
+    depot_out = [travel[-1][loc] for loc in locations]
+    depot_in = [travel[loc][-1] for loc in locations]
+
+    size = 1 << n
+    # dp[mask][j]: cheapest path from the depot over mask ending at item j
+    dp = [None] * size
+    parent = [None] * size
+    visited = 0
+    for j in range(n):
+        dp[1 << j] = {j: depot_out[j]}
+        parent[1 << j] = {j: None}
+
+    cost = [math.inf] * size
+    order = [None] * size
+    cost[0] = 0
+    order[0] = []
+    for mask in range(1, size):
+        count = bin(mask).count("1")
+        if count > problem.capacity or dp[mask] is None:
+            continue
+        best_end, best = None, math.inf
+        for j, value in dp[mask].items():
+            visited += 1
+            if value + depot_in[j] < best:
+                best_end, best = j, value + depot_in[j]
+            if count == problem.capacity:
+                continue
+            for k in range(n):
+                if mask & (1 << k):
+                    continue
+                nxt = mask | (1 << k)
+                candidate = value + travel[locations[j]][locations[k]]
+                if dp[nxt] is None:
+                    dp[nxt], parent[nxt] = {}, {}
+                if candidate < dp[nxt].get(k, math.inf):
+                    dp[nxt][k] = candidate
+                    parent[nxt][k] = j
+        cost[mask] = best
+
+        # Rebuild the visiting order of the cheapest tour
+        route, m, j = [], mask, best_end
+        while j is not None:
+            route.append(items[j])
+            m, j = m ^ (1 << j), parent[m][j]
+        order[mask] = route[::-1]
+    return cost, order, visited
+
+
+def _minimum_cover(problem, items):
+    """
+    Exact minimum number of pickers for the given items.
+    Returns (num_pickers, picker_routes, visited); num_pickers is None when
+    no assignment respects maxTimePerRound.
+    """
+    if not items:
+        return 0, [], 0
+
+    route_cost, route_order, visited = _route_costs(problem, items)
+    full = (1 << len(items)) - 1
+
+    # Cheapest time for one picker to collect a subset using several routes
+    picker_cost = [math.inf] * (full + 1)
+    picker_split = [0] * (full + 1)
+    picker_cost[0] = 0
+    for mask in range(1, full + 1):
+        for route in _subsets_with_lowest(mask):
+            visited += 1
+            candidate = route_cost[route] + picker_cost[mask ^ route]
+            if candidate < picker_cost[mask]:
+                picker_cost[mask] = candidate
+                picker_split[mask] = route
+
+    # Fewest pickers whose subsets cover everything within maxTimePerRound
+    pickers = [math.inf] * (full + 1)
+    pickers_split = [0] * (full + 1)
+    pickers[0] = 0
+    for mask in range(1, full + 1):
+        for subset in _subsets_with_lowest(mask):
+            visited += 1
+            if picker_cost[subset] <= problem.max_time and pickers[mask ^ subset] + 1 < pickers[mask]:
+                pickers[mask] = pickers[mask ^ subset] + 1
+                pickers_split[mask] = subset
+
+    if pickers[full] == math.inf:
+        return None, None, visited
+
+    picker_routes = []
+    mask = full
+    while mask:
+        subset = pickers_split[mask]
+        routes = []
+        rest = subset
+        while rest:
+            routes.append(route_order[picker_split[rest]])
+            rest ^= picker_split[rest]
+        picker_routes.append(routes)
+        mask ^= subset
+    return pickers[full], picker_routes, visited
+
+
+def exact_minimum_pickers(problem, logging=False):
+    """
+    Proven minimum number of pickers for small instances (base variant).
+    Returns the same tuple layout as iterative_simulated_annealing.
+    """
+    num_pickers, solution, visited = _minimum_cover(problem, list(problem.items))
+
+    if num_pickers is None or num_pickers > problem.num_pickers:
+        if logging:
+            print("⚠ Exact solver: no valid solution exists for this instance")
+        return visited, (None, [], False), [float('inf')]
+
+    if logging:
+        print(f"✓ Exact solver: proven minimum of {num_pickers} picker{'s' if num_pickers > 1 else ''}")
+    optimization_results = [float('inf')] * (num_pickers - 1) + [num_pickers]
+    return visited, (num_pickers, solution, True), optimization_results
+
+
+def exact_minimum_pickers_by_category(problem, logging=False):
+    """
+    Proven minimum number of pickers for small Extended instances.
+    Pickers only collect items of their own category, so every category
+    is solved on its own and the picker counts are added up.
+    """
+    items_by_category = defaultdict(list)
+    for item in problem.items:
+        category = problem.product_categories[item] if problem.product_categories else None
+        items_by_category[category].append(item)
+
+    if problem.picker_categories and problem.product_categories:
+        pickers_by_category = problem.get_pickers_by_category()
+    else:
+        pickers_by_category = {None: list(range(problem.num_pickers))}
+
+    total_visited = 0
+    num_pickers = 0
+    solution = {}
+    for category, items in items_by_category.items():
+        needed, picker_routes, visited = _minimum_cover(problem, items)
+        total_visited += visited
+        available = pickers_by_category.get(category, [])
+
+        if needed is None or needed > len(available):
+            if logging:
+                print(f"⚠ Exact solver: no valid solution exists for category {category}")
+            return total_visited, (None, {}, False), [float('inf')]
+
+        for picker, routes in zip(available, picker_routes):
+            solution[picker] = routes
+        num_pickers += needed
+
+    if logging:
+        print(f"✓ Exact solver: proven minimum of {num_pickers} picker{'s' if num_pickers > 1 else ''}")
+    optimization_results = [float('inf')] * (num_pickers - 1) + [num_pickers]
+    return total_visited, (num_pickers, solution, True), optimization_results
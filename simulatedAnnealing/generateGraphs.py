@@ -1,9 +1,10 @@
-import json
+from graphPipeline import FigureJob, render_figures
 import matplotlib.pyplot as plt
 import pandas as pd
-import os
-import re
-from datetime import datetime
+from resultsStore import ResultsStore
+
+# solvers left out of the engine comparison: they only take the small instances
+ENGINE_COMPARISON_EXCLUDED = {"exact", "batchSimulatedAnnealing"}
 # ---------------------------
 # Generic plotting functions
 # ---------------------------
@@ -27,34 +28,39 @@ def sort_param_values(grouped):
     
     return grouped
 
-def plot_metric_by_param(df, metric, ylabel):
-    """Plot a given metric (runtime, visited nodes, objective) grouped by 'type'."""
-    unique_types = df["type"].unique()
+def plot_metric_by_param(subset, metric, ylabel, t, output):
+    """Plot a given metric (runtime, visited nodes, objective) for the rows of one 'type'."""
+    grouped = subset.groupby("param_value", as_index=False)[metric].mean()
+    grouped = sort_param_values(grouped)
 
-    for t in unique_types:
-        subset = df[df["type"] == t]
+    x = grouped["param_value"]
+    y = grouped[metric]
 
-        grouped = subset.groupby("param_value", as_index=False)[metric].mean()
-        grouped = sort_param_values(grouped)
+    plt.figure(figsize=(8,5))
+    plt.plot(x, y, marker="o")
+    plt.title(f"{ylabel} vs Parameter Value ({t})")
+    plt.xlabel("Parameter value")
+    plt.ylabel(ylabel)
+    plt.grid(True)
+    plt.tight_layout()
 
-        x = grouped["param_value"]
-        y = grouped[metric]
+    plt.savefig(output)
+    plt.close()
 
-        plt.figure(figsize=(8,5))
-        plt.plot(x, y, marker="o")
-        plt.title(f"{ylabel} vs Parameter Value ({t})")
-        plt.xlabel("Parameter value")
-        plt.ylabel(ylabel)
-        plt.grid(True)
-        plt.tight_layout()
+    print(f"Plot of {ylabel} vs Parameter Value for type '{t}' saved.")
 
-        plt.savefig(f"graphs/{metric}_{t}.png")
-        plt.close()
 
-        print(f"Plot of {ylabel} vs Parameter Value for type '{t}' saved.")
+def metric_by_param_jobs(df, metric, ylabel, prefix="", series=None):
+    """One figure per 'type', each hashed on its own rows only."""
+    return [
+        FigureJob(f"graphs/{prefix}{metric}_{t}.png", plot_metric_by_param,
+                  (df.loc[df["type"] == t, ["param_value", metric]], metric, ylabel,
+                   t if series is None else f"{t}, {series}"))
+        for t in df["type"].unique()
+    ]
 
 
-def plot_scatter_runtime_objective(df):
+def plot_scatter_runtime_objective(df, output):
     """Scatter plot to detect relationships between runtime and objective."""
     plt.figure(figsize=(8,5))
     plt.scatter(df["num_pickers"], df["runtime"])
@@ -64,13 +70,13 @@ def plot_scatter_runtime_objective(df):
     plt.grid(True)
     plt.tight_layout()
 
-    plt.savefig(f"graphs/runtime_vs_objective.png")
+    plt.savefig(output)
     plt.close()
 
     print("Scatter plot of Runtime vs Number of Pickers saved.")
 
 
-def bar_chart_metric(df, metric, ylabel):
+def bar_chart_metric(df, metric, ylabel, output):
     """Bar chart of averaged metrics grouped by type and param_value."""
     grouped = df.groupby(["type", "param_value"], as_index=False)[metric].mean()
 
@@ -83,12 +89,12 @@ def bar_chart_metric(df, metric, ylabel):
     plt.ylabel(ylabel)
     plt.tight_layout()
 
-    plt.savefig(f"graphs/bar_{metric}.png")
+    plt.savefig(output)
     plt.close()
 
     print(f"Bar chart of {ylabel} saved.")
 
-def pie_chart_valid(df):
+def pie_chart_valid(df, output):
     """Pie chart showing the proportion of valid vs invalid solutions."""
     valid_counts = df['is_valid'].value_counts()
 
@@ -97,64 +103,92 @@ def pie_chart_valid(df):
     plt.title("Proportion of Valid vs Invalid Solutions")
     plt.tight_layout()
 
-    plt.savefig("graphs/valid_solutions_pie_chart.png")
+    plt.savefig(output)
     plt.close()
 
     print("Pie chart of valid vs invalid solutions saved.")
 
-def extract_datetime(filename: str) -> datetime | None:
-    """
-    Extracts a datetime object from a filename like:
-    'results_2025-12-07_12-26-37.json'
-    """
-    match = re.search(r"(\d{4}-\d{2}-\d{2})_(\d{2}-\d{2}-\d{2})", filename)
-    if not match:
-        return None
+def engine_comparison(df, metric, ylabel, output):
+    """Grouped bars of a metric per type, one bar per engine, over the instances every engine solved."""
+    shared = set.intersection(*df.groupby("solver")["id"].apply(set))
+    grouped = df[df["id"].isin(shared)].groupby(["type", "solver"])[metric].mean().unstack("solver")
+
+    grouped.plot(kind="bar", figsize=(10,5))
+    plt.title(f"Averaged {ylabel} per Type and Engine ({len(shared)} instances)")
+    plt.xlabel("Type")
+    plt.ylabel(ylabel)
+    plt.xticks(rotation=0)
+    plt.tight_layout()
+
+    plt.savefig(output)
+    plt.close()
 
-    date_part, time_part = match.groups()
-    timestamp = f"{date_part} {time_part.replace('-', ':')}"
-    return datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+    print(f"Engine comparison of {ylabel} saved.")
 
 
 # ---------------------------
 # Generate all graphs
 # ---------------------------
 
-files = os.listdir("results")
-json_files = [f for f in files if f.startswith("results_") and f.endswith(".json") and not ("individual_instance" in f)]
-latest_file = None
-latest_dt = None
-
-for f in json_files:
-    dt = extract_datetime(f)
-    if dt is None:
-        # skip files without a recognizable timestamp
-        continue
-    if latest_dt is None or dt > latest_dt:
-        latest_dt = dt
-        latest_file = f
-
-print(f"Processing file: {latest_file}")
-with open(f"results/{latest_file}", "r") as f:
-    data = json.load(f)
-
-df = pd.DataFrame(data)
-
-# Convert numeric fields
-numeric_columns = ["runtime", "visited_nodes", "num_pickers", "visited_nodes"]
-for col in numeric_columns:
-    df[col] = pd.to_numeric(df[col], errors="coerce")
-df["runtime"] = df["runtime"] / 1000  # convert to seconds
-
-plot_metric_by_param(df, "runtime", "Runtime (s)")
-plot_metric_by_param(df, "num_pickers", "Amount of Pickers")
-plot_metric_by_param(df, "visited_nodes", "Visited Nodes")
-
-plot_scatter_runtime_objective(df)
-
-bar_chart_metric(df, "runtime", "Runtime")
-bar_chart_metric(df, "visited_nodes", "Visited Nodes")
-
-pie_chart_valid(df)
-
-print("Graphs generated!")
+def main(argv=None):
+    """python generateGraphs.py: graphs of the latest run in graphs/"""
+    with ResultsStore() as store:
+        # pick up results files written before the store existed (no-op once imported)
+        store.import_legacy_results("results", "original")
+        run_id = store.latest_run("original")
+        print(f"Processing run: {run_id}")
+        data = store.load_run(run_id)
+        # latest results of every search engine (runAllInstances.py --engine=<name>)
+        engine_data = [entry for solver, solver_run in store.latest_solver_runs("original").items()
+                       if solver not in ENGINE_COMPARISON_EXCLUDED
+                       for entry in store.load_run(solver_run) if entry.get("solver") == solver]
+
+    df = pd.DataFrame(data)
+
+    # Convert numeric fields
+    numeric_columns = ["runtime", "visited_nodes", "num_pickers", "visited_nodes"]
+    for col in numeric_columns:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df["runtime"] = df["runtime"] / 1000  # convert to seconds
+
+    # runs with --batch: the batched SA is a series of its own, drawn in graphs/batch_*.png; its
+    # runtime is only a share of the batch's wall time, so it gets no runtime plots
+    batched = df[df["solver"] == "batchSimulatedAnnealing"] if "solver" in df else df.iloc[0:0]
+    df = df.drop(batched.index)
+
+    jobs = []
+    jobs += metric_by_param_jobs(df, "runtime", "Runtime (s)")
+    jobs += metric_by_param_jobs(df, "num_pickers", "Amount of Pickers")
+    jobs += metric_by_param_jobs(df, "visited_nodes", "Visited Nodes")
+    if not batched.empty:
+        jobs += metric_by_param_jobs(batched, "num_pickers", "Amount of Pickers", "batch_", "batched SA")
+        jobs += metric_by_param_jobs(batched, "visited_nodes", "Visited Nodes", "batch_", "batched SA")
+
+    jobs.append(FigureJob("graphs/runtime_vs_objective.png", plot_scatter_runtime_objective,
+                          (df[["num_pickers", "runtime"]],)))
+
+    jobs.append(FigureJob("graphs/bar_runtime.png", bar_chart_metric,
+                          (df[["type", "param_value", "runtime"]], "runtime", "Runtime")))
+    jobs.append(FigureJob("graphs/bar_visited_nodes.png", bar_chart_metric,
+                          (df[["type", "param_value", "visited_nodes"]], "visited_nodes", "Visited Nodes")))
+
+    jobs.append(FigureJob("graphs/valid_solutions_pie_chart.png", pie_chart_valid, (df[["is_valid"]],)))
+
+    engines = pd.DataFrame(engine_data)
+    if not engines.empty and engines["solver"].nunique() > 1:
+        for col in numeric_columns:
+            engines[col] = pd.to_numeric(engines[col], errors="coerce")
+        engines["runtime"] = engines["runtime"] / 1000
+        columns = ["id", "type", "solver"]
+        jobs.append(FigureJob("graphs/engines_num_pickers.png", engine_comparison,
+                              (engines[columns + ["num_pickers"]], "num_pickers", "Amount of Pickers")))
+        jobs.append(FigureJob("graphs/engines_runtime.png", engine_comparison,
+                              (engines[columns + ["runtime"]], "runtime", "Runtime (s)")))
+
+    render_figures(jobs, "graphs")
+
+    print("Graphs generated!")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,17 @@
-import json
+from graphPipeline import FigureJob, render_figures
 import matplotlib.pyplot as plt
 import pandas as pd
-import os
-import re
-from datetime import datetime
+from resultsStore import ResultsStore
 
 # ---------------------------
 # Generic plotting functions
 # ---------------------------
 
-def extract_datetime(filename: str) -> datetime | None:
-    """
-    Extracts a datetime object from a filename like:
-    'results_2025-12-07_12-26-37.json'
-    """
-    match = re.search(r"(\d{4}-\d{2}-\d{2})_(\d{2}-\d{2}-\d{2})", filename)
-    if not match:
-        return None
-
-    date_part, time_part = match.groups()
-    timestamp = f"{date_part} {time_part.replace('-', ':')}"
-    return datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
-
-def load_latest_result(directory, model_name):
-    """Load the latest results JSON file from a directory and tag it with a model name."""
-    files = os.listdir(directory)
-    json_files = [f for f in files if f.startswith("results_") and f.endswith(".json")
-                  and "individual_instance" not in f]
-
-    latest_file = None
-    latest_dt = None
-
-    for f in json_files:
-        dt = extract_datetime(f)
-        if dt and (latest_dt is None or dt > latest_dt):
-            latest_dt = dt
-            latest_file = f
-
-    print(f"Loading latest {model_name} file: {latest_file}")
-    with open(f"{directory}/{latest_file}", "r") as f:
-        data = json.load(f)
-
-    df = pd.DataFrame(data)
+def load_latest_result(store, variant, model_name):
+    """Load the latest batch run of a variant from the results store and tag it with a model name."""
+    run_id = store.latest_run(variant)
+    print(f"Loading latest {model_name} run: {run_id}")
+    df = pd.DataFrame(store.load_run(run_id))
     df["model"] = model_name
     return df
 
@@ -64,33 +34,36 @@ def sort_param_values(grouped):
     
     return grouped
 
-def plot_metric_by_param(df, metric, ylabel):
-    """Plot a given metric (runtime, visited nodes, objective) grouped by 'type'."""
-    unique_types = df["type"].unique()
+def plot_metric_by_param(subset, metric, ylabel, t, output):
+    """Plot a given metric (runtime, visited nodes, objective) for the rows of one 'type'."""
+    grouped = subset.groupby("param_value", as_index=False)[metric].mean()
+    grouped = sort_param_values(grouped)
+    
+    x = grouped["param_value"]
+    y = grouped[metric]
 
-    for t in unique_types:
-        subset = df[df["type"] == t]
+    plt.figure(figsize=(8,5))
+    plt.plot(x, y, marker="o")
+    plt.title(f"{ylabel} vs Parameter Value ({t})")
+    plt.xlabel("Parameter value")
+    plt.ylabel(ylabel)
+    plt.grid(True)
+    plt.tight_layout()
 
-        grouped = subset.groupby("param_value", as_index=False)[metric].mean()
-        grouped = sort_param_values(grouped)
-        
-        x = grouped["param_value"]
-        y = grouped[metric]
-
-        plt.figure(figsize=(8,5))
-        plt.plot(x, y, marker="o")
-        plt.title(f"{ylabel} vs Parameter Value ({t})")
-        plt.xlabel("Parameter value")
-        plt.ylabel(ylabel)
-        plt.grid(True)
-        plt.tight_layout()
-
-        plt.savefig(f"graphsExtended/{metric}_{t}.png")
-        plt.close()
-    
-        print(f"Plot of {ylabel} vs Parameter Value for type '{t}' saved.")
+    plt.savefig(output)
+    plt.close()
 
-def plot_scatter_runtime_objective(df_original, df_extended):
+    print(f"Plot of {ylabel} vs Parameter Value for type '{t}' saved.")
+
+def metric_by_param_jobs(df, metric, ylabel):
+    """One figure per 'type', each hashed on its own rows only."""
+    return [
+        FigureJob(f"graphsExtended/{metric}_{t}.png", plot_metric_by_param,
+                  (df.loc[df["type"] == t, ["param_value", metric]], metric, ylabel, t))
+        for t in df["type"].unique()
+    ]
+
+def plot_scatter_runtime_objective(df_original, df_extended, output):
     """Scatter plot to detect relationships between runtime and objective."""
     plt.figure(figsize=(8,5))
     plt.scatter(df_original["num_pickers"], df_original["runtime"], label="Original", alpha=0.7)
@@ -102,12 +75,12 @@ def plot_scatter_runtime_objective(df_original, df_extended):
     plt.grid(True)
     plt.tight_layout()
 
-    plt.savefig(f"graphsExtended/comparison_runtime_vs_objective.png")
+    plt.savefig(output)
     plt.close()
 
     print("Scatter plot of Runtime vs Number of Pickers saved.")
 
-def pie_chart_valid(df):
+def pie_chart_valid(df, output):
     """Pie chart showing the proportion of valid vs invalid solutions."""
     valid_counts = df['is_valid'].value_counts()
 
@@ -116,97 +89,115 @@ def pie_chart_valid(df):
     plt.title("Proportion of Valid vs Invalid Solutions")
     plt.tight_layout()
 
-    plt.savefig("graphsExtended/valid_solutions_pie_chart.png")
+    plt.savefig(output)
     plt.close()
 
     print("Pie chart of valid vs invalid solutions saved.")
 
 
-def plot_comparison_scatter(df_original, df_extended, metric, ylabel):
-    """Create line charts comparing original vs extended results using means."""
-    unique_types = set(df_original["type"].unique()) | set(df_extended["type"].unique())
+def plot_comparison_scatter(subset_original, subset_extended, metric, ylabel, t, output):
+    """Create a line chart comparing original vs extended results of one 'type' using means."""
+    plt.figure(figsize=(10, 6))
     
-    for t in unique_types:
-        plt.figure(figsize=(10, 6))
-        
-        # Filter data for this type
-        subset_original = df_original[df_original["type"] == t]
-        subset_extended = df_extended[df_extended["type"] == t]
-        
-        # Plot means as line charts
-        if not subset_original.empty:
-            grouped_original = subset_original.groupby("param_value", as_index=False)[metric].mean()
-            grouped_original = sort_param_values(grouped_original)
-            
-            # For travel times, we need to handle categorical x-axis
-            if grouped_original['param_value'].astype(str).isin(['short', 'medium', 'long']).any():
-                order_map = {'short': 0, 'medium': 1, 'long': 2}
-                x_vals = grouped_original['param_value'].map(order_map)
-                plt.plot(x_vals, grouped_original[metric], 
-                        label="Original", marker='o', linewidth=2)
-            else:
-                x_vals = pd.to_numeric(grouped_original['param_value'])
-                plt.plot(x_vals, grouped_original[metric], 
-                        label="Original", marker='o', linewidth=2)
-        
-        if not subset_extended.empty:
-            grouped_extended = subset_extended.groupby("param_value", as_index=False)[metric].mean()
-            grouped_extended = sort_param_values(grouped_extended)
-            
-            # For travel times, we need to handle categorical x-axis
-            if grouped_extended['param_value'].astype(str).isin(['short', 'medium', 'long']).any():
-                order_map = {'short': 0, 'medium': 1, 'long': 2}
-                x_vals = grouped_extended['param_value'].map(order_map)
-                plt.plot(x_vals, grouped_extended[metric], 
-                        label="Extended", marker='s', linewidth=2)
-                # Set custom x-tick labels
-                plt.xticks([0, 1, 2], ['short', 'medium', 'long'])
-            else:
-                x_vals = pd.to_numeric(grouped_extended['param_value'])
-                plt.plot(x_vals, grouped_extended[metric], 
-                        label="Extended", marker='s', linewidth=2)
+    # Plot means as line charts
+    if not subset_original.empty:
+        grouped_original = subset_original.groupby("param_value", as_index=False)[metric].mean()
+        grouped_original = sort_param_values(grouped_original)
         
-        plt.title(f"{ylabel} Comparison: Original vs Extended ({t})")
-        plt.xlabel("Parameter value")
-        plt.ylabel(ylabel)
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        
-        plt.savefig(f"graphsExtended/comparison_{metric}_{t}.png")
-        plt.close()
+        # For travel times, we need to handle categorical x-axis
+        if grouped_original['param_value'].astype(str).isin(['short', 'medium', 'long']).any():
+            order_map = {'short': 0, 'medium': 1, 'long': 2}
+            x_vals = grouped_original['param_value'].map(order_map)
+            plt.plot(x_vals, grouped_original[metric], 
+                    label="Original", marker='o', linewidth=2)
+        else:
+            x_vals = pd.to_numeric(grouped_original['param_value'])
+            plt.plot(x_vals, grouped_original[metric], 
+                    label="Original", marker='o', linewidth=2)
+    
+    if not subset_extended.empty:
+        grouped_extended = subset_extended.groupby("param_value", as_index=False)[metric].mean()
+        grouped_extended = sort_param_values(grouped_extended)
         
-        print(f"Comparison line chart for {ylabel} ({t}) saved.")
+        # For travel times, we need to handle categorical x-axis
+        if grouped_extended['param_value'].astype(str).isin(['short', 'medium', 'long']).any():
+            order_map = {'short': 0, 'medium': 1, 'long': 2}
+            x_vals = grouped_extended['param_value'].map(order_map)
+            plt.plot(x_vals, grouped_extended[metric], 
+                    label="Extended", marker='s', linewidth=2)
+            # Set custom x-tick labels
+            plt.xticks([0, 1, 2], ['short', 'medium', 'long'])
+        else:
+            x_vals = pd.to_numeric(grouped_extended['param_value'])
+            plt.plot(x_vals, grouped_extended[metric], 
+                    label="Extended", marker='s', linewidth=2)
+    
+    plt.title(f"{ylabel} Comparison: Original vs Extended ({t})")
+    plt.xlabel("Parameter value")
+    plt.ylabel(ylabel)
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    
+    plt.savefig(output)
+    plt.close()
+    
+    print(f"Comparison line chart for {ylabel} ({t}) saved.")
+
+def comparison_jobs(df_original, df_extended, metric, ylabel):
+    """One comparison figure per 'type', each hashed on its own rows only."""
+    unique_types = set(df_original["type"].unique()) | set(df_extended["type"].unique())
+    columns = ["param_value", metric]
+    return [
+        FigureJob(f"graphsExtended/comparison_{metric}_{t}.png", plot_comparison_scatter,
+                  (df_original.loc[df_original["type"] == t, columns],
+                   df_extended.loc[df_extended["type"] == t, columns], metric, ylabel, t))
+        for t in sorted(unique_types)
+    ]
 
 # ---------------------------
 # Generate all graphs
 # ---------------------------
 
-df_original = load_latest_result("results", "Simulated Annealing")
-df_extended = load_latest_result("resultsExtended", "Simulated Annealing Extended")
+def main(argv=None):
+    """python generateGraphsExtended.py: graphs of the latest Extended run in graphsExtended/"""
+    with ResultsStore() as store:
+        # pick up results files written before the store existed (no-op once imported)
+        store.import_legacy_results("results", "original")
+        store.import_legacy_results("resultsExtended", "extended")
+        df_original = load_latest_result(store, "original", "Simulated Annealing")
+        df_extended = load_latest_result(store, "extended", "Simulated Annealing Extended")
+
+    numeric_columns = ["runtime", "visited_nodes", "num_pickers"]
+    for df in [df_original, df_extended]:
+        for col in numeric_columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        # Convert runtime from milliseconds to seconds
+        df["runtime"] = df["runtime"] / 1000
+
+    jobs = []
+
+    # Generate extended-only plots
+    jobs += metric_by_param_jobs(df_extended, "runtime", "Runtime (s)")
+    jobs += metric_by_param_jobs(df_extended, "num_pickers", "Amount of Pickers")
+    jobs += metric_by_param_jobs(df_extended, "visited_nodes", "Visited Nodes")
 
-numeric_columns = ["runtime", "visited_nodes", "num_pickers"]
-for df in [df_original, df_extended]:
-    for col in numeric_columns:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-    # Convert runtime from milliseconds to seconds
-    df["runtime"] = df["runtime"] / 1000
+    scatter_columns = ["num_pickers", "runtime"]
+    jobs.append(FigureJob("graphsExtended/comparison_runtime_vs_objective.png", plot_scatter_runtime_objective,
+                          (df_original[scatter_columns], df_extended[scatter_columns])))
 
-df = pd.concat([df_original, df_extended], ignore_index=True)
+    jobs.append(FigureJob("graphsExtended/valid_solutions_pie_chart.png", pie_chart_valid,
+                          (df_extended[["is_valid"]],)))
 
-# Generate extended-only plots
-plot_metric_by_param(df_extended, "runtime", "Runtime (s)")
-plot_metric_by_param(df_extended, "num_pickers", "Amount of Pickers")
-plot_metric_by_param(df_extended, "visited_nodes", "Visited Nodes")
+    # Generate comparison plots
+    jobs += comparison_jobs(df_original, df_extended, "runtime", "Runtime (s)")
+    jobs += comparison_jobs(df_original, df_extended, "num_pickers", "Amount of Pickers")
+    jobs += comparison_jobs(df_original, df_extended, "visited_nodes", "Visited Nodes")
 
-plot_scatter_runtime_objective(df_original,df_extended)
+    render_figures(jobs, "graphsExtended")
 
-pie_chart_valid(df_extended)
+    print("\nAll graphs generated!")
 
-# Generate comparison scatter plots
-print("\nGenerating comparison plots...")
-plot_comparison_scatter(df_original, df_extended, "runtime", "Runtime (s)")
-plot_comparison_scatter(df_original, df_extended, "num_pickers", "Amount of Pickers")
-plot_comparison_scatter(df_original, df_extended, "visited_nodes", "Visited Nodes")
 
-print("\nAll graphs generated!")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import matplotlib
+matplotlib.use("Agg")  # non-interactive backend, safe in worker processes and CI
+
+import hashlib
+import inspect
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+CACHE_FILE = ".graph_cache.json"
+
+# One PNG: function(*args, output) draws and saves the figure at `output`
+FigureJob = namedtuple("FigureJob", ["output", "function", "args"])
+
+
+def _hash_argument(digest, arg):
+    if isinstance(arg, pd.Series):
+        arg = arg.to_frame()
+    if isinstance(arg, pd.DataFrame):
+        digest.update(repr(list(arg.columns)).encode())
+        digest.update(repr(list(arg.dtypes)).encode())
+        digest.update(pd.util.hash_pandas_object(arg, index=False).values.tobytes())
+    else:
+        digest.update(repr(arg).encode())
+
+
+def figure_fingerprint(job):
+    """Hash of everything a figure depends on: its input data and its plotting code"""
+    digest = hashlib.sha256()
+    digest.update(inspect.getsource(job.function).encode())
+    for arg in job.args:
+        _hash_argument(digest, arg)
+    return digest.hexdigest()
+
+
+def _render(job):
+    start = time.perf_counter()
+    job.function(*job.args, job.output)
+    plt.close("all")
+    return job.output, time.perf_counter() - start
+
+
+def render_figures(jobs, directory, max_workers=None):
+    """
+    Render only the figures whose input data or plotting code changed since the
+    last call, in a process pool, and report the render time of every figure.
+    Fingerprints are kept in <directory>/.graph_cache.json.
+    """
+    cache_path = os.path.join(directory, CACHE_FILE)
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path, "r") as f:
+            cache = json.load(f)
+
+    fingerprints = {job.output: figure_fingerprint(job) for job in jobs}
+    todo = [job for job in jobs
+            if cache.get(job.output) != fingerprints[job.output] or not os.path.exists(job.output)]
+
+    todo_outputs = {job.output for job in todo}
+    for job in jobs:
+        if job.output not in todo_outputs:
+            print(f"Unchanged, skipped: {job.output}")
+
+    total_start = time.perf_counter()
+    if todo:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            for output, elapsed in pool.map(_render, todo):
+                cache[output] = fingerprints[output]
+                print(f"Rendered {output} in {elapsed:.2f}s")
+
+    with open(cache_path, "w") as f:
+        json.dump(cache, f, indent=4, sort_keys=True)
+
+    print(f"{len(todo)} of {len(jobs)} figures rendered in {time.perf_counter() - total_start:.2f}s")
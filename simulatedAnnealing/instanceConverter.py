@@ -0,0 +1,204 @@
+import json
+import os
+import sys
+import time
+
+# numpy and openpyxl are imported by the functions that need them, so that
+# loading a JSON instance does not pay for them
+
+# Sheet names used in the order spreadsheets (see input-instance/example-instance.xlsx)
+GENERAL_SHEET = "General Information"
+LOCATIONS_SHEET = "Product Locations"
+MATRIX_SHEET = "Travel Time Matrix"
+ORDERS_SHEET = "Order List"
+
+GENERAL_FIELDS = ["amountOrderPickers", "capacity", "maxTimePerRound", "amountOrders", "amountWarehouses"]
+
+OUTPUT_FOLDER = os.path.join("..", "output-instance")
+
+
+class InstanceFormatError(ValueError):
+    """The workbook does not describe a valid instance"""
+
+
+def _rows(workbook, sheet):
+    if sheet not in workbook.sheetnames:
+        raise InstanceFormatError(f"Missing sheet '{sheet}'")
+    worksheet = workbook[sheet]
+    # the stored dimensions are not trusted (and computing them means a second
+    # pass over the sheet); rows are read until the sheet ends
+    worksheet.reset_dimensions()
+    # values_only streams plain values, no cell objects are kept around
+    for row in worksheet.iter_rows(values_only=True):
+        # read-only mode can pad rows with empty cells
+        while row and row[-1] is None:
+            row = row[:-1]
+        if row:
+            yield row
+
+
+def _integer(value, where):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != int(value):
+        raise InstanceFormatError(f"{where}: expected an integer, got {value!r}")
+    return int(value)
+
+
+def _read_general(workbook):
+    general = {}
+    for row in _rows(workbook, GENERAL_SHEET):
+        if len(row) >= 2 and row[0] in GENERAL_FIELDS:
+            general[row[0]] = _integer(row[1], f"{GENERAL_SHEET} '{row[0]}'")
+    missing = [field for field in GENERAL_FIELDS if field not in general]
+    if missing:
+        raise InstanceFormatError(f"{GENERAL_SHEET}: missing {', '.join(missing)}")
+    return general
+
+
+def _read_locations(workbook, amount_warehouses):
+    """productLocations[product] = location"""
+    locations = {}
+    for n, row in enumerate(_rows(workbook, LOCATIONS_SHEET), start=1):
+        if n == 1 and isinstance(row[0], str):
+            continue  # header
+        where = f"{LOCATIONS_SHEET} row {n}"
+        if len(row) < 2:
+            raise InstanceFormatError(f"{where}: expected a location and a product")
+        location, product = _integer(row[0], where), _integer(row[1], where)
+        if not 0 <= location < amount_warehouses:
+            raise InstanceFormatError(f"{where}: location {location} outside 0..{amount_warehouses - 1}")
+        if product in locations:
+            raise InstanceFormatError(f"{where}: product {product} has two locations")
+        locations[product] = location
+
+    if sorted(locations) != list(range(len(locations))):
+        raise InstanceFormatError(f"{LOCATIONS_SHEET}: products must be numbered 0..{len(locations) - 1}")
+    import numpy as np
+    product_locations = np.empty(len(locations), dtype=np.int32)
+    for product, location in locations.items():
+        product_locations[product] = location
+    return product_locations
+
+
+def _read_matrix(workbook, amount_warehouses):
+    """(amountWarehouses + 1)² travel times, the last row/column is the depot"""
+    import numpy as np
+    size = amount_warehouses + 1
+    matrix = np.empty((size, size), dtype=np.int32)
+    n = 0
+    for row in _rows(workbook, MATRIX_SHEET):
+        if n == size:
+            raise InstanceFormatError(f"{MATRIX_SHEET}: more than {size} rows for {amount_warehouses} warehouses")
+        if len(row) != size:
+            raise InstanceFormatError(f"{MATRIX_SHEET} row {n + 1}: {len(row)} columns, expected {size}")
+        try:
+            matrix[n] = row
+        except (TypeError, ValueError):
+            raise InstanceFormatError(f"{MATRIX_SHEET} row {n + 1}: non-numeric travel time") from None
+        n += 1
+    if n != size:
+        raise InstanceFormatError(f"{MATRIX_SHEET}: {n} rows, expected {size}")
+    if (matrix < 0).any():
+        raise InstanceFormatError(f"{MATRIX_SHEET}: negative travel time")
+    return matrix
+
+
+def _read_items(workbook, amount_orders, amount_products):
+    """All products of all orders, in order"""
+    items = []
+    orders = 0
+    for n, row in enumerate(_rows(workbook, ORDERS_SHEET), start=1):
+        if n == 1 and isinstance(row[0], str):
+            continue  # header
+        where = f"{ORDERS_SHEET} row {n}"
+        products = row[1] if len(row) > 1 else None
+        if isinstance(products, str):
+            products = [p for p in products.replace(";", ",").split(",") if p.strip()]
+        elif products is not None:
+            products = [products]
+        else:
+            raise InstanceFormatError(f"{where}: order without products")
+        for product in products:
+            try:
+                product = _integer(float(product), where)
+            except ValueError:
+                raise InstanceFormatError(f"{where}: invalid product {product!r}") from None
+            if not 0 <= product < amount_products:
+                raise InstanceFormatError(f"{where}: unknown product {product}")
+            items.append(product)
+        orders += 1
+
+    if orders != amount_orders:
+        raise InstanceFormatError(f"{ORDERS_SHEET}: {orders} orders, expected amountOrders = {amount_orders}")
+    if len(set(items)) != len(items):
+        raise InstanceFormatError(f"{ORDERS_SHEET}: a product is ordered more than once")
+    import numpy as np
+    return np.array(items, dtype=np.int32)
+
+
+def read_workbook(path):
+    """
+    Stream an order workbook (read-only, values only) into an instance with
+    the JSON field names; the list fields are int32 NumPy arrays.
+    """
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        instance = _read_general(workbook)
+        product_locations = _read_locations(workbook, instance["amountWarehouses"])
+        instance["productLocations"] = product_locations
+        instance["travelTimeMatrix"] = _read_matrix(workbook, instance["amountWarehouses"])
+        instance["items"] = _read_items(workbook, instance["amountOrders"], len(product_locations))
+    finally:
+        workbook.close()
+    instance["maxRoundsPerOrderPicker"] = len(instance["items"])
+    return instance
+
+
+def write_json(instance, path):
+    """Write the instance in the existing JSON layout"""
+    data = {key: value.tolist() if hasattr(value, "tolist") else value
+            for key, value in instance.items()}
+    with open(path, "w") as f:
+        json.dump(data, f, indent=4)
+
+
+def write_binary(instance, path):
+    """Write the instance as a compressed .npz file (int32 arrays, scalars as 0-d arrays)"""
+    import numpy as np
+    np.savez_compressed(path, **{key: np.asarray(value, dtype=np.int32) for key, value in instance.items()})
+
+
+def load_instance(path):
+    """Load an instance from .json or .npz into the JSON layout (plain lists and ints)"""
+    if path.endswith(".npz"):
+        import numpy as np
+        with np.load(path) as data:
+            return {key: data[key].tolist() for key in data.files}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def convert(input_path, output_path):
+    start_time = time.time()
+    instance = read_workbook(input_path)
+    if output_path.endswith(".npz"):
+        write_binary(instance, output_path)
+    else:
+        write_json(instance, output_path)
+    print(f"Converted {input_path} → {output_path} "
+          f"({instance['amountWarehouses']} locations, {len(instance['items'])} items) "
+          f"in {time.time() - start_time:.2f}s")
+
+
+if __name__ == "__main__":
+    INPUT_FILE = sys.argv[1]
+    if len(sys.argv) > 2:
+        OUTPUT_FILE = sys.argv[2]
+    else:
+        name = os.path.splitext(os.path.basename(INPUT_FILE))[0]
+        OUTPUT_FILE = os.path.join(OUTPUT_FOLDER, f"{name}.json")
+    try:
+        convert(INPUT_FILE, OUTPUT_FILE)
+    except InstanceFormatError as e:
+        print(f"✗ {INPUT_FILE}: {e}")
+        sys.exit(1)
@@ -1,6 +1,11 @@
 import os
+import sys
 import json
 import random
+from concurrent.futures import ProcessPoolExecutor
+
+from randomStream import derive_seed
+from instanceManifest import load_manifest, save_manifest, manifest_entry, is_current
 
 INSTANCES_PER_CONFIGURATION = 5
 
@@ -17,6 +22,11 @@ default_values = {
 }
 
 OUTPUT_FOLDER = "instances"
+# instance number n draws from its own stream, seeded with derive_seed(GENERATOR_SEED, n)
+GENERATOR_SEED = 20240101
+# bump when generate_instance changes, so every instance is generated again
+GENERATOR_VERSION = 1
+MAX_WORKERS = os.cpu_count() or 1
 
 # Travel-time ranges
 TRAVEL_TIME_RANGES = {
@@ -25,93 +35,122 @@ TRAVEL_TIME_RANGES = {
     "long": (20, 30)
 }
 
-# empty the folder first
-for filename in os.listdir(OUTPUT_FOLDER):
-    file_path = os.path.join(OUTPUT_FOLDER, filename)
-    try:
-        if os.path.isfile(file_path):
-            os.unlink(file_path)
-    except Exception as e:
-        print(f"Error deleting file {file_path}: {e}")
-
-counter = 1
-for amountItems in ITEMS_SET:
-    for instance_number in range(INSTANCES_PER_CONFIGURATION):
-        jsonFile = os.path.join(OUTPUT_FOLDER, f"instance-{counter}_amountItems-{amountItems}.json")
-
-        # Generate items
-        items = list(range(amountItems))
-        productLocations = list(range(amountItems))
-        random.shuffle(productLocations)
-
-        # Generate travel time matrix
-        travel_time_min, travel_time_max = TRAVEL_TIME_RANGES[default_values["scale"]]
-        travelTimeMatrix = []
-        for i in range(amountItems+1):
-            row = []
-            for j in range(amountItems+1):
-                if i == j:
-                    row.append(999)
-                else:
-                    travel_time = random.randint(travel_time_min, travel_time_max)
-                    row.append(travel_time)
-            travelTimeMatrix.append(row)
-        
-        # Build dictionary to write to JSON
-        data = {
-            "amountOrderPickers": amountItems,
-            "capacity": default_values["capacity"],
-            "maxTimePerRound": default_values["maxTimePerRound"],
-            "amountWarehouses": amountItems,
-            "productLocations": productLocations,
-            "travelTimeMatrix": travelTimeMatrix,
-            "items": items,
-            "maxRoundsPerOrderPicker": amountItems
-        }
 
-        # Write to JSON file
-        with open(jsonFile, 'w') as f:
-            json.dump(data, f, indent=4)
-        
-        print(f"Generated instance: {jsonFile}")
-        counter += 1
-
-for scale in SCALES:
-    for instance_number in range(INSTANCES_PER_CONFIGURATION):
-        jsonFile = os.path.join(OUTPUT_FOLDER, f"instance-{counter}_travelTimes-{scale}.json")
-
-        # Generate items
-        items = list(range(default_values["amount_items"]))
-        productLocations = list(range(default_values["amount_items"]))
-        random.shuffle(productLocations)
-        # Generate travel time matrix
-        travel_time_min, travel_time_max = TRAVEL_TIME_RANGES[scale]
-        travelTimeMatrix = []
-        for i in range(default_values["amount_items"]+1):
-            row = []
-            for j in range(default_values["amount_items"]+1):
-                if i == j:
-                    row.append(999)
-                else:
-                    travel_time = random.randint(travel_time_min, travel_time_max)
-                    row.append(travel_time)
-            travelTimeMatrix.append(row)
-        
-        # Build dictionary to write to JSON
-        data = {
-            "amountOrderPickers": default_values["amount_items"],
+def instance_specs(seed=GENERATOR_SEED):
+    """{file name: spec} of every instance; a spec holds everything its contents depend on"""
+    specs = {}
+
+    def spec(counter, amount_items, scale):
+        return {
+            "amount_items": amount_items,
+            "scale": scale,
             "capacity": default_values["capacity"],
             "maxTimePerRound": default_values["maxTimePerRound"],
-            "amountWarehouses": default_values["amount_items"],
-            "productLocations": productLocations,
-            "travelTimeMatrix": travelTimeMatrix,
-            "items": items,
-            "maxRoundsPerOrderPicker": default_values["amount_items"]
+            "seed": derive_seed(seed, counter),
+            "generator": GENERATOR_VERSION,
         }
 
-        # Write to JSON file
-        with open(jsonFile, 'w') as f:
-            json.dump(data, f, indent=4)
-        
-        print(f"Generated instance: {jsonFile}")
-        counter += 1
\ No newline at end of file
+    counter = 1
+    for amountItems in ITEMS_SET:
+        for instance_number in range(INSTANCES_PER_CONFIGURATION):
+            specs[f"instance-{counter}_amountItems-{amountItems}.json"] = spec(counter, amountItems,
+                                                                              default_values["scale"])
+            counter += 1
+
+    for scale in SCALES:
+        for instance_number in range(INSTANCES_PER_CONFIGURATION):
+            specs[f"instance-{counter}_travelTimes-{scale}.json"] = spec(counter, default_values["amount_items"],
+                                                                         scale)
+            counter += 1
+    return specs
+
+
+def generate_instance(spec):
+    """Instance of a spec; the same spec always gives the same instance"""
+    rng = random.Random(spec["seed"])
+    amount_items = spec["amount_items"]
+
+    # Generate items
+    items = list(range(amount_items))
+    productLocations = list(range(amount_items))
+    rng.shuffle(productLocations)
+
+    # Generate travel time matrix
+    travel_time_min, travel_time_max = TRAVEL_TIME_RANGES[spec["scale"]]
+    travelTimeMatrix = []
+    for i in range(amount_items+1):
+        row = []
+        for j in range(amount_items+1):
+            if i == j:
+                row.append(999)
+            else:
+                travel_time = rng.randint(travel_time_min, travel_time_max)
+                row.append(travel_time)
+        travelTimeMatrix.append(row)
+
+    # Build dictionary to write to JSON
+    return {
+        "amountOrderPickers": amount_items,
+        "capacity": spec["capacity"],
+        "maxTimePerRound": spec["maxTimePerRound"],
+        "amountWarehouses": amount_items,
+        "productLocations": productLocations,
+        "travelTimeMatrix": travelTimeMatrix,
+        "items": items,
+        "maxRoundsPerOrderPicker": amount_items
+    }
+
+
+def _write_instance(job):
+    folder, file, spec = job
+    path = os.path.join(folder, file)
+    with open(path, 'w') as f:
+        json.dump(generate_instance(spec), f, indent=4)
+    return file, manifest_entry(path, spec, amount_items=spec["amount_items"])
+
+
+def generate_instances(folder=OUTPUT_FOLDER, seed=GENERATOR_SEED, workers=MAX_WORKERS, logging=True):
+    """
+    Bring the folder in line with instance_specs: generate the missing
+    instances and those whose spec or contents changed in a process pool,
+    keep the others untouched and remove instances that are no longer
+    generated. The manifest remembers the spec and SHA-256 of every file.
+    Returns the numbers of (generated, unchanged, removed) instances.
+    """
+    os.makedirs(folder, exist_ok=True)
+    specs = instance_specs(seed)
+    manifest = load_manifest(folder)
+
+    removed = 0
+    for file in os.listdir(folder):
+        if file.startswith("instance-") and file.endswith(".json") and file not in specs:
+            os.unlink(os.path.join(folder, file))
+            removed += 1
+    manifest = {file: entry for file, entry in manifest.items() if file in specs}
+
+    jobs = [(folder, file, spec) for file, spec in specs.items()
+            if not is_current(os.path.join(folder, file), manifest.get(file), spec)]
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # largest first, so the pool is not left waiting on one big instance at the end
+            jobs.sort(key=lambda job: job[2]["amount_items"], reverse=True)
+            for file, entry in pool.map(_write_instance, jobs):
+                manifest[file] = entry
+                if logging:
+                    print(f"Generated instance: {os.path.join(folder, file)}")
+    finally:
+        save_manifest(folder, manifest)
+    return len(jobs), len(specs) - len(jobs), removed
+
+
+def main(argv=None):
+    """python instanceGenerator.py [seed] [workers]"""
+    argv = sys.argv[1:] if argv is None else argv
+    seed = int(argv[0]) if argv else GENERATOR_SEED
+    workers = int(argv[1]) if len(argv) > 1 else MAX_WORKERS
+    generated, unchanged, removed = generate_instances(OUTPUT_FOLDER, seed, workers)
+    print(f"\n{generated} generated, {unchanged} unchanged, {removed} removed in {OUTPUT_FOLDER}/")
+
+
+if __name__ == "__main__":
+    main()
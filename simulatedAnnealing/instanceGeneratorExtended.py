@@ -1,46 +1,133 @@
-import os 
+import os
+import sys
 import json
 import random
 from math import ceil
+from concurrent.futures import ProcessPoolExecutor
+
+from randomStream import derive_seed
+from instanceManifest import load_manifest, save_manifest, manifest_entry, content_digest, is_current, spec_digest
 
 INPUT_FOLDER = "instances"
 OUTPUT_FOLDER = "instancesExtended"
+# instances with more items get no Extended version (too large for category assignment)
+MAX_ITEMS = 505
+# the categories of instance id i are drawn from a stream seeded with derive_seed(GENERATOR_SEED, i)
+GENERATOR_SEED = 20240102
+# bump when add_categories changes, so every Extended instance is generated again
+GENERATOR_VERSION = 1
+MAX_WORKERS = os.cpu_count() or 1
+
+categories = ["Smartphones", "Laptops", "Tablets", "Desktop Computers", "Monitors", "Keyboards", "Mice", "Headphones", "Earbuds", "Speakers", "Smartwatches", "Fitness Trackers", "Televisions", "Cameras", "Drones", "Printers", "Projectors", "Routers", "Smart Home Devices", "Wearable Tech", "Video Games", "Gaming Consoles", "Board Games", "Toys", "Books", "Magazines", "Office Supplies", "Stationery", "Backpacks", "Luggage", "Handbags", "Wallets", "Shoes", "Clothing", "Jewelry", "Watches", "Sunglasses", "Skincare", "Makeup", "Haircare", "Fragrances", "Health Supplements", "Vitamins", "Medical Devices", "Sports Equipment", "Gym Equipment", "Cycling Gear", "Outdoor Gear", "Camping Equipment", "Garden Tools", "Plants", "Furniture", "Home Decor", "Bedding", "Kitchen Appliances", "Cookware", "Tableware", "Cleaning Supplies", "Laundry Supplies", "Pet Food", "Pet Accessories", "Baby Products", "Diapers", "Strollers", "Car Seats", "Automotive Parts", "Car Accessories", "Motorcycle Gear", "Power Tools", "Hand Tools", "Construction Materials", "Lighting", "Electrical Supplies", "Plumbing Supplies", "Paint & Coatings", "Flooring", "Home Security Products", "Surveillance Cameras", "Batteries", "Chargers", "Cables", "Music Instruments", "Audio Equipment", "Bookshelves", "Storage Solutions", "Rugs", "Mattresses", "Snacks", "Beverages", "Fresh Produce", "Frozen Foods", "Canned Goods", "Wine & Spirits", "Craft Supplies", "Hobby Kits", "3D Printing Supplies", "Lab Equipment"]
+
+
+def extended_spec(base_digest, instance_id, seed=GENERATOR_SEED):
+    """Spec of an Extended instance: the contents of its base instance and its own seed"""
+    return {
+        "base": base_digest,
+        "seed": derive_seed(seed, instance_id),
+        "max_items": MAX_ITEMS,
+        "generator": GENERATOR_VERSION,
+    }
+
+
+def add_categories(instance, rng):
+    """Assign picker and product categories to a base instance (in place)"""
+    amount_items = len(instance["items"])
+    amount_categories = min(ceil(amount_items / 10), len(categories))
+    selected_categories = rng.sample(categories, amount_categories)
+
+    categories_pickers = rng.choices(selected_categories, k=instance["amountOrderPickers"])
+    categories_products = rng.choices(selected_categories, k=amount_items)
+
+    instance["orderPickerCategories"] = categories_pickers
+    instance["productCategories"] = categories_products
+    instance["categories"] = selected_categories
+    return instance
+
 
-# empty folder
-for filename in os.listdir(OUTPUT_FOLDER):
-    file_path = os.path.join(OUTPUT_FOLDER, filename)
+def _extend_instance(job):
+    input_folder, output_folder, file, spec = job
+    with open(os.path.join(input_folder, file), "r") as f:
+        instance = json.load(f)
+    amount_items = len(instance["items"])
+    if amount_items > MAX_ITEMS:
+        # remembered, so the base instance is not parsed again while it is unchanged
+        return file, {"spec": spec_digest(spec), "skipped": True, "amount_items": amount_items}
+
+    add_categories(instance, random.Random(spec["seed"]))
+    output_file = os.path.join(output_folder, file)
+    with open(output_file, "w") as f:
+        json.dump(instance, f, indent=4)
+    return file, manifest_entry(output_file, spec, amount_items=amount_items)
+
+
+def extend_instances(input_folder=INPUT_FOLDER, output_folder=OUTPUT_FOLDER, seed=GENERATOR_SEED,
+                     workers=MAX_WORKERS, logging=True):
+    """
+    Add categories to the base instances in a process pool. A base instance
+    is only parsed when its Extended version is missing or out of date; its
+    SHA-256 comes from the base manifest while the file is unchanged, so
+    unchanged instances are not read at all. Extended instances without a
+    base instance are removed.
+    Returns the numbers of (generated, unchanged, removed) instances.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    base_manifest = load_manifest(input_folder)
+    manifest = load_manifest(output_folder)
+
+    jobs = []
+    current = {}
+    for file in sorted(os.listdir(input_folder)):
+        if not file.endswith(".json"):
+            continue
+        base_digest = content_digest(os.path.join(input_folder, file), base_manifest.get(file))
+        spec = extended_spec(base_digest, file.split("-")[1].split("_")[0], seed)
+        entry = manifest.get(file)
+        if entry is not None and entry.get("skipped") and entry["spec"] == spec_digest(spec):
+            current[file] = entry
+        elif entry is not None and not entry.get("skipped") and is_current(os.path.join(output_folder, file),
+                                                                           entry, spec):
+            current[file] = entry
+        else:
+            jobs.append((input_folder, output_folder, file, spec))
+
+    pending = {job[2] for job in jobs}
+    removed = 0
+    for file in os.listdir(output_folder):
+        if file.endswith(".json") and file not in current and file not in pending:
+            os.unlink(os.path.join(output_folder, file))
+            removed += 1
+
+    unchanged = sum(not entry.get("skipped") for entry in current.values())
+    manifest = current
+    generated = 0
     try:
-        if os.path.isfile(file_path):
-            os.unlink(file_path)
-    except Exception as e:
-        print(f"Error deleting file {file_path}: {e}")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for file, entry in pool.map(_extend_instance, jobs):
+                manifest[file] = entry
+                output_file = os.path.join(output_folder, file)
+                if entry.get("skipped"):
+                    if os.path.exists(output_file):
+                        os.unlink(output_file)
+                        removed += 1
+                    continue
+                generated += 1
+                if logging:
+                    print(f"Generated extended instance: {output_file}")
+    finally:
+        save_manifest(output_folder, manifest)
+    return generated, unchanged, removed
+
+
+def main(argv=None):
+    """python instanceGeneratorExtended.py [seed] [workers]"""
+    argv = sys.argv[1:] if argv is None else argv
+    seed = int(argv[0]) if argv else GENERATOR_SEED
+    workers = int(argv[1]) if len(argv) > 1 else MAX_WORKERS
+    generated, unchanged, removed = extend_instances(INPUT_FOLDER, OUTPUT_FOLDER, seed, workers)
+    print(f"\n{generated} generated, {unchanged} unchanged, {removed} removed in {OUTPUT_FOLDER}/")
 
-categories = ["Smartphones", "Laptops", "Tablets", "Desktop Computers", "Monitors", "Keyboards", "Mice", "Headphones", "Earbuds", "Speakers", "Smartwatches", "Fitness Trackers", "Televisions", "Cameras", "Drones", "Printers", "Projectors", "Routers", "Smart Home Devices", "Wearable Tech", "Video Games", "Gaming Consoles", "Board Games", "Toys", "Books", "Magazines", "Office Supplies", "Stationery", "Backpacks", "Luggage", "Handbags", "Wallets", "Shoes", "Clothing", "Jewelry", "Watches", "Sunglasses", "Skincare", "Makeup", "Haircare", "Fragrances", "Health Supplements", "Vitamins", "Medical Devices", "Sports Equipment", "Gym Equipment", "Cycling Gear", "Outdoor Gear", "Camping Equipment", "Garden Tools", "Plants", "Furniture", "Home Decor", "Bedding", "Kitchen Appliances", "Cookware", "Tableware", "Cleaning Supplies", "Laundry Supplies", "Pet Food", "Pet Accessories", "Baby Products", "Diapers", "Strollers", "Car Seats", "Automotive Parts", "Car Accessories", "Motorcycle Gear", "Power Tools", "Hand Tools", "Construction Materials", "Lighting", "Electrical Supplies", "Plumbing Supplies", "Paint & Coatings", "Flooring", "Home Security Products", "Surveillance Cameras", "Batteries", "Chargers", "Cables", "Music Instruments", "Audio Equipment", "Bookshelves", "Storage Solutions", "Rugs", "Mattresses", "Snacks", "Beverages", "Fresh Produce", "Frozen Foods", "Canned Goods", "Wine & Spirits", "Craft Supplies", "Hobby Kits", "3D Printing Supplies", "Lab Equipment"]
 
-for file in os.listdir(INPUT_FOLDER):
-    if file.endswith(".json"):
-        with open(os.path.join(INPUT_FOLDER, file), "r") as f:
-            instance = json.load(f)
-        
-        # Modify instance: assign picker categories
-        amount_items = len(instance["items"])
-
-        if amount_items > 505:
-            continue  # skip instances that are too large for category assignment
-
-        amount_categories = min(ceil(amount_items / 10), len(categories))
-        selected_categories = random.sample(categories, amount_categories)
-        
-        categories_pickers = random.choices(selected_categories, k=instance["amountOrderPickers"])
-        categories_products = random.choices(selected_categories, k=amount_items)
-
-        instance["orderPickerCategories"] = categories_pickers
-        instance["productCategories"] = categories_products
-        instance["categories"] = selected_categories
-
-        # Write modified instance to new file
-        output_file = os.path.join(OUTPUT_FOLDER, file)
-        with open(output_file, "w") as f:
-            json.dump(instance, f, indent=4)
-        
-        print(f"Generated extended instance: {output_file}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import hashlib
+import json
+import os
+
+from resultsStore import file_digest
+
+# the manifest of an instance folder is kept next to it (instances/ -> instances.manifest),
+# so every file in the folder is an instance
+MANIFEST_SUFFIX = ".manifest"
+# where earlier versions kept it, inside the folder; read once and removed on the next save
+LEGACY_MANIFEST_FILE = "instances.manifest"
+
+
+def manifest_path(folder):
+    return os.path.normpath(folder) + MANIFEST_SUFFIX
+
+
+def spec_digest(spec):
+    """SHA-256 of the canonical JSON of an instance spec (everything that determines its contents)"""
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+def load_manifest(folder):
+    """{file: entry} of a folder, empty when it has no manifest yet"""
+    path = manifest_path(folder)
+    if not os.path.exists(path):
+        path = os.path.join(folder, LEGACY_MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(folder, manifest):
+    """Write the manifest through a temporary file, so an interrupted write keeps the old one"""
+    path = manifest_path(folder)
+    with open(path + ".tmp", "w") as f:
+        json.dump(dict(sorted(manifest.items())), f, indent=1)
+    os.replace(path + ".tmp", path)
+    legacy = os.path.join(folder, LEGACY_MANIFEST_FILE)
+    if os.path.exists(legacy):
+        os.unlink(legacy)
+
+
+def manifest_entry(path, spec, **fields):
+    """Entry of a freshly written file: spec digest, content digest and stat"""
+    stat = os.stat(path)
+    return {"spec": spec_digest(spec), "sha256": file_digest([path]), "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns, **fields}
+
+
+def content_digest(path, entry):
+    """
+    SHA-256 of a file, taken from its manifest entry when size and mtime are
+    unchanged (no read), otherwise hashed again. None for a missing file.
+    """
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    if entry is not None and "sha256" in entry and (entry["size"], entry["mtime_ns"]) == (stat.st_size,
+                                                                                          stat.st_mtime_ns):
+        return entry["sha256"]
+    return file_digest([path])
+
+
+def is_current(path, entry, spec):
+    """True when the file exists, was written for this spec and was not changed since"""
+    if entry is None or entry["spec"] != spec_digest(spec):
+        return False
+    return content_digest(path, entry) == entry["sha256"]
@@ -0,0 +1,592 @@
+import math
+import random
+import numpy as np
+from solution import Solution
+from randomStream import RandomStream
+from repairOperators import SlackIndex
+from annealingSchedule import calibrate_temperature, REHEAT_FACTOR
+from simulatedAnnealing import create_initial_solution, generate_neighbor, simulated_annealing_fixed_pickers
+
+try:
+    from numba import njit
+    JIT_AVAILABLE = True
+except ImportError:
+    JIT_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        return lambda function: function
+
+# Slots of the integer state the kernel keeps between calls
+POSITION, STAGNATION, REHEATS_LEFT, ACCEPTED, ITERATION, CURRENT_PENALTY, BEST_PENALTY, \
+    VISITED, STAMP = range(9)
+FINISHED, NEED_UNIFORMS = 0, 1
+# Uniforms one step can draw on top of a route shuffle (at most one per item)
+STEP_DRAWS = 16
+
+
+# ---------------------------
+# Kernel (Numba when installed)
+# ---------------------------
+#
+# A plan is the flat layout of Solution as three arrays: flat items, global
+# route offsets and per-picker route offsets. The moves replay
+# generate_neighbor and the repair operators draw for draw on the uniforms of
+# the RandomStream, so a seed gives the same run as the Python engine.
+
+@njit(cache=True)
+def _below(uniforms, istate, n):
+    value = uniforms[istate[POSITION]]
+    istate[POSITION] += 1
+    return min(int(value * n), n - 1)
+
+
+@njit(cache=True)
+def _route_time(flat, start, end, locations, travel, depot):
+    if start == end:
+        return 0
+    time = travel[depot, locations[flat[start]]]
+    for i in range(start, end - 1):
+        time += travel[locations[flat[i]], locations[flat[i + 1]]]
+    return time + travel[locations[flat[end - 1]], depot]
+
+
+@njit(cache=True)
+def _picker_cost(flat, roff, poff, p, locations, travel, depot, capacity, max_time):
+    """(penalty, time) of picker p, weighted like evaluate_solution"""
+    penalty = 0
+    time = 0
+    for g in range(poff[p], poff[p + 1]):
+        length = roff[g + 1] - roff[g]
+        if length > capacity:
+            penalty += (length - capacity) * 1000
+        time += _route_time(flat, roff[g], roff[g + 1], locations, travel, depot)
+    if time > max_time:
+        penalty += (time - max_time) * 50
+    return penalty, time
+
+
+@njit(cache=True)
+def _overfull(roff, poff, p, capacity):
+    for g in range(poff[p], poff[p + 1]):
+        if roff[g + 1] - roff[g] > capacity:
+            return True
+    return False
+
+
+@njit(cache=True)
+def _copy_plan(flat, roff, poff, to_flat, to_roff, to_poff):
+    num_routes = poff[len(poff) - 1]
+    to_flat[:roff[num_routes]] = flat[:roff[num_routes]]
+    to_roff[:num_routes + 1] = roff[:num_routes + 1]
+    to_poff[:] = poff
+
+
+@njit(cache=True)
+def _set_picker(flat, roff, poff, p, items, lens, k):
+    """Replace all routes of picker p by k routes (lens) of items, like Solution.set_picker_routes"""
+    P = len(poff) - 1
+    num_routes = poff[P]
+    total = roff[num_routes]
+    g_start, g_end = poff[p], poff[p + 1]
+    i_start, i_end = roff[g_start], roff[g_end]
+    count = 0
+    for r in range(k):
+        count += lens[r]
+    item_delta = count - (i_end - i_start)
+    route_delta = k - (g_end - g_start)
+
+    tail = flat[i_end:total].copy()
+    flat[i_start:i_start + count] = items[:count]
+    flat[i_start + count:total + item_delta] = tail
+
+    offsets_tail = roff[g_end:num_routes + 1].copy()
+    position = i_start
+    for r in range(k):
+        roff[g_start + r] = position
+        position += lens[r]
+    for t in range(len(offsets_tail)):
+        roff[g_start + k + t] = offsets_tail[t] + item_delta
+    for q in range(p + 1, P + 1):
+        poff[q] += route_delta
+
+
+@njit(cache=True)
+def _routes(roff, poff, p, min_length, out):
+    """Local indices of the routes of p with at least min_length items, into out; returns their count"""
+    count = 0
+    for g in range(poff[p], poff[p + 1]):
+        if roff[g + 1] - roff[g] >= min_length:
+            out[count] = g - poff[p]
+            count += 1
+    return count
+
+
+@njit(cache=True)
+def _most_slack(cur_time, exclude):
+    """Picker other than exclude with the most slack, lowest index on ties (SlackIndex.most_slack)"""
+    best = -1
+    for p in range(len(cur_time)):
+        if p != exclude and (best < 0 or cur_time[p] < cur_time[best]):
+            best = p
+    return best
+
+
+@njit(cache=True)
+def _repair_time(flat, roff, poff, cur_time, capacity, max_time, locations, travel, depot,
+                 uniforms, istate, items, lens, candidates, changed):
+    P = len(poff) - 1
+    source = -1
+    for p in range(P):
+        if max_time - cur_time[p] < 0 and (source < 0 or cur_time[p] > cur_time[source]):
+            source = p
+    if source < 0:
+        return False
+
+    count = _routes(roff, poff, source, 1, candidates)
+    r = candidates[_below(uniforms, istate, count)]
+    g = poff[source] + r
+    start, end = roff[g], roff[g + 1]
+
+    target = _most_slack(cur_time, source)
+    moved = target >= 0 and _route_time(flat, start, end, locations, travel, depot) <= max_time - cur_time[target]
+    removed = -1
+    if not moved:
+        removed = start + _below(uniforms, istate, end - start)
+        target = _most_slack(cur_time, source)
+        if target < 0:
+            return False
+
+    # target: its routes, plus the moved route or the removed item
+    k = 0
+    n = 0
+    if moved:
+        for h in range(poff[target], poff[target + 1]):
+            lens[k] = roff[h + 1] - roff[h]
+            items[n:n + lens[k]] = flat[roff[h]:roff[h + 1]]
+            n += lens[k]
+            k += 1
+        lens[k] = end - start
+        items[n:n + lens[k]] = flat[start:end]
+        n += lens[k]
+        k += 1
+    else:
+        chosen = -1
+        for h in range(poff[target], poff[target + 1]):
+            length = roff[h + 1] - roff[h]
+            if length < capacity and (chosen < 0 or length < roff[chosen + 1] - roff[chosen]):
+                chosen = h
+        for h in range(poff[target], poff[target + 1]):
+            lens[k] = roff[h + 1] - roff[h]
+            items[n:n + lens[k]] = flat[roff[h]:roff[h + 1]]
+            n += lens[k]
+            if h == chosen:
+                items[n] = flat[removed]
+                n += 1
+                lens[k] += 1
+            k += 1
+        if chosen < 0:
+            lens[k] = 1
+            items[n] = flat[removed]
+            n += 1
+            k += 1
+    target_k = k
+    target_items = items[:n].copy()
+    target_lens = lens[:k].copy()
+
+    # source: every non-empty route without the moved route or item
+    k = 0
+    n = 0
+    for h in range(poff[source], poff[source + 1]):
+        if moved and h == g:
+            continue
+        length = 0
+        for i in range(roff[h], roff[h + 1]):
+            if i != removed:
+                items[n] = flat[i]
+                n += 1
+                length += 1
+        if length:
+            lens[k] = length
+            k += 1
+    _set_picker(flat, roff, poff, source, items, lens, k)
+    _set_picker(flat, roff, poff, target, target_items, target_lens, target_k)
+    changed[0], changed[1] = source, target
+    return True
+
+
+@njit(cache=True)
+def _repair_capacity(flat, roff, poff, stamp, capacity, uniforms, istate, items, lens, candidates, changed):
+    count = 0
+    for p in range(len(stamp)):
+        if stamp[p] >= 0:
+            candidates[count] = p
+            count += 1
+    if count == 0:
+        return False
+    # pickers in the insertion order of SlackIndex.over_capacity
+    order = np.argsort(stamp[candidates[:count]], kind="mergesort")
+    p = candidates[order[_below(uniforms, istate, count)]]
+
+    count = _routes(roff, poff, p, capacity + 1, candidates)
+    r = candidates[_below(uniforms, istate, count)]
+    k = 0
+    n = 0
+    for h in range(poff[p], poff[p + 1]):
+        start, end = roff[h], roff[h + 1]
+        if h - poff[p] == r:
+            for chunk in range(start, end, capacity):
+                lens[k] = min(capacity, end - chunk)
+                k += 1
+        else:
+            lens[k] = end - start
+            k += 1
+        items[n:n + end - start] = flat[start:end]
+        n += end - start
+    _set_picker(flat, roff, poff, p, items, lens, k)
+    changed[0] = p
+    return True
+
+
+@njit(cache=True)
+def _neighbor(flat, roff, poff, cur_time, stamp, num_pickers, capacity, max_time, locations, travel, depot,
+              uniforms, istate, items, lens, candidates, pool, changed):
+    """generate_neighbor on the plan in place; the modified pickers go to changed"""
+    changed[0], changed[1] = -1, -1
+    operator = _below(uniforms, istate, 7)
+    if operator == 5:
+        if _repair_time(flat, roff, poff, cur_time, capacity, max_time, locations, travel, depot,
+                        uniforms, istate, items, lens, candidates, changed):
+            return
+        operator = _below(uniforms, istate, 5)
+    elif operator == 6:
+        if _repair_capacity(flat, roff, poff, stamp, capacity, uniforms, istate, items, lens, candidates, changed):
+            return
+        operator = _below(uniforms, istate, 5)
+
+    P = len(poff) - 1
+    non_empty = 0
+    for p in range(P):
+        if roff[poff[p + 1]] > roff[poff[p]]:
+            pool[non_empty] = p
+            non_empty += 1
+    if non_empty == 0:
+        return
+
+    if operator == 0 and non_empty >= 2:
+        # swap_items: rng.sample(non_empty, 2)
+        j = _below(uniforms, istate, non_empty)
+        pool[0], pool[j] = pool[j], pool[0]
+        j = 1 + _below(uniforms, istate, non_empty - 1)
+        pool[1], pool[j] = pool[j], pool[1]
+        p1, p2 = pool[0], pool[1]
+        count1 = _routes(roff, poff, p1, 1, candidates)
+        r1 = candidates[_below(uniforms, istate, count1)]
+        count2 = _routes(roff, poff, p2, 1, candidates)
+        r2 = candidates[_below(uniforms, istate, count2)]
+        g1, g2 = poff[p1] + r1, poff[p2] + r2
+        a = roff[g1] + _below(uniforms, istate, roff[g1 + 1] - roff[g1])
+        b = roff[g2] + _below(uniforms, istate, roff[g2 + 1] - roff[g2])
+        flat[a], flat[b] = flat[b], flat[a]
+        changed[0], changed[1] = p1, p2
+
+    elif operator == 1:
+        # move_item
+        p1 = pool[_below(uniforms, istate, non_empty)]
+        if num_pickers > 1:
+            count = _routes(roff, poff, p1, 1, candidates)
+            g1 = poff[p1] + candidates[_below(uniforms, istate, count)]
+            removed = roff[g1] + _below(uniforms, istate, roff[g1 + 1] - roff[g1])
+            item = flat[removed]
+            p2 = _below(uniforms, istate, num_pickers - 1)
+            if p2 >= p1:
+                p2 += 1
+
+            k = 0
+            n = 0
+            for h in range(poff[p2], poff[p2 + 1]):
+                lens[k] = roff[h + 1] - roff[h]
+                items[n:n + lens[k]] = flat[roff[h]:roff[h + 1]]
+                n += lens[k]
+                if k == 0:
+                    items[n] = item
+                    n += 1
+                    lens[k] += 1
+                k += 1
+            if k == 0:
+                lens[0] = 1
+                items[0] = item
+                n, k = 1, 1
+            target_k = k
+            target_items = items[:n].copy()
+            target_lens = lens[:k].copy()
+
+            k = 0
+            n = 0
+            for h in range(poff[p1], poff[p1 + 1]):
+                length = 0
+                for i in range(roff[h], roff[h + 1]):
+                    if i != removed:
+                        items[n] = flat[i]
+                        n += 1
+                        length += 1
+                if length:
+                    lens[k] = length
+                    k += 1
+            _set_picker(flat, roff, poff, p1, items, lens, k)
+            _set_picker(flat, roff, poff, p2, target_items, target_lens, target_k)
+            changed[0], changed[1] = p1, p2
+
+    elif operator == 2:
+        # split_route
+        p = pool[_below(uniforms, istate, non_empty)]
+        count = _routes(roff, poff, p, 2, candidates)
+        if count:
+            r = candidates[_below(uniforms, istate, count)]
+            g = poff[p] + r
+            split = 1 + _below(uniforms, istate, roff[g + 1] - roff[g] - 1)
+            k = 0
+            for h in range(poff[p], poff[p + 1]):
+                if h == g:
+                    lens[k] = split
+                    lens[k + 1] = roff[h + 1] - roff[h] - split
+                    k += 2
+                else:
+                    lens[k] = roff[h + 1] - roff[h]
+                    k += 1
+            start, end = roff[poff[p]], roff[poff[p + 1]]
+            items[:end - start] = flat[start:end]
+            _set_picker(flat, roff, poff, p, items, lens, k)
+            changed[0] = p
+
+    elif operator == 3:
+        # merge_routes: rng.sample(candidates, 2), merged route goes last
+        p = pool[_below(uniforms, istate, non_empty)]
+        count = _routes(roff, poff, p, 1, candidates)
+        if count >= 2:
+            j = _below(uniforms, istate, count)
+            candidates[0], candidates[j] = candidates[j], candidates[0]
+            j = 1 + _below(uniforms, istate, count - 1)
+            candidates[1], candidates[j] = candidates[j], candidates[1]
+            g1, g2 = poff[p] + candidates[0], poff[p] + candidates[1]
+            k = 0
+            n = 0
+            for h in range(poff[p], poff[p + 1]):
+                if h != g1 and h != g2:
+                    lens[k] = roff[h + 1] - roff[h]
+                    items[n:n + lens[k]] = flat[roff[h]:roff[h + 1]]
+                    n += lens[k]
+                    k += 1
+            lens[k] = 0
+            for g in (g1, g2):
+                length = roff[g + 1] - roff[g]
+                items[n:n + length] = flat[roff[g]:roff[g + 1]]
+                n += length
+                lens[k] += length
+            _set_picker(flat, roff, poff, p, items, lens, k + 1)
+            changed[0] = p
+
+    elif operator == 4:
+        # reorder_route: Fisher-Yates like RandomStream.shuffle
+        p = pool[_below(uniforms, istate, non_empty)]
+        count = _routes(roff, poff, p, 2, candidates)
+        if count:
+            g = poff[p] + candidates[_below(uniforms, istate, count)]
+            start = roff[g]
+            for i in range(roff[g + 1] - start - 1, 0, -1):
+                j = _below(uniforms, istate, i + 1)
+                flat[start + i], flat[start + j] = flat[start + j], flat[start + i]
+            changed[0] = p
+
+
+@njit(cache=True)
+def _refresh(roff, poff, p, capacity, stamp, istate):
+    """Keep stamp in the insertion order SlackIndex.over_capacity has"""
+    if _overfull(roff, poff, p, capacity):
+        if stamp[p] < 0:
+            stamp[p] = istate[STAMP]
+            istate[STAMP] += 1
+    else:
+        stamp[p] = -1
+
+
+@njit(cache=True)
+def _reset(flat, roff, poff, cur_time, cur_penalty, stamp, istate, locations, travel, depot, capacity, max_time):
+    """Per-picker costs and over-capacity order of a fresh SlackIndex"""
+    for p in range(len(poff) - 1):
+        cur_penalty[p], cur_time[p] = _picker_cost(flat, roff, poff, p, locations, travel, depot, capacity, max_time)
+        stamp[p] = -1
+        _refresh(roff, poff, p, capacity, stamp, istate)
+
+
+@njit(cache=True)
+def _anneal(cur, best, nb, cur_time, cur_penalty, stamp, locations, travel, depot, capacity, max_time,
+            num_pickers, T0, alpha, reheat_factor, max_iter_per_temp, stagnation_threshold,
+            uniforms, istate, fstate):
+    """
+    The loop of simulated_annealing_fixed_pickers. Returns NEED_UNIFORMS when
+    the uniforms may run out during the next step; calling it again with more
+    uniforms continues exactly where it stopped.
+    """
+    cur_flat, cur_roff, cur_poff = cur
+    best_flat, best_roff, best_poff = best
+    nb_flat, nb_roff, nb_poff = nb
+    size = len(cur_flat)
+    items = np.empty(size + 1, dtype=np.int64)
+    lens = np.empty(len(cur_roff), dtype=np.int64)
+    candidates = np.empty(max(len(cur_roff), len(cur_poff)), dtype=np.int64)
+    pool = np.empty(len(cur_poff), dtype=np.int64)
+    changed = np.empty(2, dtype=np.int64)
+    new_penalty = np.empty(2, dtype=np.int64)
+    new_time = np.empty(2, dtype=np.int64)
+    need = size + STEP_DRAWS
+
+    while True:
+        if istate[ITERATION] == 0 and not (istate[STAGNATION] < stagnation_threshold and istate[BEST_PENALTY] > 0):
+            return FINISHED
+        T = fstate[0]
+        while istate[ITERATION] < max_iter_per_temp:
+            if len(uniforms) - istate[POSITION] < need:
+                return NEED_UNIFORMS
+            istate[ITERATION] += 1
+
+            _copy_plan(cur_flat, cur_roff, cur_poff, nb_flat, nb_roff, nb_poff)
+            _neighbor(nb_flat, nb_roff, nb_poff, cur_time, stamp, num_pickers, capacity, max_time,
+                      locations, travel, depot, uniforms, istate, items, lens, candidates, pool, changed)
+            penalty = istate[CURRENT_PENALTY]
+            for c in range(2):
+                p = changed[c]
+                if p >= 0:
+                    new_penalty[c], new_time[c] = _picker_cost(nb_flat, nb_roff, nb_poff, p, locations, travel,
+                                                               depot, capacity, max_time)
+                    penalty += new_penalty[c] - cur_penalty[p]
+            istate[VISITED] += 1
+
+            delta = penalty - istate[CURRENT_PENALTY]
+            if delta < 0 or uniforms[istate[POSITION]] < math.exp(-delta / T):
+                if delta >= 0:
+                    istate[POSITION] += 1
+                _copy_plan(nb_flat, nb_roff, nb_poff, cur_flat, cur_roff, cur_poff)
+                istate[CURRENT_PENALTY] = penalty
+                for c in range(2):
+                    p = changed[c]
+                    if p >= 0:
+                        cur_penalty[p], cur_time[p] = new_penalty[c], new_time[c]
+                        _refresh(cur_roff, cur_poff, p, capacity, stamp, istate)
+                istate[ACCEPTED] += 1
+
+                if penalty < istate[BEST_PENALTY]:
+                    _copy_plan(cur_flat, cur_roff, cur_poff, best_flat, best_roff, best_poff)
+                    istate[BEST_PENALTY] = penalty
+                    if penalty == 0:
+                        break
+            else:
+                istate[POSITION] += 1
+
+        # end of a temperature
+        if istate[ACCEPTED] < max_iter_per_temp * 0.01:
+            istate[STAGNATION] += 1
+        else:
+            istate[STAGNATION] = 0
+        T *= alpha
+
+        if (istate[STAGNATION] >= stagnation_threshold or T < 0.01) and istate[REHEATS_LEFT] > 0 \
+                and istate[BEST_PENALTY] != 0:
+            istate[REHEATS_LEFT] -= 1
+            T = T0 * reheat_factor
+            istate[STAGNATION] = 0
+            _copy_plan(best_flat, best_roff, best_poff, cur_flat, cur_roff, cur_poff)
+            istate[CURRENT_PENALTY] = istate[BEST_PENALTY]
+            _reset(cur_flat, cur_roff, cur_poff, cur_time, cur_penalty, stamp, istate,
+                   locations, travel, depot, capacity, max_time)
+
+        fstate[0] = T
+        istate[ITERATION] = 0
+        istate[ACCEPTED] = 0
+        if T < 0.01:
+            return FINISHED
+
+
+# ---------------------------
+# Python entry point
+# ---------------------------
+
+def _plan_arrays(solution, route_room):
+    flat = np.array(solution.flat_items, dtype=np.int64)
+    roff = np.zeros(route_room, dtype=np.int64)
+    roff[:len(solution.route_offsets)] = solution.route_offsets
+    poff = np.array(solution.picker_offsets, dtype=np.int64)
+    return flat, roff, poff
+
+
+def _to_solution(flat, roff, poff):
+    return Solution.from_lists([[flat[roff[g]:roff[g + 1]].tolist() for g in range(poff[p], poff[p + 1])]
+                                for p in range(len(poff) - 1)])
+
+
+def _integer_data(problem):
+    return (isinstance(problem.max_time, int) and isinstance(problem.capacity, int)
+            and np.issubdtype(np.asarray(problem.travel_times).dtype, np.integer))
+
+
+def jit_simulated_annealing_fixed_pickers(problem, num_pickers, T0=100, alpha=0.95,
+                                          max_iter_per_temp=100, stagnation_threshold=30, rng=random,
+                                          initial_solution=None, reheats=0, target_acceptance=0.8,
+                                          step_progress=None, states=None):
+    """
+    simulated_annealing_fixed_pickers with the annealing loop compiled by Numba.
+    Same arguments, same results for the same RandomStream seed; without Numba
+    (or with another rng, or non-integer travel times) it runs the Python engine.
+    The compiled loop cannot call back, so step_progress is called whenever it
+    returns for a new block of uniforms instead of after every temperature step.
+    states is only used by the Python engine; the compiled loop evaluates every neighbour.
+    """
+    if (not JIT_AVAILABLE or not isinstance(rng, RandomStream) or not _integer_data(problem)
+            or (initial_solution is not None and initial_solution.num_pickers != num_pickers)):
+        return simulated_annealing_fixed_pickers(problem, num_pickers, T0, alpha, max_iter_per_temp,
+                                                 stagnation_threshold, rng, initial_solution, reheats,
+                                                 target_acceptance, step_progress, states)
+
+    if initial_solution is not None:
+        current_solution = initial_solution.copy()
+    else:
+        current_solution = create_initial_solution(problem, num_pickers, rng)
+    current_penalty, is_valid = problem.evaluate_solution(current_solution, num_pickers)
+
+    visited_nodes = 0
+    if T0 == "auto":
+        slack = SlackIndex(problem, current_solution)
+        T0, visited_nodes = calibrate_temperature(
+            lambda: problem.evaluate_solution(generate_neighbor(current_solution, problem, num_pickers, rng, slack), num_pickers)[0] - current_penalty,
+            target_acceptance)
+
+    route_room = len(current_solution.flat_items) + len(current_solution.route_offsets) + 1
+    cur = _plan_arrays(current_solution, route_room)
+    best = tuple(array.copy() for array in cur)
+    nb = tuple(array.copy() for array in cur)
+    locations = np.asarray(problem.product_locations, dtype=np.int64)
+    travel = np.asarray(problem.travel_times, dtype=np.int64)
+    depot = len(travel) - 1
+    cur_time = np.zeros(num_pickers, dtype=np.int64)
+    cur_penalty = np.zeros(num_pickers, dtype=np.int64)
+    stamp = np.full(num_pickers, -1, dtype=np.int64)
+
+    istate = np.zeros(9, dtype=np.int64)
+    _reset(cur[0], cur[1], cur[2], cur_time, cur_penalty, stamp, istate,
+                            locations, travel, depot, problem.capacity, problem.max_time)
+    istate[REHEATS_LEFT] = reheats
+    istate[CURRENT_PENALTY] = istate[BEST_PENALTY] = current_penalty
+    fstate = np.array([T0], dtype=np.float64)
+
+    uniforms = rng.take_block()
+    while _anneal(cur, best, nb, cur_time, cur_penalty, stamp, locations, travel, depot,
+                  problem.capacity, problem.max_time, num_pickers, float(T0), alpha, REHEAT_FACTOR,
+                  max_iter_per_temp, stagnation_threshold, uniforms, istate, fstate) == NEED_UNIFORMS:
+        uniforms = np.concatenate((uniforms[istate[POSITION]:], rng.take_block()))
+        istate[POSITION] = 0
+        if step_progress is not None:
+            step_progress({"temperature": float(fstate[0]), "best_penalty": int(istate[BEST_PENALTY]),
+                           "visited_nodes": visited_nodes + int(istate[VISITED])})
+    rng.give_back(uniforms[istate[POSITION]:])
+
+    best_penalty = int(istate[BEST_PENALTY])
+    return _to_solution(*best), best_penalty == 0, best_penalty, visited_nodes + int(istate[VISITED])
@@ -0,0 +1,325 @@
+import math
+from solution import Solution
+from randomStream import RandomStream
+from lowerBounds import picker_lower_bound
+
+LNS_PARAMETERS = {
+    "max_iterations": 2000,
+    "stagnation_threshold": 300,
+    "min_removal": 5,
+    "max_removal": 30,
+    "T0": 2,
+    "alpha": 0.998,
+}
+
+
+def _is_extended(problem):
+    return hasattr(problem, "picker_categories")
+
+
+class _Plan:
+    """
+    Feasible partial plan: routes per picker that respect capacity, maxTimePerRound
+    and categories, plus the items no picker could take yet. Its cost is the
+    total travel time with every unassigned item weighted as a full round,
+    so serving one more item always lowers it.
+    """
+
+    def __init__(self, problem, picker_ids=(), unassigned=()):
+        self.problem = problem
+        self.picker_ids = list(picker_ids)
+        self.routes = [[] for _ in self.picker_ids]
+        self.times = [0] * len(self.picker_ids)
+        self.unassigned = list(unassigned)
+
+    def copy(self):
+        clone = _Plan.__new__(_Plan)
+        clone.problem = self.problem
+        clone.picker_ids = list(self.picker_ids)
+        clone.routes = [[list(route) for route in routes] for routes in self.routes]
+        clone.times = list(self.times)
+        clone.unassigned = list(self.unassigned)
+        return clone
+
+    def cost(self):
+        return sum(self.times) + len(self.unassigned) * self.problem.max_time
+
+    def add_picker(self, picker_id):
+        self.picker_ids.append(picker_id)
+        self.routes.append([])
+        self.times.append(0)
+
+    def allowed(self, p, item):
+        return not _is_extended(self.problem) or self.problem.can_picker_pick_item(self.picker_ids[p], item)
+
+    def assigned(self):
+        return [item for routes in self.routes for route in routes for item in route]
+
+    def remove(self, items):
+        """Unassign items; routes left empty are dropped"""
+        items = set(items)
+        for p, routes in enumerate(self.routes):
+            if not any(item in items for route in routes for item in route):
+                continue
+            routes = [[item for item in route if item not in items] for route in routes]
+            self.routes[p] = [route for route in routes if route]
+            self.times[p] = sum(self.problem.calculate_route_time(route) for route in self.routes[p])
+        self.unassigned.extend(items)
+
+    def best_insertion(self, item, p):
+        """Cheapest feasible (extra_time, route, position) for item in picker p, or None"""
+        if not self.allowed(p, item):
+            return None
+        problem = self.problem
+        travel = problem.travel_times
+        locations = problem.product_locations
+        location = locations[item]
+        best = (travel[-1][location] + travel[location][-1], len(self.routes[p]), 0)
+        for r, route in enumerate(self.routes[p]):
+            if len(route) >= problem.capacity:
+                continue
+            previous = -1
+            for position in range(len(route) + 1):
+                following = locations[route[position]] if position < len(route) else -1
+                extra = travel[previous][location] + travel[location][following] - travel[previous][following]
+                if extra < best[0]:
+                    best = (extra, r, position)
+                previous = following
+        return best if self.times[p] + best[0] <= problem.max_time else None
+
+    def insert(self, item, p, r, position, extra):
+        if r == len(self.routes[p]):
+            self.routes[p].append([item])
+        else:
+            self.routes[p][r].insert(position, item)
+        self.times[p] += extra
+
+
+# ---------------------------
+# Destroy operators: remove about q items, return them
+# ---------------------------
+
+def random_removal(plan, q, rng):
+    items = rng.sample(plan.assigned(), q)
+    plan.remove(items)
+    return items
+
+
+def related_removal(plan, q, rng):
+    """A random item and the q - 1 items closest to it in the travel matrix"""
+    assigned = plan.assigned()
+    seed = rng.choice(assigned)
+    travel = plan.problem.travel_times
+    locations = plan.problem.product_locations
+    a = locations[seed]
+    assigned.sort(key=lambda item: 0 if item == seed else
+                  min(travel[a][locations[item]], travel[locations[item]][a]))
+    items = assigned[:q]
+    plan.remove(items)
+    return items
+
+
+def worst_route_removal(plan, q, rng):
+    """Whole routes, highest travel time per item first, until at least q items are out"""
+    problem = plan.problem
+    routes = [route for picker_routes in plan.routes for route in picker_routes]
+    routes.sort(key=lambda route: problem.calculate_route_time(route) / len(route), reverse=True)
+    items = []
+    for route in routes:
+        if len(items) >= q:
+            break
+        items.extend(route)
+    plan.remove(items)
+    return items
+
+
+def picker_removal(plan, q, rng):
+    """All items of one random picker"""
+    p = rng.choice([p for p, routes in enumerate(plan.routes) if routes])
+    items = [item for route in plan.routes[p] for item in route]
+    plan.remove(items)
+    return items
+
+
+DESTROY_OPERATORS = {
+    "random_removal": random_removal,
+    "related_removal": related_removal,
+    "worst_route_removal": worst_route_removal,
+    "picker_removal": picker_removal,
+}
+
+
+# ---------------------------
+# Repair operators: insert the unassigned items where they fit
+# ---------------------------
+
+def greedy_insertion(plan, rng):
+    """Unassigned items in random order, each at its cheapest feasible position"""
+    items = plan.unassigned
+    plan.unassigned = []
+    rng.shuffle(items)
+    for item in items:
+        options = [(option, p) for p in range(len(plan.routes))
+                   if (option := plan.best_insertion(item, p)) is not None]
+        if not options:
+            plan.unassigned.append(item)
+            continue
+        (extra, r, position), p = min(options)
+        plan.insert(item, p, r, position, extra)
+
+
+def regret_insertion(plan, rng):
+    """
+    Regret-2 insertion: repeatedly insert the item that loses most when it does
+    not get its best picker (items with a single feasible picker go first).
+    Only the options of the picker that changed are recomputed.
+    """
+    pickers = range(len(plan.routes))
+    options = {item: [plan.best_insertion(item, p) for p in pickers] for item in plan.unassigned}
+    plan.unassigned = []
+    while options:
+        chosen, chosen_key = None, None
+        for item, per_picker in list(options.items()):
+            extras = sorted(option[0] for option in per_picker if option is not None)
+            if not extras:
+                plan.unassigned.append(item)
+                del options[item]
+                continue
+            regret = extras[1] - extras[0] if len(extras) > 1 else math.inf
+            key = (-regret, extras[0])
+            if chosen_key is None or key < chosen_key:
+                chosen, chosen_key = item, key
+        if chosen is None:
+            break
+        per_picker = options.pop(chosen)
+        p = min((p for p in pickers if per_picker[p] is not None), key=lambda p: per_picker[p][0])
+        extra, r, position = per_picker[p]
+        plan.insert(chosen, p, r, position, extra)
+        for item in options:
+            options[item][p] = plan.best_insertion(item, p)
+
+
+REPAIR_OPERATORS = {
+    "greedy_insertion": greedy_insertion,
+    "regret_insertion": regret_insertion,
+}
+
+
+# ---------------------------
+# Search
+# ---------------------------
+
+def lns_fixed_pickers(problem, plan, rng, max_iterations=2000, stagnation_threshold=300,
+                      min_removal=5, max_removal=30, T0=2, alpha=0.998):
+    """
+    Ruin and recreate on a fixed set of pickers, accepting worse plans with
+    the SA rule. Stops when every item is served, after max_iterations or
+    after stagnation_threshold iterations without a new best plan.
+    Returns (best plan, iterations).
+    """
+    current = plan
+    best = plan.copy()
+    T = T0
+    since_best = 0
+    destroy = list(DESTROY_OPERATORS.values())
+    repair = list(REPAIR_OPERATORS.values())
+
+    iterations = 0
+    while iterations < max_iterations and best.unassigned and since_best < stagnation_threshold:
+        iterations += 1
+        candidate = current.copy()
+        assigned = len(problem.items) - len(candidate.unassigned)
+        if assigned:
+            q = rng.randint(min(min_removal, assigned), min(max_removal, assigned))
+            rng.choice(destroy)(candidate, q, rng)
+        rng.choice(repair)(candidate, rng)
+
+        delta = candidate.cost() - current.cost()
+        if delta <= 0 or rng.random() < math.exp(-delta / T):
+            current = candidate
+        if current.cost() < best.cost():
+            best = current.copy()
+            since_best = 0
+        else:
+            since_best += 1
+        # the temperature cools every iteration, improving or not
+        T *= alpha
+
+    return best, iterations
+
+
+def _next_picker(problem, plan):
+    """
+    Picker to add: the next id in the base variant; in the Extended variant the
+    unused picker that may collect most of the unassigned items. None when no
+    picker is left (or none can take an unassigned item).
+    """
+    if not _is_extended(problem):
+        return len(plan.picker_ids) if len(plan.picker_ids) < problem.num_pickers else None
+    used = set(plan.picker_ids)
+    best, best_count = None, 0
+    for picker_id in range(problem.num_pickers):
+        if picker_id in used:
+            continue
+        count = sum(problem.can_picker_pick_item(picker_id, item) for item in plan.unassigned)
+        if count > best_count:
+            best, best_count = picker_id, count
+    return best
+
+
+def iterative_lns(problem, logging=False, max_pickers=None, seed=None, progress=None, **lns_parameters):
+    """
+    Picker-count search with LNS: pickers are added one at a time (from the
+    lower bound on, every count gets an LNS run warm-started from the plan of
+    the previous count) until every item is served.
+    Same arguments, progress calls and return layout as iterative_simulated_annealing
+    of the problem's variant.
+    """
+    parameters = {**LNS_PARAMETERS, **lns_parameters}
+    extended = _is_extended(problem)
+    if max_pickers is None:
+        max_pickers = problem.num_pickers
+    rng = RandomStream(seed)
+
+    lower_bound = picker_lower_bound(problem)
+    if logging:
+        print("=== ITERATIVE LARGE NEIGHBOURHOOD SEARCH ===")
+        print(f"Total items to collect: {len(problem.items)}")
+        print(f"Lower bound: {lower_bound} pickers\n")
+
+    plan = _Plan(problem, unassigned=problem.items)
+    total_visited = 0
+    optimization_results = []
+    while plan.unassigned and len(plan.picker_ids) < max_pickers and lower_bound <= max_pickers:
+        picker_id = _next_picker(problem, plan)
+        if picker_id is None:
+            break
+        plan.add_picker(picker_id)
+        num_pickers = len(plan.picker_ids)
+        greedy_insertion(plan, rng)
+        if plan.unassigned and num_pickers >= lower_bound:
+            plan, iterations = lns_fixed_pickers(problem, plan, rng, **parameters)
+            total_visited += iterations
+
+        is_valid = not plan.unassigned
+        if progress is not None:
+            progress({"num_pickers": num_pickers, "is_valid": is_valid,
+                      "penalty": len(plan.unassigned), "visited_nodes": total_visited})
+        optimization_results.append(num_pickers if is_valid else float('inf'))
+        if logging:
+            status = "✓ every item served" if is_valid else f"✗ {len(plan.unassigned)} items unassigned"
+            print(f"--- {num_pickers} picker{'s' if num_pickers > 1 else ''}: {status}")
+
+    if plan.unassigned:
+        if logging:
+            print(f"\n⚠ Could not find valid solution with up to {max_pickers} pickers")
+        optimization_results += [float('inf')] * (max_pickers - len(optimization_results))
+
+    num_pickers = len(plan.picker_ids)
+    solution = Solution(plan.routes, plan.picker_ids if extended else None)
+    _, is_valid = problem.evaluate_solution(solution, num_pickers)
+    if extended:
+        if not is_valid:
+            return total_visited, (None, None, False), optimization_results
+        return total_visited, (num_pickers, solution.to_dict(), True, list(plan.picker_ids)), optimization_results
+    return total_visited, (num_pickers, solution.to_lists(), is_valid), optimization_results
@@ -0,0 +1,168 @@
+import math
+import random
+import sys
+
+# numpy is imported inside the bound functions: the exact solver path of the
+# run scripts only needs bound_fields(..., exact=True), which does not use it
+
+
+def _item_costs(problem, travel, items):
+    """
+    Per item: cheapest edge into it, cheapest edge out of it (both from/to the
+    depot or another item), depot departure and depot return.
+    """
+    import numpy as np
+    locations = np.array([problem.product_locations[item] for item in items])
+    depot = len(travel) - 1
+
+    between = travel[np.ix_(locations, locations)]
+    np.fill_diagonal(between, np.inf)
+    departure = travel[depot, locations]
+    arrival = travel[locations, depot]
+    cheapest_in = np.minimum(between.min(axis=0), departure)
+    cheapest_out = np.minimum(between.min(axis=1), arrival)
+    return cheapest_in, cheapest_out, departure, arrival
+
+
+def _shortest_round_trips(travel):
+    """
+    Shortest depot -> location -> depot time of every location, over any stops. The travel times
+    do not obey the triangle inequality, so a route through other items can
+    be shorter than the direct round trip; this is a lower bound on both.
+    """
+    import numpy as np
+    depot = len(travel) - 1
+    edges = travel.copy()
+    np.fill_diagonal(edges, 0)
+    # Bellman-Ford on the dense matrix, from the depot and (transposed) to it
+    from_depot, to_depot = edges[depot].copy(), edges[:, depot].copy()
+    while True:
+        next_from = np.minimum(from_depot, (from_depot[:, None] + edges).min(axis=0))
+        next_to = np.minimum(to_depot, (edges + to_depot[None, :]).min(axis=1))
+        if np.array_equal(next_from, from_depot) and np.array_equal(next_to, to_depot):
+            break
+        from_depot, to_depot = next_from, next_to
+    return from_depot + to_depot
+
+
+def _bin_packing_l2(sizes, capacity):
+    """Martello-Toth L2 bound on the number of bins of `capacity` needed for sizes"""
+    import numpy as np
+    sizes = np.sort(sizes)[::-1]
+    best = math.ceil(sizes.sum() / capacity - 1e-9)
+    thresholds = np.unique(np.concatenate(([0.0], sizes[sizes <= capacity / 2])))
+    for k in thresholds:
+        large = sizes > capacity - k
+        medium = (sizes <= capacity - k) & (sizes > capacity / 2)
+        small = (sizes <= capacity / 2) & (sizes >= k)
+        room = medium.sum() * capacity - sizes[medium].sum()
+        extra = max(0, math.ceil((sizes[small].sum() - room) / capacity - 1e-9))
+        best = max(best, int(large.sum() + medium.sum() + extra))
+    return best
+
+
+def _items_lower_bound(problem, travel, round_trips, items):
+    if not items:
+        return 0
+    import numpy as np
+    cheapest_in, cheapest_out, departure, arrival = _item_costs(problem, travel, items)
+
+    # An item that cannot be reached and left within maxTimePerRound, even via
+    # other locations, can never be picked
+    locations = [problem.product_locations[item] for item in items]
+    if np.any(round_trips[locations] > problem.max_time):
+        return math.inf
+
+    # Time bound: every item is entered and left once, every route starts and
+    # ends at the depot, and there are at least ceil(n / capacity) routes
+    routes = math.ceil(len(items) / problem.capacity)
+    total_in = cheapest_in.sum() + np.sort(arrival)[:routes].sum()
+    total_out = cheapest_out.sum() + np.sort(departure)[:routes].sum()
+    time_bound = math.ceil(max(total_in, total_out) / problem.max_time - 1e-9)
+
+    # Bin packing: a picker's time is at least the entry edges of its items
+    # plus one return to the depot
+    packing_bound = _bin_packing_l2(cheapest_in, problem.max_time - arrival.min())
+    return max(1, time_bound, packing_bound)
+
+
+def picker_lower_bound(problem):
+    """
+    Valid lower bound on the number of pickers, or math.inf when the instance
+    has no feasible solution (an item out of reach, or not enough pickers).
+    In the Extended variant every category is bounded on its own when all
+    pickers and items have a category.
+    """
+    import numpy as np
+    items = list(problem.items)
+    travel = np.asarray(problem.travel_times, dtype=float)
+    round_trips = _shortest_round_trips(travel)
+    categories = getattr(problem, "picker_categories", None) and problem.product_categories
+    if categories and all(c is not None for c in problem.picker_categories[:problem.num_pickers]) \
+            and all(problem.product_categories[item] is not None for item in items):
+        pickers_by_category = problem.get_pickers_by_category()
+        items_by_category = {}
+        for item in items:
+            items_by_category.setdefault(problem.product_categories[item], []).append(item)
+        bound = 0
+        for category, category_items in items_by_category.items():
+            category_bound = _items_lower_bound(problem, travel, round_trips, category_items)
+            if category_bound > len(pickers_by_category.get(category, [])):
+                return math.inf
+            bound += category_bound
+        return bound
+
+    bound = _items_lower_bound(problem, travel, round_trips, items)
+    return bound if bound <= problem.num_pickers else math.inf
+
+
+def bound_fields(problem, solution, exact=False):
+    """
+    best_bound / gap / optimal fields of a (num_pickers, routes, is_valid) result,
+    like the Hexaly results. An exact result is its own bound. Infinite values
+    are written as None, so the results files stay valid JSON.
+    """
+    num_pickers, _, is_valid = solution[:3]
+    if exact:
+        best_bound = num_pickers if is_valid else None
+    else:
+        best_bound = picker_lower_bound(problem)
+        if best_bound == math.inf:
+            best_bound = None
+    if not is_valid or num_pickers is None or best_bound is None:
+        return {"best_bound": best_bound, "gap": None, "optimal": False}
+    gap = (num_pickers - best_bound) / num_pickers
+    return {"best_bound": best_bound, "gap": gap, "optimal": num_pickers == best_bound}
+
+
+def check_against_exact(cases=400, seed=0):
+    """
+    Compare picker_lower_bound with the proven minimum of the exact solver on
+    random small instances (travel times without the triangle inequality,
+    tight maxTimePerRound). Returns the (seed, bound, minimum) of every case
+    where the bound is above the minimum.
+    """
+    from instanceGenerator import generate_instance
+    from simulatedAnnealing import OrderPickingProblem
+    from exactSolver import exact_minimum_pickers
+    rng = random.Random(seed)
+    violations = []
+    for case in range(cases):
+        spec = {"amount_items": rng.randint(2, 8), "scale": rng.choice(["short", "medium"]),
+                "capacity": rng.randint(1, 4), "maxTimePerRound": rng.randint(10, 45), "seed": case}
+        problem = OrderPickingProblem(generate_instance(spec))
+        _, (minimum, _, is_valid), _ = exact_minimum_pickers(problem)
+        bound = picker_lower_bound(problem)
+        if is_valid and bound > minimum:
+            violations.append((case, bound, minimum))
+    return violations
+
+
+if __name__ == "__main__":
+    # python lowerBounds.py [cases]: check the bound against the exact solver
+    CASES = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    violations = check_against_exact(CASES)
+    for case, bound, minimum in violations:
+        print(f"✗ case {case}: lower bound {bound} above the proven minimum {minimum}")
+    print(f"{CASES - len(violations)}/{CASES} bounds at or below the exact minimum")
+    sys.exit(1 if violations else 0)
@@ -0,0 +1,171 @@
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from statistics import NormalDist
+
+import pytz
+from simulatedAnnealing import OrderPickingProblem, iterative_simulated_annealing
+from exactSolver import can_solve_exactly
+from randomStream import new_seed, derive_seed
+
+FOLDER = "instances"
+MAX_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+# Candidate values; the race starts from a random sample of their combinations
+PARAMETER_SPACE = {
+    "T0": [50, 100, 200, "auto"],
+    "alpha": [0.9, 0.95, 0.98],
+    "max_iter_per_temp": [50, 100, 200],
+    "stagnation_threshold": [10, 20, 30],
+}
+# Current setting of the run scripts, always part of the race
+BASELINE = {
+    "T0": 100,
+    "alpha": 0.95,
+    "max_iter_per_temp": 100,
+    "stagnation_threshold": 20,
+}
+NUM_CONFIGURATIONS = 16
+# Instances raced on (sampled from FOLDER, exact-solver instances excluded)
+NUM_INSTANCES = 20
+TUNING_MAX_ITEMS = 155
+# No configuration is dropped before this many instances
+MIN_INSTANCES = 5
+# Significance level of the elimination test
+SIGNIFICANCE = 0.05
+
+
+def _run(configuration, path, seed):
+    """One SA run in a worker: (num_pickers, is_valid, CPU seconds)"""
+    with open(path, "r") as f:
+        problem = OrderPickingProblem(json.load(f))
+    start = time.process_time()
+    _, solution, _ = iterative_simulated_annealing(problem, **configuration, seed=seed)
+    return solution[0], solution[2], time.process_time() - start
+
+
+def sample_configurations(rng, count=NUM_CONFIGURATIONS):
+    """BASELINE plus count - 1 distinct random points of PARAMETER_SPACE"""
+    grid = [dict(zip(PARAMETER_SPACE, values)) for values in itertools.product(*PARAMETER_SPACE.values())]
+    grid = [configuration for configuration in grid if configuration != BASELINE]
+    return [dict(BASELINE)] + rng.sample(grid, min(count - 1, len(grid)))
+
+
+def sample_instances(rng, count=NUM_INSTANCES):
+    files = []
+    for file in sorted(os.listdir(FOLDER)):
+        if file.endswith(".json"):
+            with open(os.path.join(FOLDER, file), "r") as f:
+                problem = OrderPickingProblem(json.load(f))
+            if not can_solve_exactly(problem) and len(problem.items) <= TUNING_MAX_ITEMS:
+                files.append(file)
+    return rng.sample(files, min(count, len(files)))
+
+
+def _ranks(costs):
+    """Ranks (1 = best) of a list of comparable costs, ties get their average rank"""
+    order = sorted(range(len(costs)), key=lambda i: costs[i])
+    ranks = [0.0] * len(costs)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and costs[order[j + 1]] == costs[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return ranks
+
+
+def mean_ranks(results, alive, instances):
+    """
+    Mean rank of every alive configuration over the instances raced so far.
+    On each instance a run is ranked by the pickers above the best count any
+    alive configuration reached (invalid runs last), then by CPU time.
+    """
+    totals = {c: 0.0 for c in alive}
+    for instance in instances:
+        runs = [results[c][instance] for c in alive]
+        valid_counts = [pickers for pickers, is_valid, _ in runs if is_valid]
+        reference = min(valid_counts) if valid_counts else None
+        costs = [(pickers - reference if is_valid else float('inf'), cpu)
+                 for pickers, is_valid, cpu in runs]
+        for c, rank in zip(alive, _ranks(costs)):
+            totals[c] += rank
+    return {c: total / len(instances) for c, total in totals.items()}
+
+
+def eliminate(ranks, num_instances):
+    """
+    Bonferroni-Dunn test against the best configuration: drop every
+    configuration whose mean rank is worse by more than the critical difference.
+    """
+    k = len(ranks)
+    if k < 2 or num_instances < MIN_INSTANCES:
+        return list(ranks)
+    z = NormalDist().inv_cdf(1 - SIGNIFICANCE / (2 * (k - 1)))
+    critical_difference = z * ((k * (k + 1)) / (6 * num_instances)) ** 0.5
+    best = min(ranks.values())
+    return [c for c, rank in ranks.items() if rank - best <= critical_difference]
+
+
+def race(seed=None, workers=MAX_WORKERS, logging=True):
+    """
+    Race the sampled configurations over the sampled instances, one instance
+    per stage; every stage runs all surviving configurations in parallel.
+    Returns the winning configuration and the race log.
+    """
+    if seed is None:
+        seed = new_seed()
+    rng = random.Random(seed)
+    configurations = sample_configurations(rng)
+    instances = sample_instances(rng)
+    alive = list(range(len(configurations)))
+    results = {c: {} for c in alive}
+    stages = []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for stage, file in enumerate(instances, start=1):
+            instance_id = file.split("-")[1].split("_")[0]
+            run_seed = derive_seed(seed, instance_id)
+            futures = {c: pool.submit(_run, configurations[c], os.path.join(FOLDER, file), run_seed)
+                       for c in alive}
+            for c, future in futures.items():
+                results[c][file] = future.result()
+
+            ranks = mean_ranks(results, alive, instances[:stage])
+            alive = eliminate(ranks, stage)
+            stages.append({"instance": file, "mean_ranks": ranks, "alive": list(alive)})
+            if logging:
+                print(f"Stage {stage}/{len(instances)} ({file}): {len(alive)} configurations left")
+            if len(alive) == 1:
+                break
+
+    ranks = stages[-1]["mean_ranks"]
+    best = min(alive, key=lambda c: ranks[c])
+    return configurations[best], {
+        "seed": seed,
+        "configurations": configurations,
+        "instances": instances,
+        "stages": stages,
+        "best": best,
+    }
+
+
+if __name__ == "__main__":
+    # python parameterTuner.py [seed] [workers]
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else new_seed()
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else MAX_WORKERS
+
+    best, log = race(seed, workers)
+    print(f"\nBest configuration: {best}")
+
+    timestamp = datetime.now(pytz.timezone("Europe/Brussels")).strftime("%Y-%m-%d_%H-%M-%S")
+    with open(f"results/tuning_{timestamp}.json", "w") as out:
+        json.dump(log, out, indent=4)
+    print(f"Saved → results/tuning_{timestamp}.json")
@@ -0,0 +1,217 @@
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from datetime import datetime
+
+import pytz
+import simulatedAnnealing
+import simulatedAnnealingExtended
+from tabuSearch import iterative_tabu_search, TABU_PARAMETERS
+from largeNeighborhoodSearch import iterative_lns, LNS_PARAMETERS
+from lowerBounds import bound_fields
+from exactSolver import can_solve_exactly, exact_minimum_pickers, exact_minimum_pickers_by_category
+from randomStream import new_seed, derive_seed
+from resultsStore import ResultsStore
+from instanceConverter import load_instance
+
+MAX_WORKERS = os.cpu_count() or 1
+# seconds until the best result so far is returned
+TIME_LIMIT = 60
+# upper bound before any worker is valid
+NO_BOUND = 2 ** 31 - 1
+
+SA_PARAMETERS = {
+    "T0": 100,
+    "alpha": 0.95,
+    "max_iter_per_temp": 100,
+    "stagnation_threshold": 20,
+}
+# compiled SA loop when Numba is installed; same results as the Python loop
+USE_JIT = True
+
+# (engine, parameters) per worker; with more workers than entries the list
+# is repeated, every worker with its own seed
+PORTFOLIO = [
+    ("simulatedAnnealing", SA_PARAMETERS),
+    ("tabuSearch", TABU_PARAMETERS),
+    ("largeNeighborhoodSearch", LNS_PARAMETERS),
+    ("simulatedAnnealing", {**SA_PARAMETERS, "T0": "auto", "reheats": 2}),
+]
+
+
+# ---------------------------
+# Worker side (one process per portfolio entry)
+# ---------------------------
+
+def _load_problem(path):
+    instance = load_instance(path)
+    if "orderPickerCategories" in instance:
+        return "extended", simulatedAnnealingExtended.OrderPickingProblem(instance)
+    return "original", simulatedAnnealing.OrderPickingProblem(instance)
+
+
+def _engine(variant, engine):
+    if engine == "tabuSearch":
+        return iterative_tabu_search
+    if engine == "largeNeighborhoodSearch":
+        return iterative_lns
+    if variant == "extended":
+        return simulatedAnnealingExtended.iterative_simulated_annealing
+    return lambda problem, **kwargs: simulatedAnnealing.iterative_simulated_annealing(problem, **kwargs, jit=USE_JIT)
+
+
+class _Stopped(Exception):
+    pass
+
+
+def _worker(index, path, engine, parameters, seed, upper_bound, messages):
+    """
+    Run one engine; progress and the final result go to the parent as
+    (kind, index, payload). The worker stops by itself once the shared
+    upper_bound leaves it nothing to win.
+    """
+    variant, problem = _load_problem(path)
+
+    def progress(status):
+        messages.put(("progress", index, status))
+        if not status["is_valid"] and status["num_pickers"] + 1 >= upper_bound.value:
+            raise _Stopped
+
+    start_time = time.time()
+    try:
+        visited, solution, _ = _engine(variant, engine)(problem, **parameters, seed=seed, progress=progress)
+    except _Stopped:
+        messages.put(("stopped", index, None))
+        return
+    messages.put(("result", index, {
+        "visited_nodes": visited,
+        "runtime": int((time.time() - start_time) * 1000),
+        "solution": solution,
+    }))
+
+
+# ---------------------------
+# Parent side
+# ---------------------------
+
+def run_portfolio(path, seed=None, workers=MAX_WORKERS, time_limit=TIME_LIMIT, portfolio=PORTFOLIO, logging=False):
+    """
+    Race the portfolio on one instance, one process per entry (cycled up to
+    `workers`), until every worker is done or the time limit is reached.
+
+    A valid result at k pickers makes k the upper bound of the race: every
+    engine searches upwards from the lower bound, so a worker about to try k or
+    more pickers can no longer win and stops itself. The parent reads messages
+    until every worker has sent its result or stopped. The best valid result
+    (fewest pickers, first found) is returned as
+    (results entry, (num_pickers, routes, is_valid[, picker_ids]), worker log).
+    """
+    if seed is None:
+        seed = new_seed()
+    variant, problem = _load_problem(path)
+    start_time = time.time()
+
+    if can_solve_exactly(problem):
+        # small instance: exact engine proves the minimum in milliseconds
+        exact = exact_minimum_pickers_by_category if variant == "extended" else exact_minimum_pickers
+        visited, solution, _ = exact(problem)
+        entry = {"visited_nodes": visited, "runtime": int((time.time() - start_time) * 1000),
+                 "num_pickers": solution[0], "is_valid": solution[2], "seed": seed, "solver": "exact",
+                 "variant": variant, **bound_fields(problem, solution, exact=True)}
+        return entry, solution, []
+
+    entries = [portfolio[i % len(portfolio)] for i in range(max(1, workers))]
+    log = [{"engine": engine, "parameters": parameters, "seed": derive_seed(seed, i), "status": "running"}
+           for i, (engine, parameters) in enumerate(entries)]
+    messages = multiprocessing.Queue()
+    # fewest pickers any worker has made valid so far, shared with all workers
+    upper_bound = multiprocessing.Value("i", NO_BOUND)
+    processes = [multiprocessing.Process(target=_worker, daemon=True,
+                                         args=(i, path, engine, parameters, log[i]["seed"], upper_bound, messages))
+                 for i, (engine, parameters) in enumerate(entries)]
+    for process in processes:
+        process.start()
+
+    best = None
+    # workers that have not sent their result or stopped at the bound yet
+    running = set(range(len(processes)))
+    deadline = start_time + time_limit
+    while running and time.time() < deadline:
+        try:
+            kind, index, payload = messages.get(timeout=deadline - time.time())
+        except queue.Empty:
+            break
+
+        if kind == "progress":
+            log[index]["num_pickers"] = payload["num_pickers"]
+            if payload["is_valid"] and payload["num_pickers"] < upper_bound.value:
+                upper_bound.value = payload["num_pickers"]
+                if logging:
+                    print(f"[{time.time() - start_time:6.1f}s] worker {index} ({log[index]['engine']}): "
+                          f"valid with {payload['num_pickers']} pickers")
+        elif kind == "stopped":
+            log[index]["status"] = "stopped at bound"
+            running.discard(index)
+        else:
+            solution = payload["solution"]
+            log[index].update(status="valid" if solution[2] else "invalid", visited_nodes=payload["visited_nodes"],
+                              runtime=payload["runtime"])
+            running.discard(index)
+            if solution[2] and (best is None or solution[0] < best[1][0]):
+                best = (index, solution)
+
+    for i in running:
+        log[i]["status"] = "stopped at time limit"
+    for process in processes:
+        process.terminate()
+        process.join()
+
+    run_time_ms = int((time.time() - start_time) * 1000)
+    visited = sum(worker.get("visited_nodes", 0) for worker in log)
+    if best is None:
+        solution = (None, None, False)
+        entry = {"visited_nodes": visited, "runtime": run_time_ms, "num_pickers": None, "is_valid": False,
+                 "seed": seed, "solver": "portfolio"}
+    else:
+        index, solution = best
+        entry = {"visited_nodes": visited, "runtime": run_time_ms, "num_pickers": solution[0], "is_valid": True,
+                 "seed": log[index]["seed"], "solver": log[index]["engine"]}
+    entry.update(bound_fields(problem, solution))
+    entry["variant"] = variant
+    entry["portfolio_seed"] = seed
+    entry["workers"] = len(log)
+    return entry, solution, log
+
+
+if __name__ == "__main__":
+    # python portfolioRunner.py <instance> [seed] [--workers=N] [--time-limit=seconds]
+    ARGS = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    OPTIONS = dict(arg[2:].split("=", 1) for arg in sys.argv[1:] if arg.startswith("--") and "=" in arg)
+    INSTANCE_FILE = ARGS[0]
+    SEED = int(ARGS[1]) if len(ARGS) > 1 else new_seed()
+
+    entry, solution, log = run_portfolio(INSTANCE_FILE, SEED, int(OPTIONS.get("workers", MAX_WORKERS)),
+                                         float(OPTIONS.get("time-limit", TIME_LIMIT)), logging=True)
+    for i, worker in enumerate(log):
+        print(f"Worker {i} ({worker['engine']}): {worker['status']}")
+
+    name = os.path.basename(INSTANCE_FILE)
+    entry["id"] = name.split("-")[1].split("_")[0]
+    entry["type"] = name.split("-")[1].split("_")[1]
+    entry["param_value"] = name.split("-")[2].split(".")[0]
+    print(f"Results for {INSTANCE_FILE}: {entry}")
+
+    current_time = datetime.now(pytz.timezone("Europe/Brussels"))
+    timestamp = current_time.strftime("%Y-%m-%d_%H-%M-%S")
+    with open(f"results/results_individual_instance_{timestamp}.json", "w") as out:
+        json.dump([entry], out, indent=4)
+
+    with ResultsStore() as store:
+        run_id = store.start_run(entry["variant"], "individual", current_time,
+                                 source=f"results/results_individual_instance_{timestamp}.json")
+        store.add_results(run_id, [entry], {"portfolio": PORTFOLIO})
+
+    print(f"\nSaved → results/results_individual_instance_{timestamp}.json")
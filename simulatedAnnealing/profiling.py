@@ -0,0 +1,156 @@
+import os
+import signal
+import sys
+import time
+from collections import Counter
+
+# seconds of CPU time between two samples of the sampling profiler
+SAMPLE_INTERVAL = 0.001
+# functions in the hotspot summary
+TOP_N = 25
+# always listed in the summary, also when they are not in the top N
+FOCUS_FUNCTIONS = ["evaluate_solution", "picker_penalty", "generate_neighbor", "calculate_route_time",
+                   "simulated_annealing_fixed_pickers", "create_initial_solution", "update", "copy"]
+
+
+def _label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Profile:
+    """
+    Result of a profiled call: weights per collapsed stack (root;...;leaf) and
+    per function [calls, self, total]. Weights are samples for the sampling
+    profiler (calls unknown) and microseconds for the deterministic one.
+    """
+
+    def __init__(self, mode, unit):
+        self.mode = mode
+        self.unit = unit
+        self.stacks = Counter()
+        self.functions = {}
+        self.elapsed = 0.0
+
+    def add_stack(self, stack, weight):
+        self.stacks[";".join(stack)] += weight
+
+    def function_totals(self):
+        """[calls, self, total] per function from the stacks (calls from the tracer when known)"""
+        functions = {label: [values[0], 0, 0] for label, values in self.functions.items()}
+        for stack, weight in self.stacks.items():
+            labels = stack.split(";")
+            functions.setdefault(labels[-1], [None, 0, 0])[1] += weight
+            for label in set(labels):
+                functions.setdefault(label, [None, 0, 0])[2] += weight
+        return functions
+
+
+def _sampled(func, interval):
+    profile = Profile("sampling", "samples")
+    root = sys._getframe()
+
+    def sample(signum, frame):
+        stack = []
+        while frame is not None and frame is not root:
+            stack.append(_label(frame.f_code))
+            frame = frame.f_back
+        if stack:
+            profile.add_stack(reversed(stack), 1)
+
+    previous = signal.signal(signal.SIGPROF, sample)
+    signal.setitimer(signal.ITIMER_PROF, interval, interval)
+    try:
+        result = func()
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, previous)
+    return result, profile
+
+
+def _traced(func):
+    """
+    Deterministic: every Python call is timed with sys.setprofile (builtins
+    count towards their caller). Self time goes to the full stack, so
+    recursion and callers stay apart.
+    """
+    profile = Profile("deterministic", "us")
+    calls = Counter()
+    stacks = profile.stacks
+    # [stack path, start, time spent in callees] per active call
+    active = []
+    clock = time.perf_counter
+    labels = {}
+
+    def tracer(frame, event, arg):
+        if event == "call":
+            code = frame.f_code
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = _label(code)
+            calls[label] += 1
+            active.append([f"{active[-1][0]};{label}" if active else label, clock(), 0.0])
+        elif event == "return" and active:
+            path, start, in_callees = active.pop()
+            elapsed = clock() - start
+            stacks[path] += int((elapsed - in_callees) * 1e6)
+            if active:
+                active[-1][2] += elapsed
+
+    sys.setprofile(tracer)
+    try:
+        result = func()
+    finally:
+        sys.setprofile(None)
+    profile.functions = {label: [count, 0, 0] for label, count in calls.items()}
+    return result, profile
+
+
+def profile_call(func, mode="sampling", interval=SAMPLE_INTERVAL):
+    """
+    Run func() under the sampling profiler (SIGPROF, low overhead) or the
+    deterministic tracer (exact call counts, several times slower).
+    Returns (func's result, Profile). Without SIGPROF (Windows) the
+    deterministic tracer is used.
+    """
+    start = time.perf_counter()
+    if mode == "sampling" and hasattr(signal, "setitimer"):
+        result, profile = _sampled(func, interval)
+    else:
+        result, profile = _traced(func)
+    profile.elapsed = time.perf_counter() - start
+    return result, profile
+
+
+def hotspot_summary(profile, top=TOP_N, focus=FOCUS_FUNCTIONS):
+    """Text table of the top functions by self weight, then the focus functions"""
+    functions = profile.function_totals()
+    total = sum(profile.stacks.values()) or 1
+    ranked = sorted(functions.items(), key=lambda item: item[1][1], reverse=True)
+
+    def row(label, values):
+        calls, own, cumulative = values
+        return (f"{'-' if calls is None else calls:>10} {own:>12} {own / total:7.1%} {cumulative:>12} "
+                f"{cumulative / total:7.1%}  {label}")
+
+    header = f"{'calls':>10} {'self':>12} {'self %':>7} {'total':>12} {'total %':>7}  function"
+    lines = [f"{profile.mode} profile, {profile.elapsed:.2f} s wall time, weights in {profile.unit}",
+             "", f"Top {top} by self {profile.unit}:", header]
+    lines += [row(label, values) for label, values in ranked[:top]]
+    lines += ["", "Focus functions:", header]
+    lines += [row(label, values) for label, values in ranked if label.split(" ")[0] in focus]
+    return "\n".join(lines)
+
+
+def write_profile(profile, prefix, top=TOP_N):
+    """
+    Write <prefix>.collapsed (one 'root;...;leaf weight' line per stack, the
+    input of flamegraph.pl, speedscope or inferno) and <prefix>.profile.txt
+    (the hotspot summary). Returns both paths.
+    """
+    with open(f"{prefix}.collapsed", "w") as out:
+        for stack, weight in sorted(profile.stacks.items()):
+            if weight > 0:
+                out.write(f"{stack} {weight}\n")
+    with open(f"{prefix}.profile.txt", "w") as out:
+        out.write(hotspot_summary(profile, top) + "\n")
+    return f"{prefix}.collapsed", f"{prefix}.profile.txt"
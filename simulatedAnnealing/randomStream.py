@@ -0,0 +1,106 @@
+import secrets
+
+# numpy is imported on first use, so modules that only import the SA code
+# (the exact solver path of the run scripts) start without it
+
+BLOCK_SIZE = 4096
+
+
+def new_seed():
+    """Fresh 63-bit seed, small enough to store as a plain JSON integer"""
+    return secrets.randbits(63)
+
+
+def derive_seed(seed, *keys):
+    """
+    Derive an independent child seed from a run seed and integer keys
+    (e.g. an instance id or worker number) using NumPy's SeedSequence.
+    The same (seed, keys) always gives the same child seed.
+    """
+    import numpy as np
+    sequence = np.random.SeedSequence(seed, spawn_key=tuple(int(k) for k in keys))
+    return int(sequence.generate_state(1, np.uint64)[0] >> np.uint64(1))
+
+
+class RandomStream:
+    """
+    Seeded per-run random stream with the subset of the `random` module API
+    used by the solvers (random, randint, choice, sample, shuffle).
+
+    Uniform numbers are drawn from a NumPy Generator in blocks of
+    block_size, so the SA inner loop only pays for a list lookup per draw.
+    """
+
+    __slots__ = ("seed", "block_size", "_generator", "_block", "_next")
+
+    def __init__(self, seed=None, block_size=BLOCK_SIZE):
+        if seed is None:
+            seed = new_seed()
+        self.seed = seed
+        self.block_size = block_size
+        import numpy as np
+        self._generator = np.random.Generator(np.random.PCG64(seed))
+        self._block = []
+        self._next = 0
+
+    def spawn(self, n):
+        """n independent child streams, e.g. one per parallel worker"""
+        return [RandomStream(derive_seed(self.seed, i), self.block_size) for i in range(n)]
+
+    def random(self):
+        """Uniform float in [0, 1)"""
+        if self._next == len(self._block):
+            self._block = self._generator.random(self.block_size).tolist()
+            self._next = 0
+        u = self._block[self._next]
+        self._next += 1
+        return u
+
+    def take_block(self):
+        """
+        Hand the buffered uniforms (or a fresh block) to a compiled loop as a
+        NumPy array; the stream itself continues after them.
+        """
+        import numpy as np
+        if self._next < len(self._block):
+            values = np.array(self._block[self._next:], dtype=np.float64)
+        else:
+            values = self._generator.random(self.block_size)
+        self._block = []
+        self._next = 0
+        return values
+
+    def give_back(self, values):
+        """Undrawn uniforms from take_block; they are drawn next, in order"""
+        self._block = values.tolist()
+        self._next = 0
+
+    def _below(self, n):
+        # Uniform integer in [0, n); min() guards against rounding up to n
+        return min(int(self.random() * n), n - 1)
+
+    def randint(self, a, b):
+        """Uniform integer in [a, b], both included"""
+        return a + self._below(b - a + 1)
+
+    def choice(self, seq):
+        if not seq:
+            raise IndexError("Cannot choose from an empty sequence")
+        return seq[self._below(len(seq))]
+
+    def sample(self, population, k):
+        """k distinct elements, in selection order"""
+        pool = list(population)
+        n = len(pool)
+        if not 0 <= k <= n:
+            raise ValueError("Sample larger than population or is negative")
+        for i in range(k):
+            j = i + self._below(n - i)
+            pool[i], pool[j] = pool[j], pool[i]
+        return pool[:k]
+
+    def shuffle(self, x):
+        """Shuffle a list in place (Fisher-Yates)"""
+        for i in range(len(x) - 1, 0, -1):
+            j = self._below(i + 1)
+            x[i], x[j] = x[j], x[i]
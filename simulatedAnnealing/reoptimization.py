@@ -0,0 +1,436 @@
+import copy
+import heapq
+from solution import Solution
+from randomStream import RandomStream
+import simulatedAnnealing
+import simulatedAnnealingExtended
+
+# Short SA schedule for repairing a few pickers after a change
+REPAIR_PARAMETERS = {
+    "T0": 50,
+    "alpha": 0.9,
+    "max_iter_per_temp": 50,
+    "stagnation_threshold": 10,
+}
+# a new item is only priced into the pickers of items at the nearest locations ...
+NEAREST_LOCATIONS = 16
+# ... and into the pickers with the most time slack
+SLACK_CANDIDATES = 8
+
+
+def _is_extended(problem):
+    return hasattr(problem, "picker_categories")
+
+
+def _picker_terms(problem, plan, p):
+    """(time, penalty) of one picker, the per-picker part of evaluate_solution"""
+    time = 0
+    capacity_violation = 0
+    category_violation = 0
+    picker_id = plan.picker_ids[p]
+    for route in plan.routes(p):
+        if len(route) > problem.capacity:
+            capacity_violation += len(route) - problem.capacity
+        time += problem.calculate_route_time(route)
+        if _is_extended(problem):
+            category_violation += sum(not problem.can_picker_pick_item(picker_id, item) for item in route)
+    if _is_extended(problem):
+        return time, problem.picker_penalty(time, capacity_violation, category_violation)
+    return time, problem.picker_penalty(time, capacity_violation)
+
+
+class PlanState:
+    """
+    A picking plan kept between updates: the Solution, the time and penalty of
+    every picker and the missing and duplicate item counts of evaluate_solution.
+    Built once in O(instance size); update_plan then changes it in place and
+    re-evaluates only the pickers it touches, so an update costs in proportion
+    to the change. penalty equals evaluate_solution of the whole plan.
+    """
+
+    def __init__(self, problem, solution):
+        self.problem = problem
+        if isinstance(solution, Solution):
+            plan = solution.copy()
+        elif _is_extended(problem):
+            plan = Solution.from_dict(solution)
+        else:
+            plan = Solution.from_lists(solution)
+        self.plan = plan
+        # position of every item in problem.items, for O(1) removal
+        self.item_index = {item: i for i, item in enumerate(problem.items)}
+        # number of copies of every planned item, planned items per location and
+        # the length of the plan, for the missing and duplicate counts
+        self.copies = {}
+        self.items_at = {}
+        self.planned = 0
+        for item in plan.flat_items:
+            self._count(item, 1)
+        self.times = []
+        self.penalties = []
+        self.picker_penalty_total = 0
+        # lazy min-heaps of (time, picker) per picker category (None: base variant or no
+        # category); entries whose time is outdated are skipped
+        self._slack = {}
+        self._nearest = {}
+        for p in range(plan.num_pickers):
+            self.refresh(p)
+
+    @property
+    def missing(self):
+        return len(self.problem.items) - len(self.copies)
+
+    @property
+    def duplicates(self):
+        return self.planned - len(self.copies)
+
+    @property
+    def penalty(self):
+        return self.picker_penalty_total + max(0, self.missing) * 2000 + self.duplicates * 1500
+
+    def _count(self, item, delta):
+        copies = self.copies.get(item, 0) + delta
+        self.planned += delta
+        location = self.problem.product_locations[item]
+        if copies:
+            self.copies[item] = copies
+            self.items_at.setdefault(location, set()).add(item)
+        else:
+            del self.copies[item]
+            self.items_at[location].discard(item)
+
+    def set_routes(self, p, routes):
+        """Replace the routes of picker p and re-evaluate it"""
+        for route in self.plan.routes(p):
+            for item in route:
+                self._count(item, -1)
+        self.plan.set_picker_routes(p, routes)
+        for route in routes:
+            for item in route:
+                self._count(item, 1)
+        self.refresh(p)
+
+    def pickers_of(self, item):
+        """Positions of the pickers that hold a copy of item"""
+        position = self.plan.locate(item)
+        if position is None:
+            return []
+        if self.copies[item] == 1:
+            return [position[0]]
+        # a duplicated item (invalid plan): only one copy is indexed, look for the others
+        return [p for p in range(self.plan.num_pickers) if any(item in route for route in self.plan.routes(p))]
+
+    def refresh(self, p):
+        """Re-evaluate picker p after its routes changed"""
+        while len(self.times) <= p:
+            self.times.append(0)
+            self.penalties.append(0)
+        time, penalty = _picker_terms(self.problem, self.plan, p)
+        self.picker_penalty_total += penalty - self.penalties[p]
+        self.times[p] = time
+        self.penalties[p] = penalty
+        heapq.heappush(self._slack.setdefault(self._category(p), []), (time, p))
+
+    def _category(self, p):
+        problem = self.problem
+        if not _is_extended(problem) or not problem.picker_categories:
+            return None
+        return problem.picker_categories[self.plan.picker_ids[p]]
+
+    def add_item(self, item, location, category=None):
+        """Register a new item with the instance; it counts as missing until placed"""
+        problem = self.problem
+        if item >= len(problem.product_locations):
+            problem.product_locations.extend([None] * (item + 1 - len(problem.product_locations)))
+        problem.product_locations[item] = location
+        if _is_extended(problem) and problem.product_categories is not None:
+            if item >= len(problem.product_categories):
+                problem.product_categories.extend([None] * (item + 1 - len(problem.product_categories)))
+            problem.product_categories[item] = category
+        self.item_index[item] = len(problem.items)
+        problem.items.append(item)
+
+    def remove_item(self, item):
+        """Drop an item from problem.items (swapped with the last one); its copies must be out of the plan"""
+        items = self.problem.items
+        i = self.item_index.pop(item, None)
+        if i is None:
+            return
+        last = items.pop()
+        if i < len(items):
+            items[i] = last
+            self.item_index[last] = i
+
+    def nearest_locations(self, location):
+        """location and the NEAREST_LOCATIONS locations closest to it, cached per location"""
+        nearest = self._nearest.get(location)
+        if nearest is None:
+            row = self.problem.travel_times[location]
+            others = (other for other in range(len(row) - 1) if other != location)
+            nearest = [location] + heapq.nsmallest(NEAREST_LOCATIONS, others, key=row.__getitem__)
+            self._nearest[location] = nearest
+        return nearest
+
+    def slack_pickers(self, count=SLACK_CANDIDATES, item=None):
+        """The `count` pickers with the least time (most slack) that may collect item"""
+        problem = self.problem
+        category = None
+        if item is not None and _is_extended(problem) and problem.product_categories:
+            category = problem.product_categories[item]
+        # pickers without a category take any item, and an item without one goes to any picker
+        keys = list(self._slack) if category is None else [category, None]
+        found = []
+        for key in keys:
+            heap = self._slack.get(key, [])
+            taken = []
+            seen = set()
+            while heap and len(taken) < count:
+                time, p = heapq.heappop(heap)
+                if p not in seen and self.times[p] == time:
+                    seen.add(p)
+                    taken.append((time, p))
+            for entry in taken:
+                heapq.heappush(heap, entry)
+            found += taken
+        return [p for _, p in sorted(found)[:count]]
+
+    def candidate_pickers(self, item, location):
+        """Pickers worth pricing a new item at location into: near ones and under-loaded ones"""
+        plan = self.plan
+        candidates = []
+        for nearby in self.nearest_locations(location):
+            for other in self.items_at.get(nearby, ()):
+                position = plan.locate(other)
+                if position is not None and position[0] not in candidates:
+                    candidates.append(position[0])
+        for p in self.slack_pickers(item=item):
+            if p not in candidates:
+                candidates.append(p)
+        return candidates
+
+
+def _leg(problem, a, b):
+    # a and b are locations, -1 is the depot
+    return problem.travel_times[a][b]
+
+
+def _cheapest_insertion(problem, plan, p, item, picker_time):
+    """
+    Cheapest position for item in picker p as (extra_time, route, position);
+    route == route_count(p) means opening a new route. Every position is
+    priced in O(1) from the two legs it replaces.
+    """
+    location = problem.product_locations[item]
+    best = (_leg(problem, -1, location) + _leg(problem, location, -1), plan.route_count(p), 0)
+    for r, route in enumerate(plan.routes(p)):
+        if len(route) >= problem.capacity:
+            continue
+        stops = [-1] + [problem.product_locations[i] for i in route] + [-1]
+        for position in range(len(stops) - 1):
+            a, b = stops[position], stops[position + 1]
+            extra = _leg(problem, a, location) + _leg(problem, location, b) - _leg(problem, a, b)
+            if extra < best[0]:
+                best = (extra, r, position)
+    return best if picker_time + best[0] <= problem.max_time else None
+
+
+def _insert(state, p, item, r, position):
+    routes = [route.tolist() for route in state.plan.routes(p)]
+    if r == len(routes):
+        routes.append([item])
+    else:
+        routes[r].insert(position, item)
+    state.set_routes(p, routes)
+
+
+def _spare_picker(problem, used, items):
+    """Id of a picker outside `used` that may collect at least one of items, or None"""
+    if not _is_extended(problem):
+        # base variant: pickers are interchangeable and numbered 0..k-1
+        return len(used) if len(used) < problem.num_pickers else None
+    for picker_id in range(problem.num_pickers):
+        if picker_id not in used and any(problem.can_picker_pick_item(picker_id, item) for item in items):
+            return picker_id
+    return None
+
+
+def _local_search(problem, plan, affected, rng, sa_parameters, helpers=()):
+    """
+    Short SA on the affected pickers only. The subproblem holds just their
+    items, so the cost depends on the size of the change, not of the instance.
+    While the part stays invalid the pickers in helpers (positions of valid
+    pickers with slack) join it one at a time, then spare pickers.
+    Returns (routes per picker id, visited).
+    """
+    extended = _is_extended(problem)
+    module = simulatedAnnealingExtended if extended else simulatedAnnealing
+
+    picker_ids = [plan.picker_ids[p] for p in affected]
+    sub_plan = Solution([[route.tolist() for route in plan.routes(p)] for p in affected],
+                        picker_ids if extended else None)
+    sub_problem = copy.copy(problem)
+    sub_problem.items = sub_plan.flat_items.tolist()
+
+    visited = 0
+    penalty, is_valid = sub_problem.evaluate_solution(sub_plan, sub_plan.num_pickers)
+    reserved = set(plan.picker_ids)
+    helpers = [p for p in helpers if p not in affected]
+    while not is_valid:
+        if extended:
+            best, best_valid, best_penalty, sub_visited, _ = module.simulated_annealing_fixed_pickers(
+                sub_problem, sub_plan.num_pickers, list(sub_plan.picker_ids), rng=rng,
+                initial_solution=sub_plan, **sa_parameters)
+        else:
+            best, best_valid, best_penalty, sub_visited = module.simulated_annealing_fixed_pickers(
+                sub_problem, sub_plan.num_pickers, rng=rng, initial_solution=sub_plan, **sa_parameters)
+        visited += sub_visited
+        if best_penalty < penalty:
+            sub_plan, penalty, is_valid = best, best_penalty, best_valid
+        if is_valid:
+            break
+
+        sub_plan = sub_plan.copy()
+        if helpers:
+            # Still invalid: share the load with a picker of the plan that has time left
+            p = helpers.pop(0)
+            sub_plan.set_picker_routes(sub_plan.add_picker(plan.picker_ids[p]),
+                                       [route.tolist() for route in plan.routes(p)])
+            sub_problem.items = sub_plan.flat_items.tolist()
+            penalty, is_valid = sub_problem.evaluate_solution(sub_plan, sub_plan.num_pickers)
+            picker_ids.append(plan.picker_ids[p])
+            continue
+
+        # Still invalid: bring in a picker that is not used anywhere in the plan
+        spare = _spare_picker(problem, reserved, sub_problem.items)
+        if spare is None:
+            break
+        reserved.add(spare)
+        sub_plan.add_picker(spare)
+        picker_ids.append(spare)
+
+    return dict(zip(picker_ids, (
+        [route.tolist() for route in sub_plan.routes(i)] for i in range(sub_plan.num_pickers)))), visited
+
+
+def update_plan(problem, solution, added_items=None, cancelled_items=None, item_categories=None,
+                logging=False, seed=None, **sa_parameters):
+    """
+    Update an existing picking plan after items were added or cancelled,
+    without solving the instance again.
+
+    problem         OrderPickingProblem of either variant; its items (and the
+                    locations/categories of new items) are updated in place
+    solution        current plan: a PlanState, updated in place and returned as
+                    the solution, or the form returned by iterative_simulated_annealing
+                    (list of routes per picker, or dict picker_id -> routes),
+                    which costs one pass over the instance to set up and return
+    added_items     {item: location} of new items
+    cancelled_items items to drop from the plan
+    item_categories {item: category} of new items (Extended variant)
+
+    Cancelled items are removed where they are. A new item goes to the
+    cheapest feasible position among the pickers of nearby items and the
+    pickers with the most slack (or a spare picker when none fits), and a
+    short SA repairs only the pickers that became invalid. Only those pickers
+    are evaluated again. A new item that no picker may collect stays unplaced
+    and the plan is invalid.
+    Returns (visited_nodes, (num_pickers, solution, is_valid), affected_pickers).
+    """
+    added_items = added_items or {}
+    cancelled_items = set(cancelled_items or [])
+    extended = _is_extended(problem)
+    parameters = {**REPAIR_PARAMETERS, **sa_parameters}
+    rng = RandomStream(seed)
+
+    keep_state = isinstance(solution, PlanState)
+    state = solution if keep_state else PlanState(problem, solution)
+    plan = state.plan
+
+    touched = set()
+
+    # ---- remove cancelled items (every copy), one rewrite per picker ----
+    removals = {}
+    for item in cancelled_items:
+        for p in state.pickers_of(item):
+            removals.setdefault(p, set()).add(item)
+    for p, items in removals.items():
+        routes = [[i for i in route if i not in items] for route in plan.routes(p)]
+        state.set_routes(p, [route for route in routes if route])
+        touched.add(p)
+    for item in cancelled_items:
+        state.remove_item(item)
+
+    def cheapest(item, pickers):
+        best = None
+        for p in pickers:
+            if extended and not problem.can_picker_pick_item(plan.picker_ids[p], item):
+                continue
+            insertion = _cheapest_insertion(problem, plan, p, item, state.times[p])
+            if insertion is not None and (best is None or insertion[0] < best[1][0]):
+                best = (p, insertion)
+        return best
+
+    # ---- cheapest feasible insertion of new items ----
+    unplaced = []
+    for item, location in added_items.items():
+        state.add_item(item, location, (item_categories or {}).get(item))
+        best = cheapest(item, state.candidate_pickers(item, location))
+        if best is None:
+            # none of the candidates has room: try every picker with time left before opening one
+            best = cheapest(item, (p for p in range(plan.num_pickers) if state.times[p] < problem.max_time))
+
+        if best is None:
+            spare = _spare_picker(problem, set(plan.picker_ids), [item])
+            if spare is not None:
+                p = plan.add_picker(spare)
+                state.refresh(p)
+                best = (p, _cheapest_insertion(problem, plan, p, item, 0)
+                           or (problem.calculate_route_time([item]), 0, 0))
+            else:
+                # nowhere feasible: park it on the picker with the most slack, the SA repairs it
+                slack = state.slack_pickers(1, item)
+                if not slack:
+                    # no picker of the plan may collect it and no spare picker is left: it stays
+                    # missing, so the plan is reported invalid
+                    unplaced.append(item)
+                    continue
+                p = slack[0]
+                best = (p, (problem.calculate_route_time([item]), plan.route_count(p), 0))
+
+        p, (extra, r, position) = best
+        _insert(state, p, item, r, position)
+        touched.add(p)
+
+    # ---- repair the pickers that broke, leave the rest as they are ----
+    affected = sorted(p for p in touched if state.penalties[p] > 0)
+    visited = 0
+    if affected:
+        routes_by_picker, visited = _local_search(problem, plan, affected, rng, parameters,
+                                                  state.slack_pickers())
+        position_of = {picker_id: p for p, picker_id in enumerate(plan.picker_ids)}
+        for picker_id, routes in routes_by_picker.items():
+            if picker_id not in position_of:
+                position_of[picker_id] = plan.add_picker(picker_id)
+            # an invalid repair may drop or repeat items; the copy counts of the state follow
+            state.set_routes(position_of[picker_id], routes)
+    penalty = state.penalty
+    is_valid = penalty == 0
+    num_pickers = sum(plan.picker_size(p) > 0 for p in range(plan.num_pickers))
+
+    if logging:
+        status = "✓" if is_valid else "⚠"
+        print(f"{status} Plan updated: +{len(added_items)} / -{len(cancelled_items)} items, "
+              f"{len(affected)} picker{'s' if len(affected) != 1 else ''} re-optimized, "
+              f"{num_pickers} pickers in use (penalty: {penalty:.0f})")
+        if unplaced:
+            print(f"⚠ No picker may collect item{'s' if len(unplaced) != 1 else ''} "
+                  f"{', '.join(map(str, unplaced))}: left unplaced")
+
+    if keep_state:
+        result = state
+    elif extended:
+        # pickers left without items are released
+        result = {picker_id: routes for picker_id, routes in plan.to_dict().items() if routes}
+    else:
+        result = plan.to_lists()
+    return visited, (num_pickers, result, is_valid), [plan.picker_ids[p] for p in affected]
@@ -0,0 +1,142 @@
+import heapq
+
+
+class SlackIndex:
+    """
+    Time slack (maxTimePerRound - picker time) of every picker and the
+    over-capacity routes of a Solution, kept up to date per changed picker.
+
+    Two lazy heaps give the most overloaded picker and the picker with the
+    most slack in O(log P); entries whose slack is outdated are skipped.
+    """
+
+    def __init__(self, problem, solution):
+        self.problem = problem
+        self.slack = []
+        self.over_capacity = {}  # picker -> local indices of routes above capacity
+        self._low = []  # (slack, picker): most overloaded first
+        self._high = []  # (-slack, picker): most slack first
+        for p in range(solution.num_pickers):
+            self._refresh(solution, p)
+        solution.changed.clear()
+
+    def update(self, solution):
+        """Refresh the pickers changed in solution since the last update"""
+        for p in solution.changed:
+            self._refresh(solution, p)
+        solution.changed.clear()
+        if len(self._low) > 4 * len(self.slack) + 64:
+            self._rebuild()
+
+    def _refresh(self, solution, p):
+        problem = self.problem
+        routes = solution.routes(p)
+        slack = problem.max_time - sum(problem.calculate_route_time(route) for route in routes)
+        while p >= len(self.slack):
+            self.slack.append(None)
+        self.slack[p] = slack
+        heapq.heappush(self._low, (slack, p))
+        heapq.heappush(self._high, (-slack, p))
+
+        overfull = [r for r, route in enumerate(routes) if len(route) > problem.capacity]
+        if overfull:
+            self.over_capacity[p] = overfull
+        else:
+            self.over_capacity.pop(p, None)
+
+    def _rebuild(self):
+        self._low = [(slack, p) for p, slack in enumerate(self.slack)]
+        self._high = [(-slack, p) for p, slack in enumerate(self.slack)]
+        heapq.heapify(self._low)
+        heapq.heapify(self._high)
+
+    def most_overloaded(self):
+        """Picker over maxTimePerRound with the least slack, or None"""
+        heap = self._low
+        while heap and heap[0][0] != self.slack[heap[0][1]]:
+            heapq.heappop(heap)
+        if heap and heap[0][0] < 0:
+            return heap[0][1]
+        return None
+
+    def most_slack(self, exclude, accepts=None):
+        """Picker other than `exclude` with the most slack (that accepts() allows), or None"""
+        heap = self._high
+        while heap and -heap[0][0] != self.slack[heap[0][1]]:
+            heapq.heappop(heap)
+        for neg_slack, p in heapq.nsmallest(3, heap):
+            if p != exclude and -neg_slack == self.slack[p] and (accepts is None or accepts(p)):
+                return p
+        # top entries did not qualify: scan all pickers
+        candidates = [p for p in range(len(self.slack))
+                      if p != exclude and (accepts is None or accepts(p))]
+        return max(candidates, key=lambda p: self.slack[p]) if candidates else None
+
+
+def _allowed(problem, solution, p, items):
+    if not hasattr(problem, "can_picker_pick_item"):
+        return True
+    picker_id = solution.picker_ids[p]
+    return all(problem.can_picker_pick_item(picker_id, item) for item in items)
+
+
+def repair_time(neighbor, problem, slack, rng):
+    """
+    Move work from the most overloaded picker to the picker with the most
+    slack: a whole route when it fits in that slack, otherwise one item,
+    added to the least loaded route with room (or as a new route).
+    Returns False when no picker exceeds maxTimePerRound.
+    """
+    source = slack.most_overloaded()
+    if source is None:
+        return False
+    routes = [route.tolist() for route in neighbor.routes(source)]
+    r = rng.choice([r for r, route in enumerate(routes) if route])
+    route = routes[r]
+
+    target = slack.most_slack(source, lambda p: _allowed(problem, neighbor, p, route))
+    if target is not None and problem.calculate_route_time(route) <= slack.slack[target]:
+        moved = [route]
+        del routes[r]
+    else:
+        item = route.pop(rng.randint(0, len(route) - 1))
+        target = slack.most_slack(source, lambda p: _allowed(problem, neighbor, p, [item]))
+        if target is None:
+            return False
+        moved = None
+
+    target_routes = [route.tolist() for route in neighbor.routes(target)]
+    if moved is not None:
+        target_routes.extend(moved)
+    else:
+        open_routes = [t for t, route in enumerate(target_routes) if len(route) < problem.capacity]
+        if open_routes:
+            target_routes[min(open_routes, key=lambda t: len(target_routes[t]))].append(item)
+        else:
+            target_routes.append([item])
+
+    neighbor.set_picker_routes(source, [route for route in routes if route])
+    neighbor.set_picker_routes(target, target_routes)
+    return True
+
+
+def repair_capacity(neighbor, problem, slack, rng):
+    """
+    Split an over-capacity route into full routes of `capacity` items.
+    Returns False when every route respects the capacity.
+    """
+    if not slack.over_capacity:
+        return False
+    p = rng.choice(list(slack.over_capacity))
+    r = rng.choice(slack.over_capacity[p])
+    routes = [route.tolist() for route in neighbor.routes(p)]
+    route = routes[r]
+    routes[r:r + 1] = [route[i:i + problem.capacity] for i in range(0, len(route), problem.capacity)]
+    neighbor.set_picker_routes(p, routes)
+    return True
+
+
+REPAIR_OPERATORS = {
+    "repair_time": repair_time,
+    "repair_capacity": repair_capacity,
+}
@@ -0,0 +1,285 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+RESULTS_DB = "results/results.db"
+
+# Columns stored as real columns; everything else in an entry goes to `extra`
+ENTRY_COLUMNS = ["id", "type", "param_value", "solver", "seed",
+                 "runtime", "visited_nodes", "num_pickers", "is_valid"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at  TEXT NOT NULL,
+    variant     TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    source      TEXT UNIQUE
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id        INTEGER NOT NULL REFERENCES runs(run_id),
+    instance_id   TEXT,
+    type          TEXT,
+    param_value   TEXT,
+    solver        TEXT,
+    parameters    TEXT,
+    seed          INTEGER,
+    runtime       INTEGER,
+    visited_nodes INTEGER,
+    num_pickers   INTEGER,
+    is_valid      INTEGER,
+    extra         TEXT
+);
+CREATE TABLE IF NOT EXISTS result_cache (
+    instance_hash TEXT NOT NULL,
+    solver        TEXT NOT NULL,
+    parameters    TEXT NOT NULL,
+    code          TEXT NOT NULL,
+    seed          INTEGER,
+    created_at    TEXT NOT NULL,
+    entry         TEXT NOT NULL,
+    PRIMARY KEY (instance_hash, solver, parameters, code, seed)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_variant ON runs(variant, kind, started_at);
+CREATE INDEX IF NOT EXISTS idx_results_run ON results(run_id);
+CREATE INDEX IF NOT EXISTS idx_results_instance ON results(instance_id);
+CREATE INDEX IF NOT EXISTS idx_results_type ON results(type, param_value);
+CREATE INDEX IF NOT EXISTS idx_results_param_value ON results(param_value);
+CREATE INDEX IF NOT EXISTS idx_results_solver ON results(solver);
+CREATE INDEX IF NOT EXISTS idx_results_parameters ON results(parameters);
+"""
+
+
+def extract_datetime(filename: str) -> datetime | None:
+    """
+    Extracts a datetime object from a filename like:
+    'results_2025-12-07_12-26-37.json'
+    """
+    match = re.search(r"(\d{4}-\d{2}-\d{2})_(\d{2}-\d{2}-\d{2})", filename)
+    if not match:
+        return None
+
+    date_part, time_part = match.groups()
+    timestamp = f"{date_part} {time_part.replace('-', ':')}"
+    return datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+
+
+def canonical_parameters(parameters):
+    """Stable JSON text for a parameter dict, so equal settings compare equal in SQL"""
+    return json.dumps(parameters or {}, sort_keys=True)
+
+
+def file_digest(paths):
+    """SHA-256 over the contents of files: an instance hash or a code fingerprint"""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class ResultsStore:
+    """
+    Indexed SQLite store for solver results.
+
+    Every invocation of a run script is one row in `runs`; its per-instance
+    entries (same fields as the JSON results files) go to `results`.
+    Both variants share one database and are told apart by `variant`.
+    """
+
+    def __init__(self, path=RESULTS_DB):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    # ---------------------------
+    # Writing
+    # ---------------------------
+
+    def start_run(self, variant, kind="batch", started_at=None, source=None):
+        """
+        Register a run and return its run_id. `source` is the JSON results file
+        written for the same run, so importing it later does not duplicate the run.
+        """
+        if source is not None:
+            source = os.path.normpath(source)
+        if started_at is None:
+            started_at = datetime.now()
+        cursor = self.connection.execute(
+            "INSERT INTO runs (started_at, variant, kind, source) VALUES (?, ?, ?, ?)",
+            (started_at.strftime("%Y-%m-%d %H:%M:%S"), variant, kind, source),
+        )
+        self.connection.commit()
+        return cursor.lastrowid
+
+    def add_results(self, run_id, entries, parameters=None):
+        """Insert a batch of result entries in one transaction"""
+        parameters_text = canonical_parameters(parameters)
+        rows = []
+        for entry in entries:
+            extra = {k: v for k, v in entry.items() if k not in ENTRY_COLUMNS}
+            rows.append((
+                run_id, entry.get("id"), entry.get("type"), entry.get("param_value"),
+                entry.get("solver"), parameters_text, entry.get("seed"),
+                entry.get("runtime"), entry.get("visited_nodes"), entry.get("num_pickers"),
+                None if entry.get("is_valid") is None else int(entry["is_valid"]),
+                json.dumps(extra) if extra else None,
+            ))
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO results (run_id, instance_id, type, param_value, solver, parameters, "
+                "seed, runtime, visited_nodes, num_pickers, is_valid, extra) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def import_json(self, path, variant, kind="batch"):
+        """Import one legacy results JSON file; files already imported are skipped"""
+        source = os.path.normpath(path)
+        if self.connection.execute("SELECT 1 FROM runs WHERE source = ?", (source,)).fetchone():
+            return None
+        with open(path, "r") as f:
+            entries = [entry for entry in json.load(f) if isinstance(entry, dict)]
+        if not entries:
+            # e.g. older files holding plain runtimes: remember them so they are not read again
+            kind = "other"
+        started_at = extract_datetime(os.path.basename(path)) or datetime.now()
+        run_id = self.start_run(variant, kind, started_at, source)
+        self.add_results(run_id, entries)
+        return run_id
+
+    def import_legacy_results(self, directory, variant):
+        """Import every timestamped results JSON file of a results directory"""
+        imported = []
+        for file in sorted(os.listdir(directory)):
+            if not (file.startswith("results_") and file.endswith(".json")):
+                continue
+            if extract_datetime(file) is None:
+                continue
+            kind = "individual" if "individual_instance" in file else "batch"
+            run_id = self.import_json(os.path.join(directory, file), variant, kind)
+            if run_id is not None:
+                imported.append(run_id)
+        return imported
+
+    def cache_entry(self, instance_hash, solver, parameters, code, seed, entry):
+        """Remember the result entry of one solve for cached_entry"""
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO result_cache "
+                "(instance_hash, solver, parameters, code, seed, created_at, entry) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (instance_hash, solver, canonical_parameters(parameters), code, seed,
+                 datetime.now().strftime("%Y-%m-%d %H:%M:%S"), json.dumps(entry)),
+            )
+
+    # ---------------------------
+    # Reading
+    # ---------------------------
+
+    def cached_entry(self, instance_hash, solver, parameters, code, seed=None):
+        """
+        Entry of an earlier solve of the same instance contents with the same
+        solver, parameters and solver code, or None. With seed=None any seed
+        matches (the most recent entry is returned).
+        """
+        sql = ("SELECT entry FROM result_cache WHERE instance_hash = ? AND solver = ? "
+               "AND parameters = ? AND code = ?")
+        args = [instance_hash, solver, canonical_parameters(parameters), code]
+        if seed is not None:
+            sql += " AND seed = ?"
+            args.append(seed)
+        row = self.connection.execute(sql + " ORDER BY created_at DESC LIMIT 1", args).fetchone()
+        return json.loads(row["entry"]) if row else None
+
+    def latest_run(self, variant, kind="batch"):
+        """run_id of the most recent run of a variant, or None"""
+        row = self.connection.execute(
+            "SELECT run_id FROM runs WHERE variant = ? AND kind = ? "
+            "ORDER BY started_at DESC, run_id DESC LIMIT 1",
+            (variant, kind),
+        ).fetchone()
+        return row["run_id"] if row else None
+
+    def latest_solver_runs(self, variant, kind="batch"):
+        """{solver: run_id of the most recent run with results of that solver}"""
+        rows = self.connection.execute(
+            "SELECT results.solver AS solver, MAX(runs.run_id) AS run_id FROM results "
+            "JOIN runs ON runs.run_id = results.run_id "
+            "WHERE runs.variant = ? AND runs.kind = ? AND results.solver IS NOT NULL "
+            "GROUP BY results.solver",
+            (variant, kind),
+        )
+        return {row["solver"]: row["run_id"] for row in rows}
+
+    def runs(self, variant=None):
+        sql = "SELECT * FROM runs"
+        args = ()
+        if variant is not None:
+            sql += " WHERE variant = ?"
+            args = (variant,)
+        return [dict(row) for row in self.connection.execute(sql + " ORDER BY started_at", args)]
+
+    def load_run(self, run_id):
+        """Entries of one run in the JSON results layout"""
+        rows = self.connection.execute("SELECT * FROM results WHERE run_id = ?", (run_id,))
+        return [self._to_entry(row) for row in rows]
+
+    def aggregate(self, metric, run_ids=None, solver=None, parameters=None):
+        """
+        Mean/min/max/count of a metric per (run, type, param_value), computed in SQL.
+        Use this to compare runs or follow a metric over the whole history.
+        """
+        if metric not in ("runtime", "visited_nodes", "num_pickers", "is_valid"):
+            raise ValueError(f"Unknown metric: {metric}")
+        where, args = [], []
+        if run_ids is not None:
+            where.append(f"run_id IN ({', '.join('?' * len(run_ids))})")
+            args.extend(run_ids)
+        if solver is not None:
+            where.append("solver = ?")
+            args.append(solver)
+        if parameters is not None:
+            where.append("parameters = ?")
+            args.append(canonical_parameters(parameters))
+        sql = (f"SELECT run_id, type, param_value, AVG({metric}) AS mean, MIN({metric}) AS min, "
+               f"MAX({metric}) AS max, COUNT(*) AS count FROM results")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " GROUP BY run_id, type, param_value ORDER BY run_id, type, param_value"
+        return [dict(row) for row in self.connection.execute(sql, args)]
+
+    @staticmethod
+    def _to_entry(row):
+        entry = {
+            "visited_nodes": row["visited_nodes"],
+            "runtime": row["runtime"],
+            "num_pickers": row["num_pickers"],
+            "is_valid": None if row["is_valid"] is None else bool(row["is_valid"]),
+            "id": row["instance_id"],
+            "type": row["type"],
+            "param_value": row["param_value"],
+        }
+        if row["seed"] is not None:
+            entry["seed"] = row["seed"]
+        if row["solver"] is not None:
+            entry["solver"] = row["solver"]
+        if row["extra"]:
+            entry.update(json.loads(row["extra"]))
+        return entry
@@ -1,65 +1,249 @@
 import os
-from simulatedAnnealing import *
+import hashlib
+from simulatedAnnealing import OrderPickingProblem, iterative_simulated_annealing
 import json
 import time
 from datetime import datetime
 import pytz
+import sys
+from randomStream import new_seed, derive_seed
+from resultsStore import ResultsStore, file_digest
+from lowerBounds import bound_fields
+from exactSolver import can_solve_exactly, exact_minimum_pickers
 
 FOLDER = "instances"
 
-results = []
-counter = 0
-for file in os.listdir(FOLDER):
-    if file.endswith(".json"):
-        filepath = os.path.join(FOLDER, file)
-        # parse instance and run model
-        instanceID = file.split("-")[1].split("_")[0]
-        instanceType = file.split("-")[1].split("_")[1]
-        instanceValue = file.split("-")[2].split(".")[0]
-
-        with open(filepath, "r") as f:
-            instance = json.load(f)
-        
-        problem = OrderPickingProblem(instance)
-
-        start_time = time.time()
-        # print("Starting Iterative Simulated Annealing...\n")
-        visited, solution, sa_results = iterative_simulated_annealing(
-            problem, 
-            T0=100, 
-            alpha=0.95, 
-            max_iter_per_temp=100,
-            stagnation_threshold=20
-        )
-        end_time = time.time()
-        run_time = end_time - start_time
-        run_time_ms = int(run_time * 1000)
-        # print(f"Total nodes visited: {visited}")
-        # print(f"Number of pickers used: {solution[0]}")
-        # print(f"Solution is valid: {solution[2]}")
-
-        instance_results = {
-            "visited_nodes": visited,
-            "runtime": run_time_ms,
-            "num_pickers": solution[0],
-            "is_valid": solution[2]
-        }
-        instance_results["id"] = instanceID
-        instance_results["type"] = instanceType
-        instance_results["param_value"] = instanceValue
+SA_PARAMETERS = {
+    "T0": 100,
+    "alpha": 0.95,
+    "max_iter_per_temp": 100,
+    "stagnation_threshold": 20,
+}
+# compiled SA loop when Numba is installed; same results as the Python loop
+USE_JIT = True
+# search engines for the instances the exact solver does not take (--engine=<name>)
+ENGINES = ["simulatedAnnealing", "tabuSearch", "largeNeighborhoodSearch"]
+# entries are written to the results store in batches of this size
+STORE_BATCH_SIZE = 20
+# with --batch, instances up to this size are annealed together in one vectorized batch
+# (SA engine only); their entries are a series of their own, "batchSimulatedAnnealing"
+BATCH_MAX_ITEMS = 55
+# derive_seed key of the batch stream (instance ids start at 1)
+BATCH_SEED_KEY = 0
+# changes to these files invalidate cached results
+SOLVER_FILES = ["simulatedAnnealing.py", "solution.py", "randomStream.py", "repairOperators.py",
+                "annealingSchedule.py", "lowerBounds.py", "exactSolver.py", "batchAnnealing.py",
+                "jitAnnealing.py", "stateHashing.py", "tabuSearch.py", "largeNeighborhoodSearch.py"]
+
+
+def engine_parameters(engine):
+    """Parameters of an engine; tabuSearch and largeNeighborhoodSearch are only imported when chosen"""
+    if engine == "tabuSearch":
+        from tabuSearch import TABU_PARAMETERS
+        return TABU_PARAMETERS
+    if engine == "largeNeighborhoodSearch":
+        from largeNeighborhoodSearch import LNS_PARAMETERS
+        return LNS_PARAMETERS
+    return SA_PARAMETERS
+
+
+def main(argv=None):
+    """python runAllInstances.py [seed] [--engine=<name>] [--no-cache] [--telemetry] [--batch]"""
+    argv = sys.argv[1:] if argv is None else argv
+    # optional run seed; every instance gets its own stream derived from it and its id
+    args = [arg for arg in argv if not arg.startswith("--")]
+    run_seed = int(args[0]) if args else new_seed()
+    # reuse the results of earlier solves of unchanged instances with the same solver,
+    # parameters, seed (any seed when no run seed is given) and solver code
+    use_cache = "--no-cache" not in argv
+    # JSON Lines progress events in results/telemetry_<timestamp>.jsonl, read by telemetry.py
+    use_telemetry = "--telemetry" in argv
+    # opt-in: the batched SA is a different algorithm (reduced move set, runtime shared by the batch)
+    use_batch = "--batch" in argv
+    engine = next((arg.split("=", 1)[1] for arg in argv if arg.startswith("--engine=")), "simulatedAnnealing")
+    if engine not in ENGINES:
+        sys.exit(f"Unknown engine {engine!r}, choose from {', '.join(ENGINES)}")
+    parameters = engine_parameters(engine)
+    code_fingerprint = file_digest(SOLVER_FILES)
+
+    brussels_tz = pytz.timezone("Europe/Brussels")
+    current_time = datetime.now(brussels_tz)
+    timestamp = current_time.strftime("%Y-%m-%d_%H-%M-%S")
+
+    store = ResultsStore()
+    run_id = store.start_run("original", "batch", current_time, source=f"results/results_{timestamp}.json")
+    pending = []
+
+    results = []
+
+    telemetry = None
+    if use_telemetry:
+        from telemetry import Telemetry
+        telemetry = Telemetry(f"results/telemetry_{timestamp}.jsonl")
+        telemetry.run_start("original", engine, sum(file.endswith(".json") for file in os.listdir(FOLDER)))
+
+    def cached(instance_hash, solver, seed):
+        """Cached entry of this instance and solver, or None"""
+        if not use_cache:
+            return None
+        return store.cached_entry(instance_hash, solver, parameters, code_fingerprint,
+                                  seed if args else None)
+
+    def record(instance_results, file, instance_hash=None):
+        nonlocal pending
+        if instance_hash is not None:
+            store.cache_entry(instance_hash, instance_results["solver"], parameters, code_fingerprint,
+                              instance_results["seed"], instance_results)
         results.append(instance_results)
+        pending.append(instance_results)
+        if telemetry is not None:
+            telemetry.instance_end(file, instance_results)
+        if len(pending) >= STORE_BATCH_SIZE:
+            store.add_results(run_id, pending, parameters)
+            pending = []
         print(f"Results for {file}: {instance_results}")
-        # time.sleep(2)
 
-        counter += 1
-        # if counter == 10:
-            # break  # Remove this break to run on all instances
+    batch = []
+    batch_seed = derive_seed(run_seed, BATCH_SEED_KEY)
+    counter = 0
+    for file in os.listdir(FOLDER):
+        if file.endswith(".json"):
+            filepath = os.path.join(FOLDER, file)
+            # parse instance and run model
+            instanceID = file.split("-")[1].split("_")[0]
+            instanceType = file.split("-")[1].split("_")[1]
+            instanceValue = file.split("-")[2].split(".")[0]
+
+            with open(filepath, "r") as f:
+                instance = json.load(f)
+
+            problem = OrderPickingProblem(instance)
+            seed = derive_seed(run_seed, instanceID)
+
+            if can_solve_exactly(problem):
+                # small instance: exact engine proves the minimum in milliseconds
+                solver = "exact"
+            elif use_batch and engine == "simulatedAnnealing" and len(problem.items) <= BATCH_MAX_ITEMS:
+                solver = "batchSimulatedAnnealing"
+                seed = batch_seed
+            else:
+                solver = engine
+
+            instance_hash = file_digest([filepath])
+            if solver == "batchSimulatedAnnealing":
+                # solved (or looked up in the cache) after the loop, together with the other small instances
+                batch.append((file, problem, instanceID, instanceType, instanceValue, instance_hash))
+                continue
+
+            entry = cached(instance_hash, solver, seed)
+            if entry is not None:
+                entry.update({"id": instanceID, "type": instanceType, "param_value": instanceValue, "cached": True})
+                record(entry, file)
+                continue
+
+            progress = step_progress = None
+            if telemetry is not None:
+                telemetry.instance_start(file, len(problem.items), solver)
+                progress, step_progress = telemetry.picker_count, telemetry.temperature_step
+
+            start_time = time.time()
+            # print("Starting Iterative Simulated Annealing...\n")
+            if solver == "exact":
+                visited, solution, sa_results = exact_minimum_pickers(problem)
+            elif solver == "tabuSearch":
+                from tabuSearch import iterative_tabu_search, TABU_PARAMETERS
+                visited, solution, sa_results = iterative_tabu_search(problem, **TABU_PARAMETERS, seed=seed,
+                                                                      progress=progress)
+            elif solver == "largeNeighborhoodSearch":
+                from largeNeighborhoodSearch import iterative_lns, LNS_PARAMETERS
+                visited, solution, sa_results = iterative_lns(problem, **LNS_PARAMETERS, seed=seed,
+                                                              progress=progress)
+            else:
+                visited, solution, sa_results = iterative_simulated_annealing(
+                    problem,
+                    **SA_PARAMETERS,
+                    seed=seed,
+                    progress=progress,
+                    step_progress=step_progress,
+                    jit=USE_JIT
+                )
+            end_time = time.time()
+            run_time = end_time - start_time
+            run_time_ms = int(run_time * 1000)
+            # print(f"Total nodes visited: {visited}")
+            # print(f"Number of pickers used: {solution[0]}")
+            # print(f"Solution is valid: {solution[2]}")
+
+            instance_results = {
+                "visited_nodes": visited,
+                "runtime": run_time_ms,
+                "num_pickers": solution[0],
+                "is_valid": solution[2],
+                "seed": seed,
+                "solver": solver
+            }
+            instance_results.update(bound_fields(problem, solution, exact=solver == "exact"))
+            instance_results["id"] = instanceID
+            instance_results["type"] = instanceType
+            instance_results["param_value"] = instanceValue
+            record(instance_results, file, instance_hash)
+            # time.sleep(2)
+
+            counter += 1
+            # if counter == 10:
+                # break  # Remove this break to run on all instances
+
+    if batch:
+        # A batched result depends on every instance of the batch, so it is cached
+        # under the instance hash combined with the hashes of the whole batch: a
+        # change to any small instance solves the full batch again, as a full run would
+        batch.sort(key=lambda member: member[0])
+        batch_hash = hashlib.sha256("".join(member[5] for member in batch).encode()).hexdigest()
+        batch_keys = [hashlib.sha256((member[5] + batch_hash).encode()).hexdigest() for member in batch]
+        entries = [cached(key, "batchSimulatedAnnealing", batch_seed) for key in batch_keys]
+        if all(entry is not None for entry in entries):
+            for (file, _, instanceID, instanceType, instanceValue, _), entry in zip(batch, entries):
+                entry.update({"id": instanceID, "type": instanceType, "param_value": instanceValue, "cached": True})
+                record(entry, file)
+        else:
+            # numpy is only loaded when there is a batch to solve
+            from batchAnnealing import batch_simulated_annealing
+            if telemetry is not None:
+                telemetry.emit("batch_start", instances=len(batch))
+            start_time = time.time()
+            batch_results = batch_simulated_annealing([problem for _, problem, *_ in batch], **SA_PARAMETERS,
+                                                      seed=batch_seed)
+            batch_time_ms = int((time.time() - start_time) * 1000)
+            for (file, problem, instanceID, instanceType, instanceValue, _), key, (visited, solution, sa_results) \
+                    in zip(batch, batch_keys, batch_results):
+                # seed and runtime belong to the whole batch: runtime is its wall time shared
+                # equally, batch_runtime the wall time itself
+                record({
+                    "visited_nodes": visited,
+                    "runtime": batch_time_ms // len(batch),
+                    "num_pickers": solution[0],
+                    "is_valid": solution[2],
+                    "seed": batch_seed,
+                    "solver": "batchSimulatedAnnealing",
+                    "batch_size": len(batch),
+                    "batch_runtime": batch_time_ms,
+                    "id": instanceID,
+                    "type": instanceType,
+                    "param_value": instanceValue,
+                    **bound_fields(problem, solution),
+                }, file, key)
+
+    store.add_results(run_id, pending, parameters)
+    store.close()
+    if telemetry is not None:
+        telemetry.run_end()
+        telemetry.close()
+
+    with open(f"results/results_{timestamp}.json", "w") as out:
+        json.dump(results, out, indent=4)
+
+    print(f"\nSaved → results/results_{timestamp}.json")
 
-# brussels timezone
-brussels_tz = pytz.timezone("Europe/Brussels")
-current_time = datetime.now(brussels_tz)
-timestamp = current_time.strftime("%Y-%m-%d_%H-%M-%S")
-with open(f"results/results_{timestamp}.json", "w") as out:
-    json.dump(results, out, indent=4)
 
-print(f"\nSaved → results/results_{timestamp}.json")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
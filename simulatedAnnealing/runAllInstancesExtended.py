@@ -1,65 +1,177 @@
 import os
-from simulatedAnnealingExtended import *
+from simulatedAnnealingExtended import OrderPickingProblem, iterative_simulated_annealing
 import json
 import time
 from datetime import datetime
 import pytz
+import sys
+from randomStream import new_seed, derive_seed
+from resultsStore import ResultsStore, file_digest
+from lowerBounds import bound_fields
+from exactSolver import can_solve_exactly, exact_minimum_pickers_by_category
 
 FOLDER = "instancesExtended"
 
-results = []
-counter = 0
-for file in os.listdir(FOLDER):
-    if file.endswith(".json"):
-        filepath = os.path.join(FOLDER, file)
-        # parse instance and run model
-        instanceID = file.split("-")[1].split("_")[0]
-        instanceType = file.split("-")[1].split("_")[1]
-        instanceValue = file.split("-")[2].split(".")[0]
-
-        with open(filepath, "r") as f:
-            instance = json.load(f)
-        
-        problem = OrderPickingProblem(instance)
-
-        start_time = time.time()
-        # print("Starting Iterative Simulated Annealing...\n")
-        visited, solution, sa_results = iterative_simulated_annealing(
-            problem, 
-            T0=100, 
-            alpha=0.95, 
-            max_iter_per_temp=100,
-            stagnation_threshold=20
-        )
-        end_time = time.time()
-        run_time = end_time - start_time
-        run_time_ms = int(run_time * 1000)
-        # print(f"Total nodes visited: {visited}")
-        # print(f"Number of pickers used: {solution[0]}")
-        # print(f"Solution is valid: {solution[2]}")
-
-        instance_results = {
-            "visited_nodes": visited,
-            "runtime": run_time_ms,
-            "num_pickers": solution[0],
-            "is_valid": solution[2]
-        }
-        instance_results["id"] = instanceID
-        instance_results["type"] = instanceType
-        instance_results["param_value"] = instanceValue
-        results.append(instance_results)
-        print(f"Results for {file}: {instance_results}")
-        # time.sleep(2)
-
-        counter += 1
-        # if counter == 10:
-            # break  # Remove this break to run on all instances
-
-# brussels timezone
-brussels_tz = pytz.timezone("Europe/Brussels")
-current_time = datetime.now(brussels_tz)
-timestamp = current_time.strftime("%Y-%m-%d_%H-%M-%S")
-with open(f"resultsExtended/results_{timestamp}.json", "w") as out:
-    json.dump(results, out, indent=4)
-
-print(f"\nSaved → resultsExtended/results_{timestamp}.json")
\ No newline at end of file
+SA_PARAMETERS = {
+    "T0": 100,
+    "alpha": 0.95,
+    "max_iter_per_temp": 100,
+    "stagnation_threshold": 20,
+}
+# search engines for the instances the exact solver does not take (--engine=<name>)
+ENGINES = ["simulatedAnnealing", "tabuSearch", "largeNeighborhoodSearch"]
+# entries are written to the results store in batches of this size
+STORE_BATCH_SIZE = 20
+# changes to these files invalidate cached results
+SOLVER_FILES = ["simulatedAnnealingExtended.py", "solution.py", "randomStream.py", "repairOperators.py",
+                "annealingSchedule.py", "lowerBounds.py", "exactSolver.py", "jitAnnealing.py",
+                "stateHashing.py", "tabuSearch.py", "largeNeighborhoodSearch.py"]
+
+
+def engine_parameters(engine):
+    """Parameters of an engine; tabuSearch and largeNeighborhoodSearch are only imported when chosen"""
+    if engine == "tabuSearch":
+        from tabuSearch import TABU_PARAMETERS
+        return TABU_PARAMETERS
+    if engine == "largeNeighborhoodSearch":
+        from largeNeighborhoodSearch import LNS_PARAMETERS
+        return LNS_PARAMETERS
+    return SA_PARAMETERS
+
+
+def main(argv=None):
+    """python runAllInstancesExtended.py [seed] [--engine=<name>] [--no-cache] [--telemetry]"""
+    argv = sys.argv[1:] if argv is None else argv
+    # optional run seed; every instance gets its own stream derived from it and its id
+    args = [arg for arg in argv if not arg.startswith("--")]
+    run_seed = int(args[0]) if args else new_seed()
+    # reuse the results of earlier solves of unchanged instances with the same solver,
+    # parameters, seed (any seed when no run seed is given) and solver code
+    use_cache = "--no-cache" not in argv
+    # JSON Lines progress events in resultsExtended/telemetry_<timestamp>.jsonl, read by telemetry.py
+    use_telemetry = "--telemetry" in argv
+    engine = next((arg.split("=", 1)[1] for arg in argv if arg.startswith("--engine=")), "simulatedAnnealing")
+    if engine not in ENGINES:
+        sys.exit(f"Unknown engine {engine!r}, choose from {', '.join(ENGINES)}")
+    parameters = engine_parameters(engine)
+    code_fingerprint = file_digest(SOLVER_FILES)
+
+    brussels_tz = pytz.timezone("Europe/Brussels")
+    current_time = datetime.now(brussels_tz)
+    timestamp = current_time.strftime("%Y-%m-%d_%H-%M-%S")
+
+    store = ResultsStore()
+    run_id = store.start_run("extended", "batch", current_time, source=f"resultsExtended/results_{timestamp}.json")
+    pending = []
+
+    results = []
+
+    telemetry = None
+    if use_telemetry:
+        from telemetry import Telemetry
+        telemetry = Telemetry(f"resultsExtended/telemetry_{timestamp}.jsonl")
+        telemetry.run_start("extended", engine, sum(file.endswith(".json") for file in os.listdir(FOLDER)))
+    counter = 0
+    for file in os.listdir(FOLDER):
+        if file.endswith(".json"):
+            filepath = os.path.join(FOLDER, file)
+            # parse instance and run model
+            instanceID = file.split("-")[1].split("_")[0]
+            instanceType = file.split("-")[1].split("_")[1]
+            instanceValue = file.split("-")[2].split(".")[0]
+
+            with open(filepath, "r") as f:
+                instance = json.load(f)
+
+            problem = OrderPickingProblem(instance)
+            seed = derive_seed(run_seed, instanceID)
+            # small instance: exact engine proves the minimum in milliseconds
+            solver = "exact" if can_solve_exactly(problem) else engine
+
+            instance_hash = file_digest([filepath])
+            entry = None
+            if use_cache:
+                entry = store.cached_entry(instance_hash, solver, parameters, code_fingerprint,
+                                           seed if args else None)
+            if entry is not None:
+                entry.update({"id": instanceID, "type": instanceType, "param_value": instanceValue, "cached": True})
+                results.append(entry)
+                pending.append(entry)
+                if telemetry is not None:
+                    telemetry.instance_end(file, entry)
+                print(f"Results for {file}: {entry}")
+                continue
+
+            progress = step_progress = None
+            if telemetry is not None:
+                telemetry.instance_start(file, len(problem.items), solver)
+                progress, step_progress = telemetry.picker_count, telemetry.temperature_step
+
+            start_time = time.time()
+            # print("Starting Iterative Simulated Annealing...\n")
+            if solver == "exact":
+                visited, solution, sa_results = exact_minimum_pickers_by_category(problem)
+            elif solver == "tabuSearch":
+                from tabuSearch import iterative_tabu_search, TABU_PARAMETERS
+                visited, solution, sa_results = iterative_tabu_search(problem, **TABU_PARAMETERS, seed=seed,
+                                                                      progress=progress)
+            elif solver == "largeNeighborhoodSearch":
+                from largeNeighborhoodSearch import iterative_lns, LNS_PARAMETERS
+                visited, solution, sa_results = iterative_lns(problem, **LNS_PARAMETERS, seed=seed,
+                                                              progress=progress)
+            else:
+                visited, solution, sa_results = iterative_simulated_annealing(
+                    problem,
+                    **SA_PARAMETERS,
+                    seed=seed,
+                    progress=progress,
+                    step_progress=step_progress
+                )
+            end_time = time.time()
+            run_time = end_time - start_time
+            run_time_ms = int(run_time * 1000)
+            # print(f"Total nodes visited: {visited}")
+            # print(f"Number of pickers used: {solution[0]}")
+            # print(f"Solution is valid: {solution[2]}")
+
+            instance_results = {
+                "visited_nodes": visited,
+                "runtime": run_time_ms,
+                "num_pickers": solution[0],
+                "is_valid": solution[2],
+                "seed": seed,
+                "solver": solver
+            }
+            instance_results.update(bound_fields(problem, solution, exact=solver == "exact"))
+            instance_results["id"] = instanceID
+            instance_results["type"] = instanceType
+            instance_results["param_value"] = instanceValue
+            store.cache_entry(instance_hash, solver, parameters, code_fingerprint, seed, instance_results)
+            results.append(instance_results)
+            pending.append(instance_results)
+            if telemetry is not None:
+                telemetry.instance_end(file, instance_results)
+            if len(pending) >= STORE_BATCH_SIZE:
+                store.add_results(run_id, pending, parameters)
+                pending = []
+            print(f"Results for {file}: {instance_results}")
+            # time.sleep(2)
+
+            counter += 1
+            # if counter == 10:
+                # break  # Remove this break to run on all instances
+
+    store.add_results(run_id, pending, parameters)
+    store.close()
+    if telemetry is not None:
+        telemetry.run_end()
+        telemetry.close()
+
+    with open(f"resultsExtended/results_{timestamp}.json", "w") as out:
+        json.dump(results, out, indent=4)
+
+    print(f"\nSaved → resultsExtended/results_{timestamp}.json")
+
+
+if __name__ == "__main__":
+    main()
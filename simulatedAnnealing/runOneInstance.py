@@ -1,75 +1,158 @@
-from simulatedAnnealing import *
+from simulatedAnnealing import OrderPickingProblem, iterative_simulated_annealing
 import json
 import sys
 from datetime import datetime
 import pytz
 import time
+from randomStream import new_seed
+from resultsStore import ResultsStore
+from instanceConverter import load_instance
+from lowerBounds import bound_fields
+from exactSolver import can_solve_exactly, exact_minimum_pickers
 
-INSTANCE_FILE = sys.argv[1]
-
-results = []
-
-# parse instance and run model
-instanceID = INSTANCE_FILE.split("-")[1].split("_")[0]
-instanceType = INSTANCE_FILE.split("-")[1].split("_")[1]
-instanceValue = INSTANCE_FILE.split("-")[2].split(".")[0]
-
-with open(INSTANCE_FILE, "r") as f:
-    instance = json.load(f)
-
-problem = OrderPickingProblem(instance)
-
-start_time = time.time()
-# print("Starting Iterative Simulated Annealing...\n")
-visited, solution, sa_results = iterative_simulated_annealing(
-    problem,
-    logging=True, 
-    T0=100, 
-    alpha=0.95, 
-    max_iter_per_temp=100,
-    stagnation_threshold=20
-)
-end_time = time.time()
-run_time = end_time - start_time
-run_time_ms = int(run_time * 1000)
-print(f"Total nodes visited: {visited}")
-print(f"Number of pickers used: {solution[0]}")
-print(f"Solution is valid: {solution[2]}")
-
-print(f"\nRoutes:")
-
-for i, picker_routes in enumerate(solution[1]):
-    if any(route for route in picker_routes):
-        print(f"\nPicker {i+1}:")
-        for j, route in enumerate(picker_routes):
-            if route:
-                time = problem.calculate_route_time(route)
-                locations = [problem.product_locations[item] for item in route]
-                capacity_ok = len(route) <= problem.capacity
-                time_ok = time <= problem.max_time
-                status = "✓" if (capacity_ok and time_ok) else "✗"
-                print(f"  {status} Round {j+1}: Items {route} at locations {locations}")
-                print(f"      Capacity: {len(route)}/{problem.capacity}, Time: {time:.2f}/{problem.max_time}")
-
-instance_results = {
-    "visited_nodes": visited,
-    "runtime": run_time_ms,
-    "num_pickers": solution[0],
-    "is_valid": solution[2]
+SA_PARAMETERS = {
+    "T0": 100,
+    "alpha": 0.95,
+    "max_iter_per_temp": 100,
+    "stagnation_threshold": 20,
 }
+# compiled SA loop when Numba is installed; same results as the Python loop
+USE_JIT = True
+# search engines for the instances the exact solver does not take (--engine=<name>)
+ENGINES = ["simulatedAnnealing", "tabuSearch", "largeNeighborhoodSearch"]
 
-instance_results["id"] = instanceID
-instance_results["type"] = instanceType
-instance_results["param_value"] = instanceValue
-results.append(instance_results)
-print(f"Results for {INSTANCE_FILE}: {instance_results}")
 
+def engine_parameters(engine):
+    """Parameters of an engine; tabuSearch and largeNeighborhoodSearch are only imported when chosen"""
+    if engine == "tabuSearch":
+        from tabuSearch import TABU_PARAMETERS
+        return TABU_PARAMETERS
+    if engine == "largeNeighborhoodSearch":
+        from largeNeighborhoodSearch import LNS_PARAMETERS
+        return LNS_PARAMETERS
+    return SA_PARAMETERS
 
-brussels_tz = pytz.timezone("Europe/Brussels")
-current_time = datetime.now(brussels_tz)
-timestamp = current_time.strftime("%Y-%m-%d_%H-%M-%S")
 
-with open(f"results/results_individual_instance_{timestamp}.json", "w") as out:
-    json.dump(results, out, indent=4)
+def solve(problem, engine, seed, profile=None):
+    # print("Starting Iterative Simulated Annealing...\n")
+    if can_solve_exactly(problem):
+        # small instance: exact engine proves the minimum in milliseconds
+        visited, solution, sa_results = exact_minimum_pickers(problem, logging=True)
+        solver = "exact"
+    elif engine == "tabuSearch":
+        from tabuSearch import iterative_tabu_search, TABU_PARAMETERS
+        visited, solution, sa_results = iterative_tabu_search(problem, logging=True, **TABU_PARAMETERS, seed=seed)
+        solver = engine
+    elif engine == "largeNeighborhoodSearch":
+        from largeNeighborhoodSearch import iterative_lns, LNS_PARAMETERS
+        visited, solution, sa_results = iterative_lns(problem, logging=True, **LNS_PARAMETERS, seed=seed)
+        solver = engine
+    else:
+        visited, solution, sa_results = iterative_simulated_annealing(
+            problem,
+            logging=True,
+            **SA_PARAMETERS,
+            seed=seed,
+            # profiles show the functions of the Python loop; results are the same
+            jit=USE_JIT and profile is None
+        )
+        solver = "simulatedAnnealing"
+    return visited, solution, sa_results, solver
 
-print(f"\nSaved → results/results_individual_instance_{timestamp}.json")
\ No newline at end of file
+
+def main(argv=None):
+    """python runOneInstance.py <instance> [seed] [--engine=<name>] [--profile[=deterministic]]"""
+    argv = sys.argv[1:] if argv is None else argv
+    args = [arg for arg in argv if not arg.startswith("--")]
+    instance_file = args[0]
+    # optional seed to repeat an earlier run exactly
+    seed = int(args[1]) if len(args) > 1 else new_seed()
+    engine = next((arg.split("=", 1)[1] for arg in argv if arg.startswith("--engine=")), "simulatedAnnealing")
+    if engine not in ENGINES:
+        sys.exit(f"Unknown engine {engine!r}, choose from {', '.join(ENGINES)}")
+    parameters = engine_parameters(engine)
+    # --profile (sampling) or --profile=deterministic: profile the solve, written next to the results file
+    profile = next((arg.split("=", 1)[1] if "=" in arg else "sampling"
+                    for arg in argv if arg.startswith("--profile")), None)
+    if profile not in (None, "sampling", "deterministic"):
+        sys.exit(f"Unknown profiler {profile!r}, choose from sampling, deterministic")
+
+    results = []
+
+    # parse instance and run model
+    instanceID = instance_file.split("-")[1].split("_")[0]
+    instanceType = instance_file.split("-")[1].split("_")[1]
+    instanceValue = instance_file.split("-")[2].split(".")[0]
+
+    # .json or the compact .npz form written by instanceConverter.py
+    instance = load_instance(instance_file)
+
+    problem = OrderPickingProblem(instance)
+
+    start_time = time.time()
+    if profile is not None:
+        from profiling import profile_call, write_profile
+        (visited, solution, sa_results, solver), profiled = profile_call(
+            lambda: solve(problem, engine, seed, profile), profile)
+    else:
+        visited, solution, sa_results, solver = solve(problem, engine, seed)
+    end_time = time.time()
+    run_time = end_time - start_time
+    run_time_ms = int(run_time * 1000)
+    print(f"Total nodes visited: {visited}")
+    print(f"Number of pickers used: {solution[0]}")
+    print(f"Solution is valid: {solution[2]}")
+
+    print(f"\nRoutes:")
+
+    for i, picker_routes in enumerate(solution[1]):
+        if any(route for route in picker_routes):
+            print(f"\nPicker {i+1}:")
+            for j, route in enumerate(picker_routes):
+                if route:
+                    route_time = problem.calculate_route_time(route)
+                    locations = [problem.product_locations[item] for item in route]
+                    capacity_ok = len(route) <= problem.capacity
+                    time_ok = route_time <= problem.max_time
+                    status = "✓" if (capacity_ok and time_ok) else "✗"
+                    print(f"  {status} Round {j+1}: Items {route} at locations {locations}")
+                    print(f"      Capacity: {len(route)}/{problem.capacity}, Time: {route_time:.2f}/{problem.max_time}")
+
+    instance_results = {
+        "visited_nodes": visited,
+        "runtime": run_time_ms,
+        "num_pickers": solution[0],
+        "is_valid": solution[2],
+        "seed": seed,
+        "solver": solver
+    }
+    instance_results.update(bound_fields(problem, solution, exact=solver == "exact"))
+
+    instance_results["id"] = instanceID
+    instance_results["type"] = instanceType
+    instance_results["param_value"] = instanceValue
+    results.append(instance_results)
+    print(f"Results for {instance_file}: {instance_results}")
+
+
+    brussels_tz = pytz.timezone("Europe/Brussels")
+    current_time = datetime.now(brussels_tz)
+    timestamp = current_time.strftime("%Y-%m-%d_%H-%M-%S")
+
+    with open(f"results/results_individual_instance_{timestamp}.json", "w") as out:
+        json.dump(results, out, indent=4)
+
+    with ResultsStore() as store:
+        run_id = store.start_run("original", "individual", current_time,
+                                 source=f"results/results_individual_instance_{timestamp}.json")
+        store.add_results(run_id, results, parameters)
+
+    print(f"\nSaved → results/results_individual_instance_{timestamp}.json")
+
+    if profile is not None:
+        collapsed, summary = write_profile(profiled, f"results/results_individual_instance_{timestamp}")
+        print(f"Saved → {collapsed} (collapsed stacks) and {summary} (hotspots)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import json
+import math
+import os
+import sys
+import time
+from datetime import datetime
+from statistics import median, quantiles
+
+import numpy as np
+import pytz
+import simulatedAnnealing
+import simulatedAnnealingExtended
+from tabuSearch import iterative_tabu_search, TABU_PARAMETERS
+from largeNeighborhoodSearch import iterative_lns, LNS_PARAMETERS
+from exactSolver import can_solve_exactly, exact_minimum_pickers, exact_minimum_pickers_by_category
+from randomStream import derive_seed
+from resultsStore import file_digest
+from instanceConverter import load_instance
+
+# fixed benchmark seed; run r of instance i always uses derive_seed(BENCHMARK_SEED, i, r)
+BENCHMARK_SEED = 20240601
+REPEATS = 5
+# instances per amountItems size class (all when None)
+INSTANCES_PER_SIZE = None
+BASELINE_FILE = "results/benchmark_baseline.json"
+
+SA_PARAMETERS = {
+    "T0": 100,
+    "alpha": 0.95,
+    "max_iter_per_temp": 100,
+    "stagnation_threshold": 20,
+}
+# compiled SA loop when Numba is installed; same results as the Python loop
+USE_JIT = True
+ENGINE_PARAMETERS = {
+    "simulatedAnnealing": SA_PARAMETERS,
+    "tabuSearch": TABU_PARAMETERS,
+    "largeNeighborhoodSearch": LNS_PARAMETERS,
+}
+METRICS = ["runtime", "visited_nodes", "num_pickers"]
+SOLVER_FILES = ["simulatedAnnealing.py", "simulatedAnnealingExtended.py", "solution.py", "randomStream.py",
+                "repairOperators.py", "annealingSchedule.py", "lowerBounds.py", "exactSolver.py",
+                "jitAnnealing.py", "stateHashing.py", "tabuSearch.py", "largeNeighborhoodSearch.py"]
+
+
+def size_classes(folder, per_size=INSTANCES_PER_SIZE, max_items=None):
+    """{amountItems: [instance files]} of the amountItems instances in folder"""
+    classes = {}
+    # only instance files: the folder may also hold .npz conversions or other files
+    files = [file for file in os.listdir(folder) if "_amountItems-" in file and file.endswith(".json")]
+    for file in sorted(files, key=lambda f: int(f.split("-")[1].split("_")[0])):
+        size = int(file.split("-")[2].split(".")[0])
+        if max_items is None or size <= max_items:
+            classes.setdefault(size, []).append(os.path.join(folder, file))
+    return {size: files[:per_size] for size, files in sorted(classes.items())}
+
+
+def _problem(path, variant):
+    module = simulatedAnnealingExtended if variant == "extended" else simulatedAnnealing
+    return module, module.OrderPickingProblem(load_instance(path))
+
+
+def solve(path, variant, engine, seed):
+    """One timed solve as the run scripts do it: (solver, seconds, visited, num_pickers, is_valid)"""
+    module, problem = _problem(path, variant)
+
+    start = time.perf_counter()
+    if can_solve_exactly(problem):
+        exact = exact_minimum_pickers_by_category if variant == "extended" else exact_minimum_pickers
+        visited, solution, _ = exact(problem)
+        solver = "exact"
+    elif engine == "tabuSearch":
+        visited, solution, _ = iterative_tabu_search(problem, **TABU_PARAMETERS, seed=seed)
+        solver = engine
+    elif engine == "largeNeighborhoodSearch":
+        visited, solution, _ = iterative_lns(problem, **LNS_PARAMETERS, seed=seed)
+        solver = engine
+    elif variant == "extended":
+        visited, solution, _ = module.iterative_simulated_annealing(problem, **SA_PARAMETERS, seed=seed)
+        solver = engine
+    else:
+        visited, solution, _ = module.iterative_simulated_annealing(problem, **SA_PARAMETERS, seed=seed,
+                                                                    jit=USE_JIT)
+        solver = engine
+    return solver, time.perf_counter() - start, visited, solution[0], solution[2]
+
+
+def summarize(values):
+    """Median and interquartile range (None for no values)"""
+    if not values:
+        return {"median": None, "q1": None, "q3": None, "iqr": None}
+    if len(values) == 1:
+        q1 = q3 = values[0]
+    else:
+        q1, _, q3 = quantiles(values, n=4, method="inclusive")
+    return {"median": median(values), "q1": q1, "q3": q3, "iqr": q3 - q1}
+
+
+def fit_exponent(sizes, values):
+    """
+    Least-squares slope b of log(value) = a + b log(size), i.e. value ~ size^b,
+    over the points with a positive value. None with fewer than two points.
+    """
+    points = [(math.log(size), math.log(value)) for size, value in zip(sizes, values) if value]
+    if len(points) < 2:
+        return None
+    x, y = np.array(points).T
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def run_benchmark(variant="original", engine="simulatedAnnealing", repeats=REPEATS, per_size=INSTANCES_PER_SIZE,
+                  max_items=None, logging=True):
+    """
+    Solve every instance of every size class `repeats` times with fixed seeds and
+    return the per-class statistics (runtime in ms, visited nodes, num_pickers
+    over the valid runs) and the fitted scaling exponents.
+    The exponents only use the size classes not solved by the exact solver.
+    """
+    folder = "instancesExtended" if variant == "extended" else "instances"
+    classes = size_classes(folder, per_size, max_items)
+
+    # untimed warm-up, so the first timed run does not pay for imports or loading the compiled SA loop
+    heuristic = [files[0] for files in classes.values() if not can_solve_exactly(_problem(files[0], variant)[1])]
+    if heuristic:
+        solve(heuristic[0], variant, engine, BENCHMARK_SEED)
+
+    sizes = {}
+    for size, files in classes.items():
+        runs = []
+        for path in files:
+            instance_id = int(os.path.basename(path).split("-")[1].split("_")[0])
+            for r in range(repeats):
+                solver, seconds, visited, num_pickers, is_valid = solve(path, variant, engine,
+                                                                        derive_seed(BENCHMARK_SEED, instance_id, r))
+                runs.append({"solver": solver, "runtime": seconds * 1000, "visited_nodes": visited,
+                             "num_pickers": num_pickers, "is_valid": is_valid})
+        valid = [run for run in runs if run["is_valid"]]
+        sizes[size] = {
+            "runs": len(runs),
+            "valid_rate": len(valid) / len(runs),
+            "solver": "exact" if all(run["solver"] == "exact" for run in runs) else engine,
+            "runtime": summarize([run["runtime"] for run in runs]),
+            "visited_nodes": summarize([run["visited_nodes"] for run in runs]),
+            "num_pickers": summarize([run["num_pickers"] for run in valid]),
+        }
+        if logging:
+            stats = sizes[size]
+            print(f"{size:4d} items: runtime {stats['runtime']['median']:9.1f} ms "
+                  f"(IQR {stats['runtime']['iqr']:8.1f}), visited {stats['visited_nodes']['median']:9.0f}, "
+                  f"pickers {stats['num_pickers']['median']}, valid {stats['valid_rate']:.0%} [{stats['solver']}]")
+
+    fitted = [size for size, stats in sizes.items() if stats["solver"] != "exact"]
+    exponents = {metric: fit_exponent(fitted, [sizes[size][metric]["median"] for size in fitted])
+                 for metric in ("runtime", "visited_nodes")}
+    return {
+        "variant": variant,
+        "engine": engine,
+        "parameters": ENGINE_PARAMETERS[engine],
+        "seed": BENCHMARK_SEED,
+        "repeats": repeats,
+        "code": file_digest(SOLVER_FILES),
+        "sizes": sizes,
+        "exponents": exponents,
+    }
+
+
+def compare(benchmark, baseline):
+    """
+    Per size class and metric: ratio of the medians (current / baseline) and
+    whether the change is clear, i.e. the two interquartile ranges do not
+    overlap. Only size classes present in both are compared.
+    """
+    comparison = {}
+    for size, stats in benchmark["sizes"].items():
+        base = baseline["sizes"].get(str(size), baseline["sizes"].get(size))
+        if base is None:
+            continue
+        comparison[size] = {}
+        for metric in METRICS:
+            current, reference = stats[metric], base[metric]
+            if current["median"] is None or reference["median"] is None:
+                continue
+            comparison[size][metric] = {
+                "ratio": current["median"] / reference["median"] if reference["median"] else None,
+                "changed": current["q3"] < reference["q1"] or current["q1"] > reference["q3"],
+            }
+    return comparison
+
+
+def _format(exponent):
+    return "-" if exponent is None else f"{exponent:.2f}"
+
+
+if __name__ == "__main__":
+    # python scalingBenchmark.py [repeats] [--extended] [--engine=<name>] [--per-size=N] [--max-items=N]
+    #                            [--save-baseline]
+    ARGS = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    OPTIONS = dict(arg[2:].split("=", 1) for arg in sys.argv[1:] if arg.startswith("--") and "=" in arg)
+    VARIANT = "extended" if "--extended" in sys.argv else "original"
+    ENGINE = OPTIONS.get("engine", "simulatedAnnealing")
+    if ENGINE not in ENGINE_PARAMETERS:
+        sys.exit(f"Unknown engine {ENGINE!r}, choose from {', '.join(ENGINE_PARAMETERS)}")
+    RESULTS_FOLDER = "resultsExtended" if VARIANT == "extended" else "results"
+    baseline_file = BASELINE_FILE.replace("results/", f"{RESULTS_FOLDER}/", 1)
+
+    benchmark = run_benchmark(VARIANT, ENGINE, int(ARGS[0]) if ARGS else REPEATS,
+                              int(OPTIONS["per-size"]) if "per-size" in OPTIONS else INSTANCES_PER_SIZE,
+                              int(OPTIONS["max-items"]) if "max-items" in OPTIONS else None)
+    exponents = benchmark["exponents"]
+    print(f"\nScaling exponents: runtime ~ n^{_format(exponents['runtime'])}, "
+          f"visited nodes ~ n^{_format(exponents['visited_nodes'])}")
+
+    if os.path.exists(baseline_file):
+        with open(baseline_file, "r") as f:
+            baseline = json.load(f)
+        if (baseline["engine"], baseline["seed"], baseline["repeats"]) != (ENGINE, BENCHMARK_SEED, benchmark["repeats"]):
+            print(f"⚠ Baseline ran {baseline['engine']} with seed {baseline['seed']} and {baseline['repeats']} repeats")
+        benchmark["baseline_code"] = baseline["code"]
+        benchmark["comparison"] = compare(benchmark, baseline)
+        print(f"\nAgainst {baseline_file} (median ratio, * = interquartile ranges do not overlap):")
+        for size, metrics in benchmark["comparison"].items():
+            cells = [f"{metric} {values['ratio']:.2f}{'*' if values['changed'] else ' '}"
+                     for metric, values in metrics.items() if values["ratio"] is not None]
+            print(f"{size:4d} items: " + "  ".join(cells))
+        base_exponents = baseline["exponents"]
+        print(f"Runtime exponent: {_format(base_exponents['runtime'])} → {_format(exponents['runtime'])}")
+
+    timestamp = datetime.now(pytz.timezone("Europe/Brussels")).strftime("%Y-%m-%d_%H-%M-%S")
+    with open(f"{RESULTS_FOLDER}/benchmark_{timestamp}.json", "w") as out:
+        json.dump(benchmark, out, indent=4)
+    print(f"\nSaved → {RESULTS_FOLDER}/benchmark_{timestamp}.json")
+    if "--save-baseline" in sys.argv:
+        with open(baseline_file, "w") as out:
+            json.dump(benchmark, out, indent=4)
+        print(f"Saved baseline → {baseline_file}")
@@ -1,8 +1,13 @@
 import random
 import math
-import copy
 import json
 from collections import defaultdict
+from solution import Solution
+from randomStream import RandomStream
+from repairOperators import SlackIndex, REPAIR_OPERATORS
+from annealingSchedule import calibrate_temperature, REHEAT_FACTOR
+from lowerBounds import picker_lower_bound
+from stateHashing import StateTable, RECENT_STATES
 
 class OrderPickingProblem:
     def __init__(self, instance):
@@ -78,10 +83,22 @@ class OrderPickingProblem:
         
         return time
     
+    def picker_penalty(self, picker_time, capacity_violation, category_violation=0):
+        """
+        Penalty of one picker from its total time, the items above capacity over
+        its routes and the items outside its category; shared by evaluate_solution
+        and the tabu search
+        """
+        penalty = category_violation * 2500  # Very high penalty for category violation
+        penalty += capacity_violation * 1000
+        if picker_time > self.max_time:
+            penalty += (picker_time - self.max_time) * 50
+        return penalty
+    
     def evaluate_solution(self, solution, num_pickers):
         """
         Evaluate a solution for a fixed number of pickers
-        solution = list of routes for exactly num_pickers pickers
+        solution = Solution (or dict picker -> routes) for exactly num_pickers pickers
         Returns: (penalty, is_valid)
         
         Penalty components:
@@ -91,42 +108,42 @@ class OrderPickingProblem:
         - Capacity violations: high penalty
         - Time violations: medium penalty
         """
-        items_collected = []
+        if not isinstance(solution, Solution):
+            solution = Solution.from_dict(solution)
         penalty = 0
 
-        for picker_id, picker_routes in solution.items():
+        for p, picker_id in enumerate(solution.picker_ids):
             picker_time = 0
-            for route in picker_routes:
+            capacity_violation = 0
+            category_violation = 0
+            for route in solution.routes(p):
                 if not route:
                     continue
                 
                 # Check category constraints
                 for item in route:
                     if not self.can_picker_pick_item(picker_id, item):
-                        penalty += 2500  # Very high penalty for category violation
+                        category_violation += 1
                 
                 # Penalize capacity constraint violations
                 if len(route) > self.capacity:
-                    capacity_violation = len(route) - self.capacity
-                    penalty += capacity_violation * 1000
+                    capacity_violation += len(route) - self.capacity
                 
                 # Penalize time constraint violations
                 route_time = self.calculate_route_time(route)
                 picker_time += route_time 
                 
-                items_collected.extend(route)
-                
-            if picker_time > self.max_time:
-                time_violation = picker_time - self.max_time
-                penalty += time_violation * 50
+            penalty += self.picker_penalty(picker_time, capacity_violation, category_violation)
+        
+        items_collected = set(solution.flat_items)
         
         # Penalize missing items
-        missing_items = len(self.items) - len(set(items_collected))
+        missing_items = len(self.items) - len(items_collected)
         if missing_items > 0:
             penalty += missing_items * 2000
         
         # Penalize duplicate items
-        duplicate_items = len(items_collected) - len(set(items_collected))
+        duplicate_items = len(solution.flat_items) - len(items_collected)
         if duplicate_items > 0:
             penalty += duplicate_items * 1500
         
@@ -136,7 +153,7 @@ class OrderPickingProblem:
         return penalty, is_valid
 
 
-def select_diverse_pickers(problem, num_pickers, max_pickers=None):
+def select_diverse_pickers(problem, num_pickers, max_pickers=None, rng=random):
     """
     Select the minimal number of pickers required per category
     based on item load. Guarantees feasibility if possible.
@@ -173,7 +190,7 @@ def select_diverse_pickers(problem, num_pickers, max_pickers=None):
         needed = min(needed, len(available))
 
         # choose needed pickers
-        chosen = random.sample(available, needed)
+        chosen = rng.sample(available, needed)
         selected.extend(chosen)
 
     # STEP 2 — if still fewer than num_pickers, fill up with any pickers
@@ -186,15 +203,15 @@ def select_diverse_pickers(problem, num_pickers, max_pickers=None):
 
     # STEP 3 — if overshoot (rare), trim randomly
     if len(selected) > num_pickers:
-        selected = random.sample(selected, num_pickers)
+        selected = rng.sample(selected, num_pickers)
 
     return selected
 
 
 
-def create_initial_solution(problem, num_pickers, selected_pickers=None):
+def create_initial_solution(problem, num_pickers, selected_pickers=None, rng=random):
     if selected_pickers is None:
-        selected_pickers = select_diverse_pickers(problem, num_pickers)
+        selected_pickers = select_diverse_pickers(problem, num_pickers, rng=rng)
     
     # Initial empty routes
     picker_assignment = {i: [] for i in selected_pickers}
@@ -209,12 +226,12 @@ def create_initial_solution(problem, num_pickers, selected_pickers=None):
 
         # kies random één van de toegestane pickers
         if valid_pickers:
-            chosen = random.choice(valid_pickers)
+            chosen = rng.choice(valid_pickers)
             picker_assignment[chosen].append(item)
         else:
             # GEEN picker kan dit item ophalen → fout in instance?
             # Voor nu gooien we het bij een random picker (zonder crash)
-            chosen = random.choice(selected_pickers)
+            chosen = rng.choice(selected_pickers)
             picker_assignment[chosen].append(item)
 
     # routes splitsen volgens capaciteit
@@ -225,19 +242,28 @@ def create_initial_solution(problem, num_pickers, selected_pickers=None):
             routes.append(items[i:i+problem.capacity])
         solution[picker] = routes
     
-    return solution, selected_pickers
+    return Solution.from_dict(solution, selected_pickers), selected_pickers
 
 
-def generate_neighbor(solution, problem, selected_pickers):
+def generate_neighbor(solution, problem, selected_pickers, rng=random, slack=None):
     """Generate neighbor solution using various operators respecting category constraints"""
-    neighbor = copy.deepcopy(solution)
+    neighbor = solution.copy()
+    picker_ids = neighbor.picker_ids
     
     # Choose operator based on solution structure
     operators = ['swap_items', 'move_item', 'split_route', 'merge_routes', 'reorder_route']
-    operator = random.choice(operators)
+    if slack is not None:
+        # targeted repairs driven by the slack index of the current solution
+        operators = operators + list(REPAIR_OPERATORS)
+    operator = rng.choice(operators)
+    if operator in REPAIR_OPERATORS:
+        if REPAIR_OPERATORS[operator](neighbor, problem, slack, rng):
+            return neighbor
+        # nothing to repair: fall back to a regular move
+        operator = rng.choice(operators[:5])
     
     # Find non-empty pickers
-    non_empty = [picker for picker in neighbor if any(route for route in neighbor[picker])]
+    non_empty = neighbor.non_empty_pickers()
     
     if not non_empty:
         return neighbor
@@ -248,135 +274,178 @@ def generate_neighbor(solution, problem, selected_pickers):
         max_attempts = 10
         
         while attempts < max_attempts:
-            idx1, idx2 = random.sample(non_empty, 2)
-            routes1 = [r for r in neighbor[idx1] if r]
-            routes2 = [r for r in neighbor[idx2] if r]
+            idx1, idx2 = rng.sample(non_empty, 2)
+            routes1 = neighbor.non_empty_routes(idx1)
+            routes2 = neighbor.non_empty_routes(idx2)
             
             if routes1 and routes2:
-                r1 = random.choice(routes1)
-                r2 = random.choice(routes2)
-                if r1 and r2:
-                    i1 = random.randint(0, len(r1) - 1)
-                    i2 = random.randint(0, len(r2) - 1)
-                    item1, item2 = r1[i1], r2[i2]
-                    
-                    # Check if swap respects category constraints
-                    if (problem.can_picker_pick_item(idx1, item2) and 
-                        problem.can_picker_pick_item(idx2, item1)):
-                        r1[i1], r2[i2] = item2, item1
-                        break
+                r1 = rng.choice(routes1)
+                r2 = rng.choice(routes2)
+                i1 = rng.randint(0, neighbor.route_length(idx1, r1) - 1)
+                i2 = rng.randint(0, neighbor.route_length(idx2, r2) - 1)
+                item1 = neighbor.route(idx1, r1)[i1]
+                item2 = neighbor.route(idx2, r2)[i2]
+                
+                # Check if swap respects category constraints
+                if (problem.can_picker_pick_item(picker_ids[idx1], item2) and 
+                    problem.can_picker_pick_item(picker_ids[idx2], item1)):
+                    neighbor.swap(idx1, r1, i1, idx2, r2, i2)
+                    break
             
             attempts += 1
     
     elif operator == 'move_item':
         # Move one item from one picker to another (respecting categories)
-        idx1 = random.choice(non_empty)
-        routes1 = [r for r in neighbor[idx1] if r]
+        idx1 = rng.choice(non_empty)
+        routes1 = [route.tolist() for route in neighbor.routes(idx1)]
+        r1 = routes1[rng.choice(neighbor.non_empty_routes(idx1))]
+        item_idx = rng.randint(0, len(r1) - 1)
+        item = r1[item_idx]
         
-        if routes1:
-            r1 = random.choice(routes1)
-            if r1:
-                item_idx = random.randint(0, len(r1) - 1)
-                item = r1[item_idx]
-                
-                # Find pickers that can handle this item
-                valid_target_indices = [i for i in selected_pickers
-                                       if i != idx1 and 
-                                       problem.can_picker_pick_item(i, item)]
-                
-                if valid_target_indices:
-                    idx2 = random.choice(valid_target_indices)
-                    r1.pop(item_idx)
-                    
-                    # Add to existing route or create new one
-                    if neighbor[idx2] and neighbor[idx2][0]:
-                        neighbor[idx2][0].append(item)
-                    else:
-                        neighbor[idx2] = [[item]]
-                
-                # Clean up empty routes
-                neighbor[idx1] = [r for r in neighbor[idx1] if r]
+        # Find pickers that can handle this item
+        valid_target_indices = [i for i in range(len(picker_ids))
+                                if i != idx1 and
+                                problem.can_picker_pick_item(picker_ids[i], item)]
+        
+        if valid_target_indices:
+            idx2 = rng.choice(valid_target_indices)
+            r1.pop(item_idx)
+            routes2 = [route.tolist() for route in neighbor.routes(idx2)]
+            
+            # Add to existing route or create new one
+            if routes2:
+                routes2[0].append(item)
+            else:
+                routes2 = [[item]]
+            
+            # Clean up empty routes
+            neighbor.set_picker_routes(idx1, [r for r in routes1 if r])
+            neighbor.set_picker_routes(idx2, routes2)
     
     elif operator == 'split_route' and non_empty:
         # Split a route into two
-        idx = random.choice(non_empty)
-        routes = [r for r in neighbor[idx] if r and len(r) > 1]
+        idx = rng.choice(non_empty)
+        candidates = neighbor.non_empty_routes(idx, min_length=2)
         
-        if routes:
-            route = random.choice(routes)
-            split_point = random.randint(1, len(route) - 1)
-            route1 = route[:split_point]
-            route2 = route[split_point:]
+        if candidates:
+            route_idx = rng.choice(candidates)
+            routes = [route.tolist() for route in neighbor.routes(idx)]
+            route = routes[route_idx]
+            split_point = rng.randint(1, len(route) - 1)
             
             # Replace the route with split routes
-            route_idx = neighbor[idx].index(route)
-            neighbor[idx][route_idx] = route1
-            neighbor[idx].insert(route_idx + 1, route2)
+            routes[route_idx:route_idx + 1] = [route[:split_point], route[split_point:]]
+            neighbor.set_picker_routes(idx, routes)
     
     elif operator == 'merge_routes' and non_empty:
         # Merge two routes from the same picker
-        idx = random.choice(non_empty)
-        routes = [r for r in neighbor[idx] if r]
+        idx = rng.choice(non_empty)
+        candidates = neighbor.non_empty_routes(idx)
         
-        if len(routes) >= 2:
-            r1, r2 = random.sample(routes, 2)
-            merged = r1 + r2
+        if len(candidates) >= 2:
+            r1, r2 = rng.sample(candidates, 2)
+            routes = [route.tolist() for route in neighbor.routes(idx)]
+            merged = routes[r1] + routes[r2]
             
             # Remove old routes and add merged
-            neighbor[idx] = [r for r in neighbor[idx] if r not in [r1, r2]]
-            neighbor[idx].append(merged)
+            routes = [route for r, route in enumerate(routes) if r not in (r1, r2)]
+            routes.append(merged)
+            neighbor.set_picker_routes(idx, routes)
     
     elif operator == 'reorder_route' and non_empty:
         # Randomly reorder items in a route (for better travel time)
-        idx = random.choice(non_empty)
-        routes = [r for r in neighbor[idx] if r and len(r) > 1]
+        idx = rng.choice(non_empty)
+        candidates = neighbor.non_empty_routes(idx, min_length=2)
         
-        if routes:
-            route = random.choice(routes)
-            random.shuffle(route)
+        if candidates:
+            r = rng.choice(candidates)
+            route = neighbor.route(idx, r).tolist()
+            rng.shuffle(route)
+            neighbor.set_route(idx, r, route)
     
     return neighbor
 
 
 def simulated_annealing_fixed_pickers(problem, num_pickers, selected_pickers, T0=100, alpha=0.95, 
-                                      max_iter_per_temp=100, stagnation_threshold=30):
+                                      max_iter_per_temp=100, stagnation_threshold=30, rng=random,
+                                      initial_solution=None, reheats=0, target_acceptance=0.8, step_progress=None,
+                                      states=None):
     """
     Run SA for a fixed number of pickers
+    Starts from initial_solution when given, otherwise from a random distribution
+    T0="auto" calibrates T0 on sampled neighbours for the target_acceptance rate
+    On stagnation the search restarts from the best solution at a higher
+    temperature, at most `reheats` times; it stops as soon as it is valid
+    step_progress, if given, is called with a status dict after every temperature step
+    states, a stateHashing.StateTable, gives neighbours seen recently their stored penalty
     Returns the best solution found and whether it's valid
     """
-    current_solution, selected_pickers = create_initial_solution(problem, num_pickers, selected_pickers)
+    if initial_solution is not None:
+        current_solution = initial_solution.copy()
+        selected_pickers = list(initial_solution.picker_ids)
+    else:
+        current_solution, selected_pickers = create_initial_solution(problem, num_pickers, selected_pickers, rng)
     current_penalty, is_valid = problem.evaluate_solution(current_solution, num_pickers)
     
-    best_solution = copy.deepcopy(current_solution)
+    best_solution = current_solution.copy()
     best_penalty = current_penalty
     best_valid = is_valid
     best_pickers = selected_pickers.copy()
     
+    slack = SlackIndex(problem, current_solution)
+    visited_nodes = 0
+    if states is not None:
+        keys, fingerprint = states.fingerprint(current_solution)
+        states.store(fingerprint, current_penalty, is_valid)
+    
+    if T0 == "auto":
+        T0, visited_nodes = calibrate_temperature(
+            lambda: problem.evaluate_solution(generate_neighbor(current_solution, problem, selected_pickers, rng, slack), num_pickers)[0] - current_penalty,
+            target_acceptance)
+    
     T = T0
     stagnation_counter = 0
-    visited_nodes = 0
+    reheats_left = reheats
     
-    while stagnation_counter < stagnation_threshold:
+    while stagnation_counter < stagnation_threshold and best_penalty > 0:
         accepted_moves = 0
         for iteration in range(max_iter_per_temp):
-            neighbor = generate_neighbor(current_solution, problem, selected_pickers)
-            neighbor_penalty, neighbor_valid = problem.evaluate_solution(neighbor, num_pickers)
+            neighbor = generate_neighbor(current_solution, problem, selected_pickers, rng, slack)
+            known = None
+            if states is not None:
+                changed_keys, neighbor_fingerprint = states.neighbor_fingerprint(keys, fingerprint, neighbor)
+                known = states.lookup(neighbor_fingerprint)
+            if known is None:
+                neighbor_penalty, neighbor_valid = problem.evaluate_solution(neighbor, num_pickers)
+                if states is not None:
+                    states.store(neighbor_fingerprint, neighbor_penalty, neighbor_valid)
+            else:
+                # same state as a recent one: same penalty, no evaluation
+                neighbor_penalty, neighbor_valid = known
             visited_nodes += 1
             
             # Calculate delta
             delta = neighbor_penalty - current_penalty
             
             # Accept or reject
-            if delta < 0 or random.random() < math.exp(-delta / T):
+            if delta < 0 or rng.random() < math.exp(-delta / T):
                 current_solution = neighbor
                 current_penalty = neighbor_penalty
+                if states is not None:
+                    for p, key in changed_keys.items():
+                        keys[p] = key
+                    fingerprint = neighbor_fingerprint
+                slack.update(current_solution)
                 accepted_moves += 1
                 
                 # Update best
                 if neighbor_penalty < best_penalty:
-                    best_solution = copy.deepcopy(neighbor)
+                    best_solution = neighbor.copy()
                     best_penalty = neighbor_penalty
                     best_valid = neighbor_valid
+                    if best_valid:
+                        # valid: nothing left to improve for this picker count
+                        break
         
         # Check stagnation
         if accepted_moves < max_iter_per_temp * 0.01:
@@ -386,19 +455,40 @@ def simulated_annealing_fixed_pickers(problem, num_pickers, selected_pickers, T0
         
         T *= alpha
         
+        if (stagnation_counter >= stagnation_threshold or T < 0.01) and reheats_left > 0 and not best_valid:
+            # Reheat: continue from the best solution at a higher temperature
+            reheats_left -= 1
+            T = T0 * REHEAT_FACTOR
+            stagnation_counter = 0
+            current_solution = best_solution.copy()
+            current_penalty = best_penalty
+            slack = SlackIndex(problem, current_solution)
+            if states is not None:
+                keys, fingerprint = states.fingerprint(current_solution)
+        
+        if step_progress is not None:
+            step_progress({"temperature": T, "best_penalty": best_penalty, "visited_nodes": visited_nodes})
+        
         if T < 0.01:
             break
     
     return best_solution, best_valid, best_penalty, visited_nodes, best_pickers
 
 def iterative_simulated_annealing(problem, logging=False, T0=100, alpha=0.95, max_iter_per_temp=100,
-                                  stagnation_threshold=30, max_pickers=None):
+                                  stagnation_threshold=30, max_pickers=None, seed=None,
+                                  progress=None, reheats=0, target_acceptance=0.8, step_progress=None,
+                                  recent_states=RECENT_STATES):
     """
     Iteratively try to find valid solution with minimum number of pickers
-    Start with 1 picker and increase until valid solution is found
+    Start at the lower bound of lowerBounds.picker_lower_bound and increase until valid solution is found
+    All random draws come from one stream seeded with `seed`, so a run can be repeated exactly
+    progress, if given, is called with a status dict after every picker count tried
+    step_progress, if given, is called with a status dict after every temperature step
+    recent_states is the size of the table of recently evaluated states (0: no table)
     """
     if max_pickers is None:
         max_pickers = problem.num_pickers
+    rng = RandomStream(seed)
     
     if logging:
         print("=== ITERATIVE SIMULATED ANNEALING (with Categories) ===")
@@ -418,36 +508,51 @@ def iterative_simulated_annealing(problem, logging=False, T0=100, alpha=0.95, ma
         print()
     
     total_visited = 0
-    optimization_results = []
+    states = StateTable(recent_states, by_id=True) if recent_states else None
     
-    # Calculate theoretical minimum pickers needed
-    min_pickers_capacity = math.ceil(len(problem.items) / problem.capacity)
+    # Valid lower bound on the number of pickers: fewer pickers are never tried,
+    # and a valid solution at the bound is optimal (math.inf: no solution exists)
+    lower_bound = picker_lower_bound(problem)
+    first_pickers = max(1, min(lower_bound, max_pickers + 1))
+    optimization_results = [float('inf')] * (first_pickers - 1)
     if logging:
-        print(f"Theoretical minimum (capacity only): {min_pickers_capacity} pickers\n")
+        print(f"Lower bound: {lower_bound} pickers\n")
     
     best_solution = None
     best_num_pickers = None
     best_selected_pickers = None
     
-    for num_pickers in range(1, max_pickers + 1):
+    for num_pickers in range(first_pickers, max_pickers + 1):
         if problem.categories:
-            selected = select_diverse_pickers(problem, num_pickers)
+            selected = select_diverse_pickers(problem, num_pickers, rng=rng)
             cats_selected = [problem.picker_categories[p] for p in selected]
         if logging: 
             print(f"--- Trying with {num_pickers} picker{'s' if num_pickers > 1 else ''} ---")
             print(f"    Selected pickers: {selected}")
             print(f"    Categories covered: {set(cats_selected)}")
         
+        if states is not None:
+            states.clear()
+        step = None
+        if step_progress is not None:
+            step = lambda status: step_progress({"num_pickers": num_pickers, **status,
+                                                 "visited_nodes": total_visited + status["visited_nodes"]})
         solution, is_valid, penalty, visited, selected_pickers = simulated_annealing_fixed_pickers(
-            problem, num_pickers, selected, T0, alpha, max_iter_per_temp, stagnation_threshold
+            problem, num_pickers, selected, T0, alpha, max_iter_per_temp, stagnation_threshold, rng,
+            reheats=reheats, target_acceptance=target_acceptance, step_progress=step, states=states
         )
         
         total_visited += visited
+        if progress is not None:
+            progress({"num_pickers": num_pickers, "is_valid": is_valid, "penalty": penalty,
+                      "visited_nodes": total_visited,
+                      "duplicate_rate": states.duplicate_rate if states is not None else 0.0})
         
         if is_valid:
             if logging:
-                print(f"✓ Valid solution found with {num_pickers} picker{'s' if num_pickers > 1 else ''}!")
-            best_solution = solution
+                print(f"✓ Valid solution found with {num_pickers} picker{'s' if num_pickers > 1 else ''}!"
+                      + (" (optimal: matches the lower bound)" if num_pickers == lower_bound else ""))
+            best_solution = solution.to_dict()
             best_num_pickers = num_pickers
             best_selected_pickers = selected_pickers
             optimization_results.append(num_pickers)
@@ -457,6 +562,8 @@ def iterative_simulated_annealing(problem, logging=False, T0=100, alpha=0.95, ma
             if logging:
                 print(f"✗ No valid solution found (penalty: {penalty:.0f})")
             optimization_results.append(float('inf'))
+        if logging and states is not None:
+            print(f"    Recently seen states: {states.duplicate_rate:.1%} of the neighbours so far")
     
     if best_solution is None:
         if logging:
@@ -0,0 +1,229 @@
+from array import array
+
+
+class Solution:
+    """
+    Compact, array-backed picking plan shared by both SA variants.
+
+    All items live in one flat array, picker by picker and route by route.
+    route_offsets[r] is where (global) route r starts in flat_items and
+    picker_offsets[p] is the first global route of picker p; both end with a
+    sentinel. For every item the (picker, route, position) triple is kept in
+    three index arrays so locating an item is O(1). The route in that triple is
+    local to the picker, so rewriting one picker never touches the index of the
+    others.
+
+    picker_ids maps the position of a picker in the plan to its real id: this is
+    0..k-1 in the base variant and the selected pickers in the Extended variant.
+
+    changed collects the pickers modified since the last clear (a copy starts
+    empty), so per-picker caches such as the SA slack index can be refreshed
+    for just those pickers.
+    """
+
+    __slots__ = ("picker_ids", "flat_items", "route_offsets", "picker_offsets",
+                 "item_picker", "item_route", "item_position", "changed")
+
+    def __init__(self, routes_per_picker, picker_ids=None):
+        routes_per_picker = list(routes_per_picker)
+        if picker_ids is None:
+            picker_ids = range(len(routes_per_picker))
+        self.picker_ids = tuple(picker_ids)
+        self.changed = set()
+
+        self.flat_items = array("i")
+        self.route_offsets = array("i")
+        self.picker_offsets = array("i")
+        for picker_routes in routes_per_picker:
+            self.picker_offsets.append(len(self.route_offsets))
+            for route in picker_routes:
+                self.route_offsets.append(len(self.flat_items))
+                self.flat_items.extend(route)
+        self.picker_offsets.append(len(self.route_offsets))
+        self.route_offsets.append(len(self.flat_items))
+
+        size = max(self.flat_items) + 1 if self.flat_items else 0
+        self.item_picker = array("i", [-1]) * size
+        self.item_route = array("i", [-1]) * size
+        self.item_position = array("i", [-1]) * size
+        for p in range(len(self.picker_ids)):
+            self._index_picker(p)
+
+    @classmethod
+    def from_lists(cls, solution):
+        """Build from the base list form: solution[picker][route] = [items]"""
+        return cls(solution)
+
+    @classmethod
+    def from_dict(cls, solution, picker_ids=None):
+        """Build from the Extended dict form: solution[picker_id] = [[items], ...]"""
+        if picker_ids is None:
+            picker_ids = list(solution)
+        return cls([solution[p] for p in picker_ids], picker_ids)
+
+    def copy(self):
+        """Cheap copy: only the flat arrays are duplicated"""
+        clone = Solution.__new__(Solution)
+        clone.picker_ids = self.picker_ids
+        clone.flat_items = self.flat_items[:]
+        clone.route_offsets = self.route_offsets[:]
+        clone.picker_offsets = self.picker_offsets[:]
+        clone.item_picker = self.item_picker[:]
+        clone.item_route = self.item_route[:]
+        clone.item_position = self.item_position[:]
+        clone.changed = set()
+        return clone
+
+    # ---------------------------
+    # Read access
+    # ---------------------------
+
+    @property
+    def num_pickers(self):
+        return len(self.picker_ids)
+
+    def __len__(self):
+        return len(self.flat_items)
+
+    def route_count(self, p):
+        return self.picker_offsets[p + 1] - self.picker_offsets[p]
+
+    def route(self, p, r):
+        """Items of route r (local to picker p) as an array slice"""
+        g = self.picker_offsets[p] + r
+        return self.flat_items[self.route_offsets[g]:self.route_offsets[g + 1]]
+
+    def route_length(self, p, r):
+        g = self.picker_offsets[p] + r
+        return self.route_offsets[g + 1] - self.route_offsets[g]
+
+    def routes(self, p):
+        """All routes of picker p as array slices"""
+        offsets = self.route_offsets
+        flat = self.flat_items
+        return [flat[offsets[g]:offsets[g + 1]]
+                for g in range(self.picker_offsets[p], self.picker_offsets[p + 1])]
+
+    def picker_size(self, p):
+        """Number of items assigned to picker p"""
+        return (self.route_offsets[self.picker_offsets[p + 1]]
+                - self.route_offsets[self.picker_offsets[p]])
+
+    def non_empty_pickers(self):
+        return [p for p in range(len(self.picker_ids)) if self.picker_size(p)]
+
+    def non_empty_routes(self, p, min_length=1):
+        """Local indices of the routes of picker p holding at least min_length items"""
+        offsets = self.route_offsets
+        start = self.picker_offsets[p]
+        return [g - start for g in range(start, self.picker_offsets[p + 1])
+                if offsets[g + 1] - offsets[g] >= min_length]
+
+    def locate(self, item):
+        """Return (picker, route, position) of an item, or None if it is not planned"""
+        if item >= len(self.item_picker) or self.item_picker[item] < 0:
+            return None
+        return self.item_picker[item], self.item_route[item], self.item_position[item]
+
+    # ---------------------------
+    # Mutation
+    # ---------------------------
+
+    def swap(self, p1, r1, i1, p2, r2, i2):
+        """Swap two items in place, the route structure stays the same"""
+        a = self.route_offsets[self.picker_offsets[p1] + r1] + i1
+        b = self.route_offsets[self.picker_offsets[p2] + r2] + i2
+        flat = self.flat_items
+        flat[a], flat[b] = flat[b], flat[a]
+        self.changed.update((p1, p2))
+        self._set_index(flat[a], p1, r1, i1)
+        self._set_index(flat[b], p2, r2, i2)
+
+    def set_route(self, p, r, items):
+        """Replace route r of picker p by a reordering of the same length"""
+        g = self.picker_offsets[p] + r
+        start = self.route_offsets[g]
+        self.flat_items[start:self.route_offsets[g + 1]] = array("i", items)
+        self.changed.add(p)
+        for position, item in enumerate(items):
+            self._set_index(item, p, r, position)
+
+    def set_picker_routes(self, p, routes):
+        """
+        Replace all routes of picker p. The cost is proportional to the size of
+        the picker plus the number of routes stored after it.
+        """
+        offsets = self.route_offsets
+        g_start, g_end = self.picker_offsets[p], self.picker_offsets[p + 1]
+        i_start, i_end = offsets[g_start], offsets[g_end]
+
+        for item in self.flat_items[i_start:i_end]:
+            if self.item_picker[item] == p:
+                self.item_picker[item] = -1
+
+        new_items = array("i")
+        new_offsets = array("i")
+        for route in routes:
+            new_offsets.append(i_start + len(new_items))
+            new_items.extend(route)
+        self.flat_items[i_start:i_end] = new_items
+
+        item_delta = len(new_items) - (i_end - i_start)
+        tail = offsets[g_end:]
+        if item_delta:
+            tail = array("i", [o + item_delta for o in tail])
+        offsets[g_start:] = new_offsets + tail
+
+        route_delta = len(new_offsets) - (g_end - g_start)
+        if route_delta:
+            picker_offsets = self.picker_offsets
+            for q in range(p + 1, len(picker_offsets)):
+                picker_offsets[q] += route_delta
+
+        self._index_picker(p)
+        self.changed.add(p)
+
+    def add_picker(self, picker_id=None):
+        """Append an empty picker and return its position in the plan"""
+        if picker_id is None:
+            picker_id = len(self.picker_ids)
+        self.picker_ids = self.picker_ids + (picker_id,)
+        self.picker_offsets.append(self.picker_offsets[-1])
+        self.changed.add(len(self.picker_ids) - 1)
+        return len(self.picker_ids) - 1
+
+    def _reserve(self, item):
+        missing = item + 1 - len(self.item_picker)
+        if missing > 0:
+            padding = array("i", [-1]) * missing
+            self.item_picker.extend(padding)
+            self.item_route.extend(padding)
+            self.item_position.extend(padding)
+
+    def _set_index(self, item, p, r, position):
+        self.item_picker[item] = p
+        self.item_route[item] = r
+        self.item_position[item] = position
+
+    def _index_picker(self, p):
+        offsets = self.route_offsets
+        flat = self.flat_items
+        for r, g in enumerate(range(self.picker_offsets[p], self.picker_offsets[p + 1])):
+            for position, i in enumerate(range(offsets[g], offsets[g + 1])):
+                item = flat[i]
+                self._reserve(item)
+                self._set_index(item, p, r, position)
+
+    # ---------------------------
+    # Output
+    # ---------------------------
+
+    def to_lists(self):
+        """Base list form: solution[picker][route] = [items]"""
+        return [[route.tolist() for route in self.routes(p)]
+                for p in range(len(self.picker_ids))]
+
+    def to_dict(self):
+        """Extended dict form: solution[picker_id] = [[items], ...]"""
+        return {picker_id: [route.tolist() for route in self.routes(p)]
+                for p, picker_id in enumerate(self.picker_ids)}
@@ -0,0 +1,53 @@
+import asyncio
+import json
+import sys
+import time
+
+from solveServer import HOST, PORT
+
+
+async def solve(instance_file, seed=None, parameters=None, host=HOST, port=PORT, on_progress=None):
+    """
+    Send one solve request to a running solveServer and return the result entry.
+    on_progress, if given, is called with every progress message.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        request = {"instance": instance_file, "seed": seed, "parameters": parameters or {}}
+        writer.write((json.dumps(request) + "\n").encode())
+        await writer.drain()
+
+        while line := await reader.readline():
+            message = json.loads(line)
+            if message["event"] == "progress":
+                if on_progress is not None:
+                    on_progress(message)
+            elif message["event"] == "result":
+                return message
+            elif message["event"] == "error":
+                raise RuntimeError(message["message"])
+        raise ConnectionError("Server closed the connection before sending a result")
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def solve_all(instance_files, host=HOST, port=PORT):
+    """Solve the given instances concurrently, e.g. to load-test a local server"""
+    def print_progress(message):
+        status = "✓" if message["is_valid"] else "✗"
+        print(f"[{message['request_id']}] {status} {message['num_pickers']} pickers, "
+              f"penalty {message['penalty']:.0f}, {message['visited_nodes']} nodes")
+
+    start_time = time.time()
+    results = await asyncio.gather(*(solve(f, host=host, port=port, on_progress=print_progress)
+                                     for f in instance_files))
+    for instance_file, result in zip(instance_files, results):
+        print(f"{instance_file}: {result['num_pickers']} pickers, valid: {result['is_valid']}, "
+              f"solver: {result['solver']}, runtime: {result['runtime']} ms")
+    print(f"\n{len(results)} instances solved in {time.time() - start_time:.2f}s")
+    return results
+
+
+if __name__ == "__main__":
+    asyncio.run(solve_all(sys.argv[1:]))
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import simulatedAnnealing
+import simulatedAnnealingExtended
+from lowerBounds import bound_fields
+from exactSolver import can_solve_exactly, exact_minimum_pickers, exact_minimum_pickers_by_category
+from randomStream import new_seed
+from instanceConverter import load_instance
+
+HOST = "127.0.0.1"
+PORT = 8765
+MAX_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+SA_PARAMETERS = {
+    "T0": 100,
+    "alpha": 0.95,
+    "max_iter_per_temp": 100,
+    "stagnation_threshold": 20,
+}
+
+# ---------------------------
+# Worker side (runs in the pool processes)
+# ---------------------------
+
+# Parsed problems kept warm per worker: (path, mtime) -> (variant, problem)
+_problems = {}
+_progress_queue = None
+
+
+def _init_worker(progress_queue):
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def _load_problem(path):
+    key = (path, os.path.getmtime(path))
+    if key not in _problems:
+        instance = load_instance(path)
+        if "orderPickerCategories" in instance:
+            _problems[key] = ("extended", simulatedAnnealingExtended.OrderPickingProblem(instance))
+        else:
+            _problems[key] = ("original", simulatedAnnealing.OrderPickingProblem(instance))
+    return _problems[key]
+
+
+def _solve(request_id, path, seed, parameters):
+    """Solve one instance; progress goes to the shared queue tagged with request_id"""
+    variant, problem = _load_problem(path)
+    module = simulatedAnnealingExtended if variant == "extended" else simulatedAnnealing
+
+    def progress(status):
+        _progress_queue.put((request_id, status))
+
+    start_time = time.time()
+    if can_solve_exactly(problem):
+        exact = exact_minimum_pickers_by_category if variant == "extended" else exact_minimum_pickers
+        visited, solution, _ = exact(problem)
+        solver = "exact"
+    else:
+        visited, solution, _ = module.iterative_simulated_annealing(
+            problem, **parameters, seed=seed, progress=progress)
+        solver = "simulatedAnnealing"
+
+    return {
+        "visited_nodes": visited,
+        "runtime": int((time.time() - start_time) * 1000),
+        "num_pickers": solution[0],
+        "is_valid": solution[2],
+        "seed": seed,
+        "solver": solver,
+        "variant": variant,
+        "solution": solution[1],
+        **bound_fields(problem, solution, exact=solver == "exact"),
+    }
+
+
+# ---------------------------
+# Server side
+# ---------------------------
+
+class SolveServer:
+    """
+    Local solve service: newline-delimited JSON over TCP on localhost.
+
+    A client sends one request line
+        {"instance": "instances/instance-10_amountItems-30.json", "seed": 1, "parameters": {...}}
+    and receives {"event": "progress", ...} lines while the solver runs,
+    followed by one {"event": "result", ...} or {"event": "error", ...} line.
+    At most max_workers instances are solved at the same time; further
+    requests wait for a free worker. Workers keep parsed instances in memory.
+    """
+
+    def __init__(self, host=HOST, port=PORT, max_workers=MAX_WORKERS):
+        self.host = host
+        self.port = port
+        self.max_workers = max_workers
+        self._next_id = 0
+        self._listeners = {}
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        manager = multiprocessing.Manager()
+        self.progress_queue = manager.Queue()
+        self.pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                        initargs=(self.progress_queue,))
+        threading.Thread(target=self._forward_progress, daemon=True).start()
+
+        server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        print(f"Solve server listening on {self.host}:{self.port} with {self.max_workers} workers")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+            manager.shutdown()
+
+    def _forward_progress(self):
+        # Runs in a thread: hands progress messages from the workers to the event loop
+        while True:
+            request_id, status = self.progress_queue.get()
+            listener = self._listeners.get(request_id)
+            if listener is not None:
+                self.loop.call_soon_threadsafe(listener.put_nowait, status)
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                await self._handle_request(line, writer)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, line, writer):
+        async def send(message):
+            writer.write((json.dumps(message) + "\n").encode())
+            await writer.drain()
+
+        try:
+            request = json.loads(line)
+            path = os.path.abspath(request["instance"])
+            if not os.path.exists(path):
+                raise FileNotFoundError(request["instance"])
+        except (ValueError, KeyError, FileNotFoundError) as e:
+            await send({"event": "error", "message": f"Invalid request: {e!r}"})
+            return
+
+        seed = request.get("seed")
+        if seed is None:
+            seed = new_seed()
+        parameters = {**SA_PARAMETERS, **request.get("parameters", {})}
+
+        self._next_id += 1
+        request_id = self._next_id
+        listener = asyncio.Queue()
+        self._listeners[request_id] = listener
+        try:
+            await send({"event": "accepted", "request_id": request_id, "seed": seed})
+            job = asyncio.ensure_future(self.loop.run_in_executor(
+                self.pool, _solve, request_id, path, seed, parameters))
+            while not job.done():
+                waiter = asyncio.ensure_future(listener.get())
+                await asyncio.wait({job, waiter}, return_when=asyncio.FIRST_COMPLETED)
+                if waiter.done():
+                    await send({"event": "progress", "request_id": request_id, **waiter.result()})
+                else:
+                    waiter.cancel()
+            while not listener.empty():
+                await send({"event": "progress", "request_id": request_id, **listener.get_nowait()})
+            try:
+                result = job.result()
+            except Exception as e:
+                await send({"event": "error", "request_id": request_id, "message": repr(e)})
+                return
+            await send({"event": "result", "request_id": request_id, **result})
+        finally:
+            del self._listeners[request_id]
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else PORT
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else MAX_WORKERS
+    try:
+        asyncio.run(SolveServer(port=port, max_workers=workers).serve())
+    except KeyboardInterrupt:
+        pass
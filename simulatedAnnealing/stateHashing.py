@@ -0,0 +1,72 @@
+# recently evaluated states kept per picker count
+RECENT_STATES = 4096
+MASK = (1 << 64) - 1
+
+
+class StateTable:
+    """
+    Zobrist-style fingerprints of SA states plus a bounded table with the
+    penalty of the most recently evaluated ones.
+
+    A picker's key hashes its routes as a set of item sequences, so the order
+    of its routes does not matter. The state fingerprint is the sum of the
+    picker keys (mod 2^64), so a neighbour only rehashes the pickers in its
+    `changed` set. In the base variant pickers are interchangeable and the sum
+    makes the fingerprint independent of picker order as well. In the Extended
+    variant (by_id=True) a key includes the picker id, because categories make
+    pickers differ.
+
+    A neighbour found in the table gets its stored penalty instead of an
+    evaluate_solution call. The SA still draws the same random numbers, so
+    seeded runs give the same results with or without the table.
+    """
+
+    def __init__(self, size=RECENT_STATES, by_id=False):
+        self.size = size
+        self.by_id = by_id
+        self.table = {}
+        self.lookups = 0
+        self.hits = 0
+
+    def picker_key(self, solution, p):
+        offsets = solution.route_offsets
+        flat = solution.flat_items
+        routes = frozenset(flat[offsets[g]:offsets[g + 1]].tobytes()
+                           for g in range(solution.picker_offsets[p], solution.picker_offsets[p + 1])
+                           if offsets[g] < offsets[g + 1])
+        return hash((solution.picker_ids[p], routes)) if self.by_id else hash(routes)
+
+    def fingerprint(self, solution):
+        """(key per picker, fingerprint) of a whole solution"""
+        keys = [self.picker_key(solution, p) for p in range(solution.num_pickers)]
+        return keys, sum(keys) & MASK
+
+    def neighbor_fingerprint(self, keys, fingerprint, neighbor):
+        """({picker: new key}, fingerprint) of a neighbour of the state with these keys"""
+        changed = {p: self.picker_key(neighbor, p) for p in neighbor.changed}
+        for p, key in changed.items():
+            fingerprint += key - keys[p]
+        return changed, fingerprint & MASK
+
+    def lookup(self, fingerprint):
+        """(penalty, is_valid) of a recently evaluated state, or None"""
+        self.lookups += 1
+        known = self.table.get(fingerprint)
+        if known is not None:
+            self.hits += 1
+        return known
+
+    def store(self, fingerprint, penalty, is_valid):
+        table = self.table
+        if len(table) >= self.size:
+            # oldest entry first (dicts keep insertion order)
+            del table[next(iter(table))]
+        table[fingerprint] = (penalty, is_valid)
+
+    def clear(self):
+        """Forget the states (e.g. for a new picker count); the counters are kept"""
+        self.table.clear()
+
+    @property
+    def duplicate_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
@@ -0,0 +1,437 @@
+import simulatedAnnealing
+import simulatedAnnealingExtended
+from solution import Solution
+from randomStream import RandomStream
+from lowerBounds import picker_lower_bound
+
+TABU_PARAMETERS = {
+    "max_iterations": 3000,
+    "stagnation_threshold": 300,
+    "tenure": 10,
+    "granularity": 10,
+    "candidate_pickers": 1,
+}
+
+
+def _is_extended(problem):
+    return hasattr(problem, "picker_categories")
+
+
+def _nearest_items(problem, granularity):
+    """Per item the `granularity` items closest to it in the travel matrix"""
+    import numpy as np
+    items = list(problem.items)
+    locations = [problem.product_locations[item] for item in items]
+    travel = np.asarray(problem.travel_times, dtype=float)[np.ix_(locations, locations)]
+    distance = np.minimum(travel, travel.T)
+    np.fill_diagonal(distance, np.inf)
+    order = np.argsort(distance, axis=1, kind="stable")[:, :granularity]
+    return {item: [items[j] for j in row] for item, row in zip(items, order.tolist())}
+
+
+class _State:
+    """
+    Routes per picker with the per-picker terms of evaluate_solution (time,
+    items above capacity, items outside the category) and their penalty from
+    problem.picker_penalty. Moves keep every item exactly once, so the total
+    penalty is the sum over the pickers.
+    """
+
+    def __init__(self, problem, routes, picker_ids):
+        self.problem = problem
+        self.extended = _is_extended(problem)
+        self.picker_ids = list(picker_ids)
+        self.routes = [[list(route) for route in picker_routes if len(route)] for picker_routes in routes]
+        self.route_times = [[] for _ in self.routes]
+        self.time = [0] * len(self.routes)
+        self.over = [0] * len(self.routes)
+        self.wrong = [0] * len(self.routes)
+        self.penalty = [0] * len(self.routes)
+        # new stamp on every change, invalidates the cached moves of a picker
+        self.version = [0] * len(self.routes)
+        self.stamp = 0
+        self.picker_of = {}
+        # evaluated moves, valid while the versions of their pickers are unchanged
+        self.insertions = {}
+        self.swaps = {}
+        self.intra_moves = {}
+        for p in range(len(self.routes)):
+            self.refresh(p)
+
+    def allowed(self, p, item):
+        return not self.extended or self.problem.can_picker_pick_item(self.picker_ids[p], item)
+
+    def picker_penalty(self, time, over, wrong):
+        if self.extended:
+            return self.problem.picker_penalty(time, over, wrong)
+        return self.problem.picker_penalty(time, over)
+
+    def refresh(self, p):
+        problem = self.problem
+        self.routes[p] = [route for route in self.routes[p] if route]
+        self.route_times[p] = [problem.calculate_route_time(route) for route in self.routes[p]]
+        self.time[p] = sum(self.route_times[p])
+        self.over[p] = sum(max(0, len(route) - problem.capacity) for route in self.routes[p])
+        self.wrong[p] = sum(not self.allowed(p, item) for route in self.routes[p] for item in route)
+        self.penalty[p] = self.picker_penalty(self.time[p], self.over[p], self.wrong[p])
+        self.stamp += 1
+        self.version[p] = self.stamp
+        for route in self.routes[p]:
+            for item in route:
+                self.picker_of[item] = p
+
+    def total_penalty(self):
+        return sum(self.penalty)
+
+    def locate(self, item):
+        p = self.picker_of[item]
+        for r, route in enumerate(self.routes[p]):
+            if item in route:
+                return p, r, route.index(item)
+
+
+def _around(route, i, locations):
+    """Locations before and after position i of a route (-1 is the depot)"""
+    return (locations[route[i - 1]] if i > 0 else -1), (locations[route[i + 1]] if i + 1 < len(route) else -1)
+
+
+def _cheapest_insertion(state, p, item):
+    """(extra_time, route, position) of the cheapest insertion that keeps capacity"""
+    problem = state.problem
+    travel = problem.travel_times
+    locations = problem.product_locations
+    location = locations[item]
+    best = (travel[-1][location] + travel[location][-1], len(state.routes[p]), 0)
+    for r, route in enumerate(state.routes[p]):
+        if len(route) >= problem.capacity:
+            continue
+        previous = -1
+        for position in range(len(route) + 1):
+            following = locations[route[position]] if position < len(route) else -1
+            extra = travel[previous][location] + travel[location][following] - travel[previous][following]
+            if extra < best[0]:
+                best = (extra, r, position)
+            previous = following
+    return best
+
+
+def _removal_delta(state, p, r, i):
+    """Time change of taking the item at position i out of route r of picker p"""
+    route = state.routes[p][r]
+    if len(route) == 1:
+        return -state.route_times[p][r]
+    travel = state.problem.travel_times
+    locations = state.problem.product_locations
+    previous, following = _around(route, i, locations)
+    location = locations[route[i]]
+    return travel[previous][following] - travel[previous][location] - travel[location][following]
+
+
+def _replace_delta(state, p, r, i, item):
+    """Time change of putting item in place of the item at position i"""
+    travel = state.problem.travel_times
+    locations = state.problem.product_locations
+    route = state.routes[p][r]
+    previous, following = _around(route, i, locations)
+    new, old = locations[item], locations[route[i]]
+    return travel[previous][new] + travel[new][following] - travel[previous][old] - travel[old][following]
+
+
+def _intra_moves(state, p):
+    """
+    Improving split_route / merge_routes / reorder_route moves of picker p as
+    (key, kind, data); they only depend on p, so they are cached per version.
+    """
+    cached = state.intra_moves.get(p)
+    if cached is not None and cached[0] == state.version[p]:
+        return cached[1]
+    problem = state.problem
+    capacity = problem.capacity
+    travel = problem.travel_times
+    locations = problem.product_locations
+    time, over, wrong, penalty = state.time[p], state.over[p], state.wrong[p], state.penalty[p]
+    moves = []
+
+    def add(d_time, kind, data, new_over=over):
+        d_penalty = state.picker_penalty(time + d_time, new_over, wrong) - penalty
+        if (d_penalty, d_time) < (0, 0):
+            moves.append(((d_penalty, d_time), kind, data))
+
+    for r1, route in enumerate(state.routes[p]):
+        size = len(route)
+        path = [-1] + [locations[item] for item in route] + [-1]
+
+        # split_route: over-capacity routes only
+        if size > capacity:
+            for k in range(1, size):
+                a, b = path[k], path[k + 1]
+                add(travel[a][-1] + travel[-1][b] - travel[a][b], "split_route", (p, r1, k),
+                    over - (size - capacity) + max(0, k - capacity) + max(0, size - k - capacity))
+
+        # merge_routes: append another route of the same picker if it fits
+        for r2, other in enumerate(state.routes[p]):
+            if r2 != r1 and size + len(other) <= capacity:
+                a, b = path[-2], locations[other[0]]
+                add(travel[a][b] - travel[a][-1] - travel[-1][b], "merge_routes", (p, r1, r2))
+
+        # reorder_route: move an item to its best other position in the route
+        if size >= 3:
+            for i in range(size):
+                location = path[i + 1]
+                removal = travel[path[i]][path[i + 2]] - travel[path[i]][location] - travel[location][path[i + 2]]
+                rest = path[:i + 1] + path[i + 2:]
+                for position in range(size):
+                    if position != i:
+                        a, b = rest[position], rest[position + 1]
+                        add(removal + travel[a][location] + travel[location][b] - travel[a][b],
+                            "reorder_route", (p, r1, i, position))
+
+    state.intra_moves[p] = (state.version[p], moves)
+    return moves
+
+
+def _scan(state, iteration, tabu_until, best_penalty, nearest, candidate_pickers):
+    """
+    Best admissible move as ((penalty_delta, time_delta), kind, data, tabu attributes),
+    or None. Only the items of candidate_pickers penalised pickers, taken in turn,
+    are moved (more when those have no admissible move):
+    - move_item: to the cheapest position of every other allowed picker
+    - swap_items: with one of its nearest items in another picker
+    - split_route / merge_routes / reorder_route inside those pickers, improving moves only
+    Tabu inter-picker moves are admissible when they beat the best penalty (aspiration).
+    Evaluated moves are cached on the state until one of their pickers changes.
+    """
+    capacity = state.problem.capacity
+    current_penalty = state.total_penalty()
+    violated = sorted((p for p in range(len(state.routes)) if state.penalty[p] > 0),
+                      key=lambda p: -state.penalty[p])
+    # rotate, so a picker whose penalty cannot be lowered does not hold the scan
+    start = iteration % len(violated)
+    violated = violated[start:] + violated[:start]
+    insertion_cache, swap_cache = state.insertions, state.swaps
+    best = None
+
+    def consider(key, kind, data, attributes=()):
+        nonlocal best
+        if best is not None and key >= best[0]:
+            return
+        if any(tabu_until.get(attribute, -1) >= iteration for attribute in attributes) \
+                and current_penalty + key[0] >= best_penalty:
+            return
+        best = (key, kind, data, attributes)
+
+    for scanned, p1 in enumerate(violated):
+        if scanned >= candidate_pickers and best is not None:
+            break
+        for key, kind, data in _intra_moves(state, p1):
+            consider(key, kind, data)
+
+        for r1, route in enumerate(state.routes[p1]):
+            size = len(route)
+            for i1, item in enumerate(route):
+                removal = _removal_delta(state, p1, r1, i1)
+                over1 = state.over[p1] - (1 if size > capacity else 0)
+                wrong1 = state.wrong[p1] - (not state.allowed(p1, item))
+
+                # move_item
+                penalty1 = state.picker_penalty(state.time[p1] + removal, over1, wrong1)
+                for p2 in range(len(state.routes)):
+                    if p2 == p1 or not state.allowed(p2, item):
+                        continue
+                    cached = insertion_cache.get((item, p2))
+                    if cached is None or cached[0] != state.version[p2]:
+                        cached = (state.version[p2], _cheapest_insertion(state, p2, item))
+                        insertion_cache[(item, p2)] = cached
+                    extra, r2, position = cached[1]
+                    penalty2 = state.picker_penalty(state.time[p2] + extra, state.over[p2], state.wrong[p2])
+                    d_penalty = penalty1 + penalty2 - state.penalty[p1] - state.penalty[p2]
+                    consider((d_penalty, removal + extra), "move_item", (p1, r1, i1, p2, r2, position),
+                             ((item, p2),))
+
+                # swap_items
+                for other in nearest[item]:
+                    p2 = state.picker_of[other]
+                    if p2 == p1:
+                        continue
+                    cached = swap_cache.get((item, other))
+                    if cached is None or cached[0] != state.version[p1] or cached[1] != state.version[p2]:
+                        cached = (state.version[p1], state.version[p2], None, None)
+                        if state.allowed(p1, other) and state.allowed(p2, item):
+                            _, r2, i2 = state.locate(other)
+                            d_time1 = _replace_delta(state, p1, r1, i1, other)
+                            d_time2 = _replace_delta(state, p2, r2, i2, item)
+                            wrong2 = state.wrong[p2] - (not state.allowed(p2, other))
+                            d_penalty = (state.picker_penalty(state.time[p1] + d_time1, state.over[p1], wrong1)
+                                         + state.picker_penalty(state.time[p2] + d_time2, state.over[p2], wrong2)
+                                         - state.penalty[p1] - state.penalty[p2])
+                            cached = cached[:2] + ((d_penalty, d_time1 + d_time2), (p1, r1, i1, p2, r2, i2))
+                        swap_cache[(item, other)] = cached
+                    if cached[2] is not None:
+                        consider(cached[2], "swap_items", cached[3], ((item, p2), (other, p1)))
+    return best
+
+
+def _apply(state, kind, data):
+    """Apply a move and return the (item, picker) pairs it takes items out of"""
+    routes = state.routes
+    if kind == "move_item":
+        p1, r1, i1, p2, r2, position = data
+        item = routes[p1][r1].pop(i1)
+        if r2 == len(routes[p2]):
+            routes[p2].append([item])
+        else:
+            routes[p2][r2].insert(position, item)
+        state.refresh(p1)
+        state.refresh(p2)
+        return [(item, p1)]
+    if kind == "swap_items":
+        p1, r1, i1, p2, r2, i2 = data
+        item, other = routes[p1][r1][i1], routes[p2][r2][i2]
+        routes[p1][r1][i1], routes[p2][r2][i2] = other, item
+        state.refresh(p1)
+        state.refresh(p2)
+        return [(item, p1), (other, p2)]
+    if kind == "split_route":
+        p, r, k = data
+        route = routes[p][r]
+        routes[p][r:r + 1] = [route[:k], route[k:]]
+    elif kind == "merge_routes":
+        p, r1, r2 = data
+        routes[p][r1] = routes[p][r1] + routes[p][r2]
+        routes[p][r2] = []
+    elif kind == "reorder_route":
+        p, r, i, position = data
+        item = routes[p][r].pop(i)
+        routes[p][r].insert(position, item)
+    state.refresh(p)
+    return []
+
+
+def tabu_search_fixed_pickers(problem, routes, picker_ids, rng, max_iterations=3000, stagnation_threshold=300,
+                              tenure=10, granularity=10, candidate_pickers=1, nearest=None):
+    """
+    Tabu search for a fixed set of pickers, starting from routes.
+    Every iteration takes the best admissible move (lowest penalty, then lowest
+    total time). An item that leaves a picker may not return to it for
+    tenure..2*tenure iterations unless that gives a new best penalty.
+    Stops when valid, after max_iterations or after stagnation_threshold
+    iterations without a new best penalty.
+    Returns (best solution, is_valid, penalty, visited moves)
+    """
+    if nearest is None:
+        nearest = _nearest_items(problem, granularity)
+    state = _State(problem, routes, picker_ids)
+    best_routes = [[list(route) for route in picker_routes] for picker_routes in state.routes]
+    best_penalty = state.total_penalty()
+    tabu_until = {}
+
+    iteration = 0
+    since_best = 0
+    while best_penalty > 0 and iteration < max_iterations and since_best < stagnation_threshold:
+        iteration += 1
+        move = _scan(state, iteration, tabu_until, best_penalty, nearest, candidate_pickers)
+        if move is None:
+            break
+        _, kind, data, _ = move
+        for attribute in _apply(state, kind, data):
+            tabu_until[attribute] = iteration + tenure + rng.randint(0, tenure)
+
+        penalty = state.total_penalty()
+        if penalty < best_penalty:
+            best_penalty = penalty
+            best_routes = [[list(route) for route in picker_routes] for picker_routes in state.routes]
+            since_best = 0
+        else:
+            since_best += 1
+
+    solution = Solution(best_routes, state.picker_ids)
+    penalty, is_valid = problem.evaluate_solution(solution, len(state.picker_ids))
+    return solution, is_valid, penalty, iteration
+
+
+def _next_picker(problem, solution):
+    """
+    Picker added to a solution: the next id in the base variant; in the Extended
+    variant the unused picker allowed to take most items outside their picker's
+    category, then most items of the penalised pickers
+    """
+    if not _is_extended(problem):
+        return solution.num_pickers
+    state = _State(problem, [solution.routes(p) for p in range(solution.num_pickers)], solution.picker_ids)
+    waiting = [item for p in range(len(state.routes)) if state.penalty[p] > 0
+               for route in state.routes[p] for item in route]
+    misplaced = [item for p, routes in enumerate(state.routes) for route in routes for item in route
+                 if not state.allowed(p, item)]
+    unused = [picker_id for picker_id in range(problem.num_pickers) if picker_id not in state.picker_ids]
+    return max(unused, key=lambda picker_id: (sum(problem.can_picker_pick_item(picker_id, item) for item in misplaced),
+                                              sum(problem.can_picker_pick_item(picker_id, item) for item in waiting)))
+
+
+def iterative_tabu_search(problem, logging=False, max_pickers=None, seed=None, progress=None, **tabu_parameters):
+    """
+    Picker-count search with tabu search, like iterative_simulated_annealing:
+    start at the lower bound and add pickers until a valid solution is found.
+    The first count starts from the variant's random initial solution, every next
+    count from the best routes of the previous one plus an empty picker.
+    Same arguments, progress calls and return layout as iterative_simulated_annealing
+    of the problem's variant.
+    """
+    parameters = {**TABU_PARAMETERS, **tabu_parameters}
+    extended = _is_extended(problem)
+    if max_pickers is None:
+        max_pickers = problem.num_pickers
+    rng = RandomStream(seed)
+    nearest = _nearest_items(problem, parameters["granularity"])
+
+    lower_bound = picker_lower_bound(problem)
+    first_pickers = max(1, min(lower_bound, max_pickers + 1))
+    optimization_results = [float('inf')] * (first_pickers - 1)
+    if logging:
+        print("=== ITERATIVE TABU SEARCH ===")
+        print(f"Total items to collect: {len(problem.items)}")
+        print(f"Lower bound: {lower_bound} pickers\n")
+
+    def solve(num_pickers, previous=None):
+        if previous is not None:
+            # warm start: the best routes of one picker less plus an empty picker
+            routes = [previous.routes(p) for p in range(previous.num_pickers)] + [[]]
+            picker_ids = list(previous.picker_ids) + [_next_picker(problem, previous)]
+        elif extended:
+            selected = simulatedAnnealingExtended.select_diverse_pickers(problem, num_pickers, rng=rng)
+            initial, _ = simulatedAnnealingExtended.create_initial_solution(problem, num_pickers, selected, rng)
+            routes, picker_ids = [initial.routes(p) for p in range(initial.num_pickers)], initial.picker_ids
+        else:
+            initial = simulatedAnnealing.create_initial_solution(problem, num_pickers, rng)
+            routes, picker_ids = [initial.routes(p) for p in range(initial.num_pickers)], initial.picker_ids
+        return tabu_search_fixed_pickers(problem, routes, picker_ids, rng, nearest=nearest, **parameters)
+
+    total_visited = 0
+    result = None
+    solution = None
+    for num_pickers in range(first_pickers, max_pickers + 1):
+        solution, is_valid, penalty, visited = solve(num_pickers, solution)
+        total_visited += visited
+        if progress is not None:
+            progress({"num_pickers": num_pickers, "is_valid": is_valid,
+                      "penalty": penalty, "visited_nodes": total_visited})
+        if logging:
+            print(f"--- {num_pickers} picker{'s' if num_pickers > 1 else ''}: "
+                  + ("✓ valid" if is_valid else f"✗ penalty {penalty:.0f}"))
+        optimization_results.append(num_pickers if is_valid else float('inf'))
+        if is_valid:
+            if extended:
+                result = (num_pickers, solution.to_dict(), True, list(solution.picker_ids))
+            else:
+                result = (num_pickers, solution.to_lists(), True)
+            break
+
+    if result is None:
+        if logging:
+            print(f"\n⚠ Could not find valid solution with up to {max_pickers} pickers")
+        if extended:
+            result = (None, None, False)
+        else:
+            # best attempt with every picker, like the SA
+            solution, is_valid, _, _ = solve(max_pickers)
+            result = (max_pickers, solution.to_lists(), is_valid)
+    return total_visited, result, optimization_results
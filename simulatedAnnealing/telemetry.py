@@ -0,0 +1,153 @@
+import json
+import os
+import sys
+import time
+
+# at most one temperature-step event per this many seconds
+STEP_INTERVAL = 1.0
+# seconds between refreshes of the summary with --follow
+REFRESH_INTERVAL = 2.0
+
+
+class Telemetry:
+    """
+    Progress events of a batch run, one JSON object per line:
+    run_start / run_end, instance_start / instance_end, picker_count (after
+    every picker count tried) and temperature_step. Temperature steps are
+    rate limited to one per `interval` seconds and carry the evaluations per
+    second since the previous one, so the cost per SA step is a clock read.
+    """
+
+    def __init__(self, path, interval=STEP_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._file = open(path, "a", buffering=1)
+        self._instance = None
+        self._last_step = 0.0
+        self._last_visited = 0
+
+    def emit(self, event, **fields):
+        self._file.write(json.dumps({"time": time.time(), "event": event, **fields}) + "\n")
+
+    def run_start(self, variant, engine, total):
+        self.emit("run_start", variant=variant, engine=engine, total=total)
+
+    def run_end(self):
+        self.emit("run_end")
+
+    def instance_start(self, instance, items, solver):
+        self._instance = instance
+        self._last_step = time.monotonic()
+        self._last_visited = 0
+        self.emit("instance_start", instance=instance, items=items, solver=solver)
+
+    def instance_end(self, instance, entry):
+        self.emit("instance_end", instance=instance, runtime=entry["runtime"], num_pickers=entry["num_pickers"],
+                  is_valid=entry["is_valid"], visited_nodes=entry["visited_nodes"],
+                  cached=entry.get("cached", False))
+        self._instance = None
+
+    def picker_count(self, status):
+        """progress callback of the engines"""
+        self.emit("picker_count", instance=self._instance, **status)
+
+    def temperature_step(self, status):
+        """step_progress callback of the SA: {num_pickers, temperature, best_penalty, visited_nodes}"""
+        now = time.monotonic()
+        if now - self._last_step < self.interval:
+            return
+        visited = status["visited_nodes"]
+        rate = (visited - self._last_visited) / (now - self._last_step)
+        self.emit("temperature_step", instance=self._instance, evaluations_per_second=rate, **status)
+        self._last_step = now
+        self._last_visited = visited
+
+    def close(self):
+        self._file.close()
+
+
+def read_events(path):
+    """Events of a telemetry file; a partly written last line is skipped"""
+    events = []
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return events
+
+
+def summarize(events, now=None):
+    """
+    State of the last run in the events: instances done of total, instances
+    per minute, ETA in seconds (remaining instances at the mean time per
+    solved instance so far) and the latest event of the running instance.
+    """
+    if now is None:
+        now = time.time()
+    starts = [i for i, event in enumerate(events) if event["event"] == "run_start"]
+    if not starts:
+        return None
+    events = events[starts[-1]:]
+    run = events[0]
+    ended = [event for event in events if event["event"] == "instance_end"]
+    done = len(ended)
+    elapsed = (events[-1]["time"] if events[-1]["event"] == "run_end" else now) - run["time"]
+    remaining = run["total"] - done
+    eta = elapsed / done * remaining if done else None
+
+    current = None
+    started = [event for event in events if event["event"] == "instance_start"]
+    if started and (not ended or started[-1]["time"] > ended[-1]["time"]):
+        current = {"instance": started[-1]["instance"], "items": started[-1]["items"],
+                   "elapsed": now - started[-1]["time"]}
+        latest = [event for event in events if event["time"] >= started[-1]["time"]
+                  and event["event"] in ("picker_count", "temperature_step")]
+        if latest:
+            current["latest"] = latest[-1]
+
+    return {
+        "variant": run["variant"],
+        "engine": run["engine"],
+        "done": done,
+        "total": run["total"],
+        "valid": sum(event["is_valid"] for event in ended),
+        "cached": sum(event["cached"] for event in ended),
+        "elapsed": elapsed,
+        "instances_per_minute": done / elapsed * 60 if elapsed else 0.0,
+        "eta": eta,
+        "finished": events[-1]["event"] == "run_end",
+        "current": current,
+    }
+
+
+def _format_summary(summary):
+    eta = "-" if summary["eta"] is None else f"{summary['eta'] / 60:.1f} min"
+    lines = [f"{summary['variant']} / {summary['engine']}: {summary['done']}/{summary['total']} instances "
+             f"({summary['valid']} valid, {summary['cached']} cached) in {summary['elapsed'] / 60:.1f} min, "
+             f"{summary['instances_per_minute']:.1f} instances/min, ETA {eta}"]
+    current = summary["current"]
+    if current is not None:
+        line = f"  running {current['instance']} ({current['items']} items, {current['elapsed']:.0f} s)"
+        latest = current.get("latest")
+        if latest is not None and latest["event"] == "temperature_step":
+            line += (f": {latest['num_pickers']} pickers, T {latest['temperature']:.2f}, "
+                     f"best penalty {latest['best_penalty']}, {latest['evaluations_per_second']:.0f} evaluations/s")
+        elif latest is not None:
+            line += f": {latest['num_pickers']} pickers {'valid' if latest['is_valid'] else 'invalid'}"
+        lines.append(line)
+    if summary["finished"]:
+        lines.append("  run finished")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # python telemetry.py <telemetry file> [--follow]
+    PATH = sys.argv[1]
+    while True:
+        summary = summarize(read_events(PATH)) if os.path.exists(PATH) else None
+        print("No run started yet" if summary is None else _format_summary(summary), flush=True)
+        if "--follow" not in sys.argv or (summary is not None and summary["finished"]):
+            break
+        time.sleep(REFRESH_INTERVAL)
@@ -0,0 +1,443 @@
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+import pytz
+import simulatedAnnealing
+import simulatedAnnealingExtended
+from tabuSearch import iterative_tabu_search, TABU_PARAMETERS
+from largeNeighborhoodSearch import iterative_lns, LNS_PARAMETERS
+from lowerBounds import bound_fields
+from exactSolver import can_solve_exactly, exact_minimum_pickers, exact_minimum_pickers_by_category
+from randomStream import new_seed, derive_seed
+from resultsStore import ResultsStore, file_digest
+from instanceConverter import load_instance
+
+# queue database; put it on a filesystem all worker machines share
+QUEUE_DB = "results/queue.db"
+# instance folder -> (variant, results folder, results file prefix)
+FOLDERS = {
+    "instances": ("original", "results", "results"),
+    "instancesExtended": ("extended", "resultsExtended", "results"),
+    "instancesSameAsHexaly": ("original", "results", "results_sameAsHexaly"),
+}
+# seconds between two heartbeats of a worker
+HEARTBEAT_INTERVAL = 10
+# a claim without a heartbeat for this many seconds belongs to a crashed worker and is queued again
+STALE_AFTER = 60
+# claims of a task before it is given up (an instance that keeps killing its worker)
+MAX_ATTEMPTS = 3
+# seconds an idle worker waits before looking for re-queued claims again
+IDLE_INTERVAL = 5
+
+SA_PARAMETERS = {
+    "T0": 100,
+    "alpha": 0.95,
+    "max_iter_per_temp": 100,
+    "stagnation_threshold": 20,
+}
+# compiled SA loop when Numba is installed; same results as the Python loop
+USE_JIT = True
+ENGINE_PARAMETERS = {
+    "simulatedAnnealing": SA_PARAMETERS,
+    "tabuSearch": TABU_PARAMETERS,
+    "largeNeighborhoodSearch": LNS_PARAMETERS,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sweeps (
+    sweep_id    INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at  TEXT NOT NULL,
+    run_seed    INTEGER NOT NULL,
+    engine      TEXT NOT NULL,
+    merged      INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    sweep_id      INTEGER NOT NULL REFERENCES sweeps(sweep_id),
+    folder        TEXT NOT NULL,
+    file          TEXT NOT NULL,
+    size          INTEGER NOT NULL,
+    instance_hash TEXT NOT NULL,
+    seed          INTEGER NOT NULL,
+    status        TEXT NOT NULL DEFAULT 'pending',
+    worker        TEXT,
+    heartbeat_at  REAL,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    entry         TEXT,
+    error         TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status, size);
+CREATE INDEX IF NOT EXISTS idx_tasks_sweep ON tasks(sweep_id, status);
+"""
+
+
+class WorkQueue:
+    """
+    SQLite work queue of a distributed batch run. A sweep queues one task per
+    instance file; workers on any machine claim tasks in one write
+    transaction, so a task is never handed out twice. A claimed task carries
+    the heartbeat of its worker; claims without a heartbeat for STALE_AFTER
+    seconds are queued again by the next claim.
+
+    Task states: pending -> claimed -> done, or failed after an exception or
+    MAX_ATTEMPTS lost claims.
+    """
+
+    def __init__(self, path=QUEUE_DB, timeout=60):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # autocommit; every change runs in its own BEGIN IMMEDIATE transaction
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def _write(self, sql, args=()):
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = connection.execute(sql, args)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return cursor
+
+    # ---------------------------
+    # Producer
+    # ---------------------------
+
+    def add_sweep(self, folders, run_seed, engine="simulatedAnnealing"):
+        """Queue every instance of the folders; returns the sweep_id"""
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            sweep_id = connection.execute(
+                "INSERT INTO sweeps (created_at, run_seed, engine) VALUES (?, ?, ?)",
+                (datetime.now().strftime("%Y-%m-%d %H:%M:%S"), run_seed, engine),
+            ).lastrowid
+            rows = []
+            for folder in folders:
+                for file in sorted(os.listdir(folder)):
+                    if not file.endswith(".json"):
+                        continue
+                    path = os.path.join(folder, file)
+                    instance_id = file.split("-")[1].split("_")[0]
+                    rows.append((sweep_id, folder, file, os.path.getsize(path), file_digest([path]),
+                                 derive_seed(run_seed, instance_id)))
+            connection.executemany(
+                "INSERT INTO tasks (sweep_id, folder, file, size, instance_hash, seed) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return sweep_id
+
+    # ---------------------------
+    # Workers
+    # ---------------------------
+
+    def claim(self, worker, stale_after=STALE_AFTER, max_attempts=MAX_ATTEMPTS):
+        """
+        Claim the largest pending task for `worker` (long solves first, so they
+        do not end up last) after re-queueing stale claims. Returns the task
+        joined with its sweep as a dict, or None when nothing is pending.
+        """
+        connection = self.connection
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = CASE WHEN attempts >= ? THEN 'worker lost ' || attempts || ' times' END, worker = NULL "
+                "WHERE status = 'claimed' AND heartbeat_at < ?",
+                (max_attempts, max_attempts, now - stale_after),
+            )
+            row = connection.execute(
+                "SELECT tasks.*, sweeps.run_seed, sweeps.engine FROM tasks "
+                "JOIN sweeps ON sweeps.sweep_id = tasks.sweep_id "
+                "WHERE status = 'pending' ORDER BY size DESC, task_id LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE tasks SET status = 'claimed', worker = ?, heartbeat_at = ?, attempts = attempts + 1 "
+                    "WHERE task_id = ?",
+                    (worker, now, row["task_id"]),
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return None if row is None else dict(row)
+
+    def heartbeat(self, task_id, worker):
+        """Renew a claim; False when it was lost (re-queued and possibly claimed by another worker)"""
+        cursor = self._write("UPDATE tasks SET heartbeat_at = ? WHERE task_id = ? AND worker = ? "
+                             "AND status = 'claimed'", (time.time(), task_id, worker))
+        return cursor.rowcount == 1
+
+    def complete(self, task_id, worker, entry):
+        """Store the result entry of a claimed task; False when the claim was lost"""
+        cursor = self._write("UPDATE tasks SET status = 'done', entry = ? WHERE task_id = ? AND worker = ? "
+                             "AND status = 'claimed'", (json.dumps(entry), task_id, worker))
+        return cursor.rowcount == 1
+
+    def fail(self, task_id, worker, error):
+        self._write("UPDATE tasks SET status = 'failed', error = ? WHERE task_id = ? AND worker = ? "
+                    "AND status = 'claimed'", (error, task_id, worker))
+
+    # ---------------------------
+    # Reading
+    # ---------------------------
+
+    def counts(self, sweep_id=None):
+        """{status: number of tasks} of one sweep or of the whole queue"""
+        sql = "SELECT status, COUNT(*) AS count FROM tasks"
+        args = ()
+        if sweep_id is not None:
+            sql += " WHERE sweep_id = ?"
+            args = (sweep_id,)
+        return {row["status"]: row["count"] for row in self.connection.execute(sql + " GROUP BY status", args)}
+
+    def sweep(self, sweep_id=None):
+        """A sweep as a dict (the latest one when sweep_id is None), or None"""
+        if sweep_id is None:
+            row = self.connection.execute("SELECT * FROM sweeps ORDER BY sweep_id DESC LIMIT 1").fetchone()
+        else:
+            row = self.connection.execute("SELECT * FROM sweeps WHERE sweep_id = ?", (sweep_id,)).fetchone()
+        return None if row is None else dict(row)
+
+    def entries(self, sweep_id, folder):
+        """Result entries of the finished tasks of one folder in a sweep"""
+        rows = self.connection.execute(
+            "SELECT entry FROM tasks WHERE sweep_id = ? AND folder = ? AND status = 'done' ORDER BY task_id",
+            (sweep_id, folder),
+        )
+        return [json.loads(row["entry"]) for row in rows]
+
+    def folders(self, sweep_id):
+        rows = self.connection.execute("SELECT DISTINCT folder FROM tasks WHERE sweep_id = ? ORDER BY folder",
+                                       (sweep_id,))
+        return [row["folder"] for row in rows]
+
+    def mark_merged(self, sweep_id):
+        self._write("UPDATE sweeps SET merged = 1 WHERE sweep_id = ?", (sweep_id,))
+
+
+def solve_task(task):
+    """Solve one queued instance like the batch scripts; returns its results entry"""
+    variant = FOLDERS[task["folder"]][0]
+    module = simulatedAnnealingExtended if variant == "extended" else simulatedAnnealing
+    problem = module.OrderPickingProblem(load_instance(os.path.join(task["folder"], task["file"])))
+    engine, seed = task["engine"], task["seed"]
+
+    start_time = time.time()
+    if can_solve_exactly(problem):
+        exact = exact_minimum_pickers_by_category if variant == "extended" else exact_minimum_pickers
+        visited, solution, _ = exact(problem)
+        solver = "exact"
+    elif engine == "tabuSearch":
+        visited, solution, _ = iterative_tabu_search(problem, **TABU_PARAMETERS, seed=seed)
+        solver = engine
+    elif engine == "largeNeighborhoodSearch":
+        visited, solution, _ = iterative_lns(problem, **LNS_PARAMETERS, seed=seed)
+        solver = engine
+    elif variant == "extended":
+        visited, solution, _ = module.iterative_simulated_annealing(problem, **SA_PARAMETERS, seed=seed)
+        solver = engine
+    else:
+        visited, solution, _ = module.iterative_simulated_annealing(problem, **SA_PARAMETERS, seed=seed,
+                                                                    jit=USE_JIT)
+        solver = engine
+    run_time_ms = int((time.time() - start_time) * 1000)
+
+    entry = {
+        "visited_nodes": visited,
+        "runtime": run_time_ms,
+        "num_pickers": solution[0],
+        "is_valid": solution[2],
+        "seed": seed,
+        "solver": solver,
+    }
+    entry.update(bound_fields(problem, solution, exact=solver == "exact"))
+    file = task["file"]
+    entry["id"] = file.split("-")[1].split("_")[0]
+    entry["type"] = file.split("-")[1].split("_")[1]
+    entry["param_value"] = file.split("-")[2].split(".")[0]
+    return entry
+
+
+def _heartbeats(path, task_id, worker, stop, lost, interval):
+    """Heartbeat thread of a worker: renews the claim until stop is set"""
+    with WorkQueue(path) as work_queue:
+        while not stop.wait(interval):
+            if not work_queue.heartbeat(task_id, worker):
+                lost.set()
+                return
+
+
+def run_worker(path=QUEUE_DB, worker=None, heartbeat_interval=HEARTBEAT_INTERVAL, logging=True):
+    """
+    Claim and solve tasks until none are pending or claimed by other workers
+    (claims of crashed workers are picked up once stale). Returns the number
+    of tasks this worker finished.
+    """
+    if worker is None:
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+    finished = 0
+    with WorkQueue(path) as work_queue:
+        while True:
+            task = work_queue.claim(worker)
+            if task is None:
+                if work_queue.counts().get("claimed"):
+                    time.sleep(IDLE_INTERVAL)
+                    continue
+                break
+
+            stop, lost = threading.Event(), threading.Event()
+            beat = threading.Thread(target=_heartbeats, daemon=True,
+                                    args=(path, task["task_id"], worker, stop, lost, heartbeat_interval))
+            beat.start()
+            try:
+                entry = solve_task(task)
+            except Exception as error:
+                stop.set()
+                beat.join()
+                work_queue.fail(task["task_id"], worker, repr(error))
+                if logging:
+                    print(f"[{worker}] {task['folder']}/{task['file']} failed: {error!r}", flush=True)
+                continue
+            stop.set()
+            beat.join()
+
+            if work_queue.complete(task["task_id"], worker, entry):
+                finished += 1
+                if logging:
+                    print(f"[{worker}] {task['folder']}/{task['file']}: {entry['num_pickers']} pickers, "
+                          f"{entry['runtime']} ms", flush=True)
+            elif logging:
+                print(f"[{worker}] {task['folder']}/{task['file']}: claim lost, result dropped", flush=True)
+    return finished
+
+
+def run_local_workers(path=QUEUE_DB, processes=os.cpu_count() or 1):
+    """Run `processes` workers on this machine and wait for them"""
+    workers = [multiprocessing.Process(target=run_worker, args=(path, f"{socket.gethostname()}:local-{i}"))
+               for i in range(processes)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+
+
+def merge(path=QUEUE_DB, sweep_id=None, allow_partial=False):
+    """
+    Write the standard results file of every folder of a finished sweep
+    (results/results_<timestamp>.json, resultsExtended/... for the Extended
+    instances) and register it as a batch run in the results store.
+    Returns the written paths; raises RuntimeError while tasks are still open
+    (unless allow_partial) and for a sweep merged before.
+    """
+    with WorkQueue(path) as work_queue:
+        sweep = work_queue.sweep(sweep_id)
+        if sweep is None:
+            raise RuntimeError("No sweep in the queue")
+        sweep_id = sweep["sweep_id"]
+        if sweep["merged"]:
+            raise RuntimeError(f"Sweep {sweep_id} is already merged")
+        counts = work_queue.counts(sweep_id)
+        open_tasks = counts.get("pending", 0) + counts.get("claimed", 0)
+        if open_tasks and not allow_partial:
+            raise RuntimeError(f"Sweep {sweep_id} still has {open_tasks} open tasks")
+        per_folder = {folder: work_queue.entries(sweep_id, folder) for folder in work_queue.folders(sweep_id)}
+
+        current_time = datetime.now(pytz.timezone("Europe/Brussels"))
+        timestamp = current_time.strftime("%Y-%m-%d_%H-%M-%S")
+        written = []
+        with ResultsStore() as store:
+            for folder, entries in per_folder.items():
+                variant, results_folder, prefix = FOLDERS[folder]
+                entries.sort(key=lambda entry: int(entry["id"]))
+                output = f"{results_folder}/{prefix}_{timestamp}.json"
+                with open(output, "w") as out:
+                    json.dump(entries, out, indent=4)
+                kind = "batch" if prefix == "results" else prefix.split("_", 1)[1]
+                run_id = store.start_run(variant, kind, current_time, source=output)
+                store.add_results(run_id, entries, ENGINE_PARAMETERS[sweep["engine"]])
+                written.append(output)
+        work_queue.mark_merged(sweep_id)
+    return written
+
+
+def _status(path):
+    with WorkQueue(path) as work_queue:
+        sweep = work_queue.sweep()
+        if sweep is None:
+            return "Queue is empty"
+        counts = work_queue.counts(sweep["sweep_id"])
+        total = sum(counts.values())
+        return (f"Sweep {sweep['sweep_id']} ({sweep['engine']}, seed {sweep['run_seed']}, "
+                f"{'merged' if sweep['merged'] else 'not merged'}): "
+                + ", ".join(f"{counts.get(status, 0)} {status}" for status in ("pending", "claimed", "done", "failed"))
+                + f" of {total}")
+
+
+if __name__ == "__main__":
+    # python workQueue.py enqueue [seed] [--folders=instances,instancesExtended,...] [--engine=<name>]
+    # python workQueue.py work [--processes=N] [--worker=<name>]
+    # python workQueue.py status
+    # python workQueue.py merge [sweep_id] [--partial]
+    # every command takes --queue=<path> (default results/queue.db)
+    ARGS = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    OPTIONS = dict(arg[2:].split("=", 1) for arg in sys.argv[1:] if arg.startswith("--") and "=" in arg)
+    COMMAND = ARGS[0] if ARGS else "status"
+    QUEUE = OPTIONS.get("queue", QUEUE_DB)
+
+    if COMMAND == "enqueue":
+        ENGINE = OPTIONS.get("engine", "simulatedAnnealing")
+        if ENGINE not in ENGINE_PARAMETERS:
+            sys.exit(f"Unknown engine {ENGINE!r}, choose from {', '.join(ENGINE_PARAMETERS)}")
+        SWEEP_FOLDERS = OPTIONS["folders"].split(",") if "folders" in OPTIONS else list(FOLDERS)
+        unknown = [folder for folder in SWEEP_FOLDERS if folder not in FOLDERS]
+        if unknown:
+            sys.exit(f"Unknown instance folder {unknown[0]!r}, choose from {', '.join(FOLDERS)}")
+        RUN_SEED = int(ARGS[1]) if len(ARGS) > 1 else new_seed()
+        with WorkQueue(QUEUE) as work_queue:
+            sweep_id = work_queue.add_sweep(SWEEP_FOLDERS, RUN_SEED, ENGINE)
+            print(f"Queued sweep {sweep_id}: {sum(work_queue.counts(sweep_id).values())} instances, "
+                  f"seed {RUN_SEED}")
+    elif COMMAND == "work":
+        if "processes" in OPTIONS:
+            run_local_workers(QUEUE, int(OPTIONS["processes"]))
+        else:
+            run_worker(QUEUE, OPTIONS.get("worker"))
+        print(_status(QUEUE))
+    elif COMMAND == "status":
+        print(_status(QUEUE))
+    elif COMMAND == "merge":
+        try:
+            paths = merge(QUEUE, int(ARGS[1]) if len(ARGS) > 1 else None, "--partial" in sys.argv)
+        except RuntimeError as error:
+            sys.exit(str(error))
+        for output in paths:
+            print(f"Saved → {output}")
+    else:
+        sys.exit(f"Unknown command {COMMAND!r}: enqueue, work, status or merge")